@@ -0,0 +1,124 @@
+"""
+Mede a latência de aborto (pedido de parada -> worker ocioso) do executor de missões.
+Roda missões simuladas pelo caminho real de `TelloGUI._execute_ai_sequence`, com drone
+e provedor falsos. O aborto é disparado em momentos aleatórios: durante uma chamada
+lenta à IA, durante a espera de inércia e logo após o envio de um comando. Reporta
+p50/p95/máximo por fase e falha (código de saída 1) se o p95 passar da meta.
+
+Uso (a partir da pasta codes/; requer um display, ex.: xvfb-run):
+    python benchmarks/abort_latency.py --trials 50 --ai-delay 2.0
+"""
+import argparse
+import contextlib
+import os
+import queue
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import soak # noqa: E402
+from modules import mission_executor # noqa: E402
+import modules.chatbot as chatbot # noqa: E402
+
+PHASES = ('ia', 'espera', 'comando')
+
+
+class SlowOpenAIClient(soak.FakeOpenAIClient):
+    """Cliente falso cuja resposta demora como uma chamada de rede real."""
+    def __init__(self, delay: float) -> None:
+        super().__init__()
+        self.delay = delay
+
+    def _create(self, **kwargs):
+        time.sleep(self.delay)
+        return super()._create(**kwargs)
+
+
+class QueueingTello(soak.FakeTello):
+    """Drone falso com fila de comandos, para conferir que o aborto a esvazia."""
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.command_queue = queue.Queue()
+
+    def add_command(self, command: str) -> None:
+        super().add_command(command)
+        self.command_queue.put(command)
+
+
+def percentiles(values: list[float]) -> str:
+    if not values:
+        return "sem amostras"
+    arr = np.asarray(values, dtype=np.float64)
+    return (f"p50 {np.percentile(arr, 50):6.1f} ms | p95 {np.percentile(arr, 95):6.1f} ms | "
+            f"máx {arr.max():6.1f} ms (n={len(arr)})")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trials', type=int, default=30, help='Abortos por fase')
+    parser.add_argument('--ai-delay', type=float, default=2.0, help='Duração simulada de cada chamada à IA (s)')
+    parser.add_argument('--wait', type=float, default=3.0, help='Espera de inércia simulada por comando (s)')
+    parser.add_argument('--target-ms', type=float, default=mission_executor.ABORT_TARGET_MS, help='Meta para o p95')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    soak.install_fake_providers()
+    chatbot.client_openai = SlowOpenAIClient(args.ai_delay)
+    chatbot.set_provider('OPENAI')
+    app = soak.build_app()
+    app.tello = QueueingTello()
+    app.command_tracker.tello = app.tello
+    app.tello.set_image_size((960, 720))
+    app._calculate_wait_time = lambda command: args.wait # type: ignore
+    for _ in range(5):
+        app.update_video_frame()
+    app.root.after = lambda *args, **kwargs: '' # type: ignore # O worker não deve tocar em widgets Tk
+    soak.interface.STALE_FRAME_MS = float('inf') # Os frames do harness não são renovados durante as missões
+
+    executor = app.mission_executor
+    results: dict[str, list[float]] = {phase: [] for phase in PHASES}
+    leftover_commands = 0
+    devnull = open(os.devnull, 'w')
+
+    for phase in PHASES:
+        for _ in range(args.trials):
+            with contextlib.redirect_stdout(devnull):
+                executor.submit(app._execute_ai_sequence, 'Missão de aborto')
+                if phase == 'ia':
+                    time.sleep(rng.uniform(0.05, args.ai_delay * 0.9))
+                elif phase == 'espera':
+                    time.sleep(args.ai_delay + rng.uniform(0.05, args.wait * 0.9))
+                else:
+                    time.sleep(args.ai_delay + 0.01)
+                    app.tello.add_command('forward 50') # Comando ainda pendente na fila no momento do aborto
+                executor.abort()
+                if not executor.wait_idle(5.0):
+                    print(f"Worker não ficou ocioso na fase '{phase}'.", file=sys.stderr)
+                    return 1
+            results[phase].append(executor.abort_latencies_ms[-1])
+            leftover_commands += app.tello.command_queue.qsize()
+    devnull.close()
+
+    print(f"Abortos: {args.trials} por fase, IA simulada de {args.ai_delay}s, espera de {args.wait}s\n")
+    all_latencies = []
+    for phase in PHASES:
+        print(f"{phase:8s} {percentiles(results[phase])}")
+        all_latencies.extend(results[phase])
+    print(f"{'total':8s} {percentiles(all_latencies)}")
+    print(f"Comandos restantes na fila após abortos: {leftover_commands}")
+
+    p95 = float(np.percentile(all_latencies, 95))
+    app.root.destroy()
+    if p95 > args.target_ms or leftover_commands:
+        print(f"\nFALHA: p95 {p95:.1f} ms (meta {args.target_ms} ms) ou fila não esvaziada.")
+        return 1
+    print(f"\nOK: p95 {p95:.1f} ms dentro da meta de {args.target_ms} ms.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
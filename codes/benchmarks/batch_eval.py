@@ -0,0 +1,371 @@
+"""
+Avaliação em lote de prompts, modelos e da sobreposição de grade sobre frames gravados.
+Cada caso do conjunto (frame + objetivo + comando esperado) passa por `chatbot.run_ai` em
+cada configuração, e o relatório compara concordância de comandos, taxa de falhas de
+parse, latência e vazão.
+
+Etapas:
+    1. Pré-processamento (CPU): decodificação e redimensionamento dos frames em um pool de processos.
+    2. Chamadas aos provedores (E/S): concorrência limitada com asyncio. O chatbot guarda o estado da
+       conversa em variáveis do módulo, por isso cada chamada em andamento roda em um processo próprio;
+       a sobreposição da grade e a codificação JPEG também escalam com os núcleos.
+
+Conjunto de dados: pasta com `cases.jsonl`, uma linha por caso:
+    {"frame": "frames/0001.jpg", "objective": "...", "expected": "forward 50",
+     "step": 0, "height": 100, "last_action": "Nenhuma.", "max_steps": 7}
+Pode ser gerado das gravações do botão "Gravar Vídeo" com --from-recordings.
+
+Configurações (--configs, JSON): lista de objetos com
+    name, provider (GEMINI/OPENAI/LOCAL), model (opcional), grid (padrão true),
+    prompt (opcional, "modulo:funcao" com a assinatura de chatbot.get_step_prompt).
+
+Uso (a partir da pasta codes/):
+    python benchmarks/batch_eval.py dataset/ --configs configs.json --concurrency 8
+    python benchmarks/batch_eval.py dataset/ --stand-in --stand-in-latency 0.4 --scaling   # CI, sem rede
+    python benchmarks/batch_eval.py dataset/ --from-recordings recordings/ --stand-in
+"""
+import argparse
+import asyncio
+import csv
+import glob
+import importlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import modules.accounting as accounting # noqa: E402
+import modules.chatbot as chatbot # noqa: E402
+
+VIDEO_SIZE = (800, 600) # Tamanho dos frames na GUI (TelloGUI.video_size)
+DEFAULT_HEIGHT = 100 # Altura usada quando o caso não informa
+REPORTS_DIR = 'eval_reports'
+MODEL_VARIABLES = {'GEMINI': 'GEMINI_MODEL_NAME', 'OPENAI': 'OPENAI_MODEL_NAME', 'LOCAL': 'LOCAL_MODEL_NAME'}
+STAND_IN_PROVIDERS = ('OPENAI', 'LOCAL')
+
+
+# --- Conjunto de dados ---
+
+def load_cases(dataset_dir: str, limit: int | None = None) -> list[dict]:
+    """Lê `cases.jsonl` do conjunto, resolvendo os caminhos dos frames."""
+    cases = []
+    with open(os.path.join(dataset_dir, 'cases.jsonl'), encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                case = json.loads(line)
+                case['frame'] = os.path.join(dataset_dir, case['frame'])
+                cases.append(case)
+    return cases[:limit] if limit else cases
+
+def build_dataset_from_recordings(recordings_dir: str, dataset_dir: str) -> int:
+    """
+    Gera um conjunto de dados a partir dos segmentos do VideoRecorder.
+    Cada marcador de passo da IA (não repetido de rota) vira um caso com o último frame gravado
+    antes do marcador e o comando executado como esperado.
+    Args:
+        recordings_dir (str): Pasta com os segmentos (.mp4 + .jsonl).
+        dataset_dir (str): Pasta de destino.
+    Returns:
+        int: Quantidade de casos gerados.
+    """
+    import cv2
+
+    frames_dir = os.path.join(dataset_dir, 'frames')
+    os.makedirs(frames_dir, exist_ok=True)
+    objective, last_action = None, 'Nenhuma.'
+    cases = []
+    for index_path in sorted(glob.glob(os.path.join(recordings_dir, '*.jsonl'))):
+        with open(index_path, encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        if not entries:
+            continue
+        video_path = os.path.join(recordings_dir, entries[0]['video'])
+        frame_entries = [(e['frame'], e['ts']) for e in entries if 'frame' in e]
+        capture = cv2.VideoCapture(video_path)
+        for entry in entries[1:]:
+            marker = entry.get('marker')
+            if marker == 'mission_start':
+                objective, last_action = entry.get('objective'), 'Nenhuma.'
+            elif marker == 'step' and objective and entry.get('command') and not entry.get('replay'):
+                before = [frame for frame, ts in frame_entries if ts <= entry['ts']]
+                if not before:
+                    continue
+                capture.set(cv2.CAP_PROP_POS_FRAMES, before[-1])
+                ok, frame = capture.read()
+                if not ok:
+                    continue
+                name = f'{len(cases):05d}.jpg'
+                cv2.imwrite(os.path.join(frames_dir, name), frame)
+                cases.append({'frame': f'frames/{name}', 'objective': objective, 'expected': entry['command'],
+                              'step': entry.get('step', 1) - 1, 'height': DEFAULT_HEIGHT, 'last_action': last_action})
+                last_action = entry['command']
+        capture.release()
+
+    with open(os.path.join(dataset_dir, 'cases.jsonl'), 'w', encoding='utf-8') as f:
+        for case in cases:
+            f.write(json.dumps(case, ensure_ascii=False) + '\n')
+    return len(cases)
+
+
+# --- Etapa 1: pré-processamento (processos) ---
+
+def preprocess_frame(path: str) -> Image.Image:
+    """Decodifica e redimensiona um frame para o tamanho usado pela GUI."""
+    with Image.open(path) as image:
+        return image.convert('RGB').resize(VIDEO_SIZE, Image.Resampling.BILINEAR)
+
+def preprocess_all(paths: list[str], workers: int) -> tuple[list[Image.Image], float]:
+    """
+    Pré-processa os frames em um pool de processos.
+    Returns:
+        tuple: (imagens, segundos gastos)
+    """
+    start = time.perf_counter()
+    if workers <= 1:
+        images = [preprocess_frame(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            images = list(pool.map(preprocess_frame, paths, chunksize=max(1, len(paths) // (workers * 4))))
+    return images, time.perf_counter() - start
+
+
+# --- Etapa 2: chamadas aos provedores (um processo por chamada em andamento) ---
+
+def _init_worker(config: dict, stand_in_url: str | None, quiet: bool) -> None:
+    """Configura o chatbot do processo de trabalho para uma configuração."""
+    if quiet:
+        sys.stdout = open(os.devnull, 'w')
+    provider = config['provider']
+    if stand_in_url:
+        os.environ['OLLAMA_HOST'] = stand_in_url # Lido quando o cliente do Ollama é importado
+        if provider == 'OPENAI':
+            from openai import OpenAI
+            chatbot.client_openai = OpenAI(base_url=stand_in_url + '/v1', api_key='stand-in')
+            chatbot.PROVIDERS['OPENAI'].loaded = True
+    if config.get('model'):
+        setattr(chatbot, MODEL_VARIABLES[provider], config['model'])
+        chatbot.PROVIDERS[provider].model_name = config['model']
+    if not config.get('grid', True):
+        chatbot.add_grid_to_image = lambda image: image
+    if config.get('prompt'):
+        module_name, function_name = config['prompt'].split(':')
+        chatbot.get_step_prompt = getattr(importlib.import_module(module_name), function_name)
+    chatbot.set_provider(provider)
+
+def _counter_delta(after: dict[str, dict[str, int]], before: dict[str, dict[str, int]], key: str) -> int:
+    return sum(stats.get(key, 0) for stats in after.values()) - sum(stats.get(key, 0) for stats in before.values())
+
+def _snapshot() -> tuple[dict, dict, dict]:
+    return ({p: dict(s) for p, s in accounting.parse_stats.items()},
+            {p: dict(e) for p, e in accounting.provider_events.items()},
+            dict(accounting.session_totals))
+
+def evaluate_case(case: dict, image: Image.Image) -> dict:
+    """Executa um caso no processo de trabalho. Cada caso é um passo isolado (sem histórico de conversa)."""
+    provider = chatbot.PROVIDERS[chatbot.AI_PROVIDER]
+    if provider.reset:
+        provider.reset()
+    parse_before, events_before, totals_before = _snapshot()
+    start = time.perf_counter()
+    error = None
+    try:
+        _, command, _, _ = chatbot.run_ai(
+            text=case['objective'],
+            frame=image,
+            step=case.get('step', 0),
+            height=case.get('height', DEFAULT_HEIGHT),
+            last_action=case.get('last_action', 'Nenhuma.'),
+            max_steps=case.get('max_steps', 7),
+        )
+    except Exception as e:
+        command, error = None, str(e)
+    latency = time.perf_counter() - start
+    parse_after, events_after, totals_after = _snapshot()
+
+    expected = chatbot.fix_command(case.get('expected') or '')
+    parse_status = next((status for status in ('failed', 'repaired', 'ok')
+                         if _counter_delta(parse_after, parse_before, status)), None)
+    return {
+        'frame': os.path.basename(case['frame']),
+        'objective': case['objective'],
+        'expected': expected,
+        'command': command,
+        'match': command == expected,
+        'action_match': (command or 'none').split()[0] == (expected or 'none').split()[0],
+        'parse': parse_status,
+        'fallback': _counter_delta(events_after, events_before, 'fallback') > 0,
+        'latency_s': latency,
+        'input_tokens': totals_after['input_tokens'] - totals_before['input_tokens'],
+        'output_tokens': totals_after['output_tokens'] - totals_before['output_tokens'],
+        'cost_usd': totals_after['cost_usd'] - totals_before['cost_usd'],
+        'error': error,
+    }
+
+async def evaluate_config(config: dict, cases: list[dict], images: list[Image.Image], concurrency: int,
+                          stand_in_url: str | None, quiet: bool) -> tuple[list[dict], float]:
+    """
+    Avalia todos os casos em uma configuração com no máximo `concurrency` chamadas em andamento.
+    Returns:
+        tuple: (resultados por caso, segundos de parede)
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    with ProcessPoolExecutor(max_workers=concurrency, initializer=_init_worker,
+                             initargs=(config, stand_in_url, quiet)) as pool:
+        async def run_one(case: dict, image: Image.Image) -> dict:
+            async with semaphore:
+                return await loop.run_in_executor(pool, evaluate_case, case, image)
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(run_one(case, image) for case, image in zip(cases, images)))
+        return list(results), time.perf_counter() - start
+
+
+# --- Relatório ---
+
+def summarize(name: str, results: list[dict], wall_s: float) -> dict:
+    """Agrega os resultados de uma configuração."""
+    latencies = np.asarray([r['latency_s'] for r in results], dtype=np.float64)
+    parsed = [r for r in results if r['parse']]
+    count = len(results)
+    return {
+        'config': name,
+        'cases': count,
+        'agreement': sum(r['match'] for r in results) / count,
+        'action_agreement': sum(r['action_match'] for r in results) / count,
+        'parse_failure_rate': sum(r['parse'] == 'failed' for r in parsed) / len(parsed) if parsed else 0.0,
+        'parse_repaired_rate': sum(r['parse'] == 'repaired' for r in parsed) / len(parsed) if parsed else 0.0,
+        'fallbacks': sum(r['fallback'] for r in results),
+        'errors': sum(bool(r['error']) for r in results),
+        'latency_p50_s': float(np.percentile(latencies, 50)),
+        'latency_p95_s': float(np.percentile(latencies, 95)),
+        'throughput_cases_s': count / wall_s if wall_s > 0 else 0.0,
+        'tokens': sum(r['input_tokens'] + r['output_tokens'] for r in results),
+        'cost_usd': sum(r['cost_usd'] for r in results),
+    }
+
+def print_report(summaries: list[dict]) -> None:
+    header = (f"{'configuração':24s} {'casos':>6s} {'concord.':>9s} {'ação':>7s} {'parse✗':>7s} {'conting.':>8s} "
+              f"{'p50 (s)':>8s} {'p95 (s)':>8s} {'casos/s':>8s} {'US$':>9s}")
+    print('\n' + header)
+    print('-' * len(header))
+    for s in sorted(summaries, key=lambda s: -s['agreement']):
+        print(f"{s['config']:24s} {s['cases']:6d} {s['agreement']:9.1%} {s['action_agreement']:7.1%} "
+              f"{s['parse_failure_rate']:7.1%} {s['fallbacks']:8d} {s['latency_p50_s']:8.2f} {s['latency_p95_s']:8.2f} "
+              f"{s['throughput_cases_s']:8.2f} {s['cost_usd']:9.5f}")
+
+def write_report(output_dir: str, summaries: list[dict], results: dict[str, list[dict]], preprocess: dict) -> str:
+    """Grava o resumo (JSON) e os resultados por caso (CSV). Retorna o caminho do JSON."""
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = time.strftime('%Y%m%d_%H%M%S')
+    json_path = os.path.join(output_dir, f'batch_eval_{stamp}.json')
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({'preprocess': preprocess, 'configs': summaries}, f, ensure_ascii=False, indent=2)
+    csv_path = os.path.join(output_dir, f'batch_eval_{stamp}_cases.csv')
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        rows = [{'config': name, **row} for name, rows in results.items() for row in rows]
+        if rows:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    return json_path
+
+def preprocess_scaling(paths: list[str], max_workers: int) -> list[dict]:
+    """Mede a vazão do pré-processamento com 1, 2, 4... processos até max_workers."""
+    counts, workers = [], 1
+    while workers < max_workers:
+        counts.append(workers)
+        workers *= 2
+    counts.append(max_workers)
+    rows, baseline = [], None
+    for workers in counts:
+        _, seconds = preprocess_all(paths, workers)
+        rate = len(paths) / seconds
+        baseline = baseline or rate
+        rows.append({'workers': workers, 'frames_s': round(rate, 1), 'speedup': round(rate / baseline, 2)})
+        print(f"Pré-processamento com {workers:2d} processo(s): {rate:8.1f} frames/s (x{rate / baseline:.2f})")
+    return rows
+
+def default_configs(stand_in: bool) -> list[dict]:
+    if stand_in:
+        return [
+            {'name': 'openai-grade', 'provider': 'OPENAI'},
+            {'name': 'openai-sem-grade', 'provider': 'OPENAI', 'grid': False},
+            {'name': 'local-grade', 'provider': 'LOCAL'},
+        ]
+    return [{'name': chatbot.AI_PROVIDER.lower(), 'provider': chatbot.AI_PROVIDER}]
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('dataset', help='Pasta do conjunto de dados (com cases.jsonl)')
+    parser.add_argument('--configs', help='Arquivo JSON com a lista de configurações')
+    parser.add_argument('--from-recordings', help='Gera o conjunto a partir de uma pasta de gravações antes de avaliar')
+    parser.add_argument('--concurrency', type=int, default=8, help='Chamadas simultâneas aos provedores')
+    parser.add_argument('--preprocess-workers', type=int, default=os.cpu_count() or 1, help='Processos de pré-processamento')
+    parser.add_argument('--limit', type=int, help='Avalia apenas os primeiros N casos')
+    parser.add_argument('--scaling', action='store_true', help='Mede a escala do pré-processamento com o número de processos')
+    parser.add_argument('--stand-in', action='store_true', help='Usa o servidor substituto local (CI, sem rede)')
+    parser.add_argument('--stand-in-latency', type=float, default=0.3, help='Latência simulada do substituto (s)')
+    parser.add_argument('--stand-in-error-rate', type=float, default=0.0, help='Fração de respostas malformadas do substituto')
+    parser.add_argument('--output', default=REPORTS_DIR, help='Pasta dos relatórios')
+    parser.add_argument('--verbose', action='store_true', help='Mostra os logs do chatbot dos processos de trabalho')
+    args = parser.parse_args()
+
+    if args.from_recordings:
+        count = build_dataset_from_recordings(args.from_recordings, args.dataset)
+        print(f"{count} caso(s) extraído(s) de '{args.from_recordings}'.")
+
+    cases = load_cases(args.dataset, args.limit)
+    if not cases:
+        print("Conjunto de dados vazio.")
+        return 1
+    configs = default_configs(args.stand_in)
+    if args.configs:
+        with open(args.configs, encoding='utf-8') as f:
+            configs = json.load(f)
+
+    server = None
+    stand_in_url = None
+    if args.stand_in:
+        unsupported = [c['name'] for c in configs if c['provider'] not in STAND_IN_PROVIDERS]
+        if unsupported:
+            print(f"O servidor substituto atende apenas {', '.join(STAND_IN_PROVIDERS)}; remova: {', '.join(unsupported)}.")
+            return 1
+        from stand_in_server import StandInServer
+        server = StandInServer(latency_s=args.stand_in_latency, error_rate=args.stand_in_error_rate)
+        stand_in_url = server.start()
+        print(f"Servidor substituto em {stand_in_url}.")
+
+    paths = [case['frame'] for case in cases]
+    images, preprocess_s = preprocess_all(paths, args.preprocess_workers)
+    preprocess = {'workers': args.preprocess_workers, 'frames': len(paths), 'seconds': round(preprocess_s, 3),
+                  'frames_s': round(len(paths) / preprocess_s, 1) if preprocess_s > 0 else 0.0}
+    print(f"{len(paths)} frames pré-processados em {preprocess_s:.2f}s com {args.preprocess_workers} processo(s).")
+    if args.scaling:
+        preprocess['scaling'] = preprocess_scaling(paths, args.preprocess_workers)
+
+    summaries, results = [], {}
+    try:
+        for config in configs:
+            print(f"Avaliando '{config['name']}' ({len(cases)} casos, {args.concurrency} simultâneos)...")
+            rows, wall_s = asyncio.run(evaluate_config(config, cases, images, args.concurrency,
+                                                       stand_in_url, not args.verbose))
+            results[config['name']] = rows
+            summaries.append(summarize(config['name'], rows, wall_s))
+    finally:
+        if server:
+            server.stop()
+
+    print_report(summaries)
+    print(f"\nRelatório: {write_report(args.output, summaries, results, preprocess)}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+Matriz de configurações do governador de recursos (`modules/resource_governor.py`).
+Cada combinação de limites do OpenCV, de BLAS/OpenMP e de fixação de CPUs roda em um
+interpretador novo (os limites de BLAS só valem antes do import do NumPy) com a mesma carga
+do `preprocess_mode.py`: decodificação simulada (vídeo), exibição a cada 20 ms (Tk), preparo
+dos frames da IA em passos e uma thread de áudio processando blocos de 20 ms. A melhor
+combinação mantém o FPS p5 da exibição a até `--tolerance` do melhor medido e, entre essas,
+tem o menor passo p95 da IA; com `--write` ela é salva em `resource_governor.json`.
+
+Uso (a partir da pasta codes/):
+    python benchmarks/governor_matrix.py --seconds 8 --write
+    python benchmarks/governor_matrix.py --shared-memory # Varia também o pool do processo de preparo
+"""
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import resource_governor # noqa: E402 # Não importa NumPy/OpenCV
+
+AUDIO_RATE = 16000
+AUDIO_BLOCK_S = 0.02
+
+
+def build_matrix(shared_memory: bool) -> list[dict]:
+    """Combinações a medir, sem repetições em máquinas com poucos núcleos."""
+    cpus = len(resource_governor.available_cpus())
+    cv2_options = sorted({1, min(2, cpus), cpus})
+    blas_options = sorted({1, cpus})
+    worker_options = sorted({1, min(2, cpus)}) if shared_memory else [resource_governor.DEFAULT_CONFIG['worker_cv2_threads']]
+    pinning_options = ['off']
+    if cpus >= 2 and hasattr(os, 'sched_setaffinity'):
+        pinning_options.append('auto')
+    return [{'cv2_threads': cv2, 'worker_cv2_threads': worker, 'blas_threads': blas, 'pinning': pinning}
+            for cv2, worker, blas, pinning in itertools.product(cv2_options, worker_options, blas_options, pinning_options)]
+
+def run_child(config: dict, seconds: float, step_interval: float, shared_memory: bool) -> dict:
+    """Mede uma configuração em um interpretador novo e devolve as métricas."""
+    env = {key: value for key, value in os.environ.items() if key not in resource_governor.BLAS_ENV_VARS}
+    command = [sys.executable, os.path.abspath(__file__), '--child', json.dumps(config),
+               '--seconds', str(seconds), '--step-interval', str(step_interval)]
+    if shared_memory:
+        command.append('--shared-memory')
+    result = subprocess.run(command, capture_output=True, text=True, env=env, timeout=seconds * 4 + 60)
+    lines = result.stdout.strip().splitlines()
+    if result.returncode != 0 or not lines:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'sem saída')
+    return json.loads(lines[-1])
+
+def audio_loop(stop: threading.Event, late_blocks: list[int], total_blocks: list[int]) -> None:
+    """Imita o processamento de áudio: espectro e filtro de um bloco a cada 20 ms."""
+    import numpy as np
+    rng = np.random.default_rng(0)
+    window = np.hanning(int(AUDIO_RATE * AUDIO_BLOCK_S))
+    taps = np.ones(32) / 32
+    deadline = time.perf_counter()
+    while not stop.is_set():
+        block = rng.standard_normal(window.size) * window
+        np.abs(np.fft.rfft(block))
+        np.convolve(block, taps, mode='same')
+        total_blocks[0] += 1
+        deadline += AUDIO_BLOCK_S
+        remaining = deadline - time.perf_counter()
+        if remaining < 0:
+            late_blocks[0] += 1
+            deadline = time.perf_counter()
+        else:
+            time.sleep(remaining)
+
+def child_main(config: dict, seconds: float, step_interval: float, shared_memory: bool) -> dict:
+    """Carga medida dentro do interpretador filho, já com a configuração aplicada."""
+    resource_governor.configure(config)
+    import numpy as np
+    from modules.frame_worker import FramePreprocessor, prepare_frame
+    from modules.keyframe_selector import KeyframeSelector
+    from preprocess_mode import FrameSource, display_loop
+    resource_governor.apply_library_limits()
+
+    def pinned(role: str, target, *args) -> None:
+        resource_governor.pin(role)
+        target(*args)
+
+    source = FrameSource()
+    selector = KeyframeSelector()
+    preprocessor = FramePreprocessor(cv2_threads=config['worker_cv2_threads'])
+    if shared_memory:
+        preprocessor.start()
+        resource_governor.pin('ai', preprocessor.process.pid, 'FramePreprocessor') # type: ignore
+        preprocessor.prepare(source.latest()) # Aquece o processo de trabalho
+
+    stop = threading.Event()
+    frame_times: list[float] = []
+    late_blocks, total_blocks = [0], [0]
+    threads = [
+        threading.Thread(target=pinned, args=('video', source.run, stop), daemon=True),
+        threading.Thread(target=pinned, args=('render', display_loop, source, selector, stop, frame_times), daemon=True),
+        threading.Thread(target=pinned, args=('audio', audio_loop, stop, late_blocks, total_blocks), daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+    resource_governor.pin('ai') # O laço de passos roda nesta thread
+
+    step_ms: list[float] = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        selected = selector.best()
+        frame = selected[0] if selected is not None else source.latest()
+        start = time.perf_counter()
+        if shared_memory:
+            preprocessor.prepare(frame)
+        else:
+            prepare_frame(frame)
+        step_ms.append((time.perf_counter() - start) * 1000)
+        time.sleep(step_interval)
+
+    stop.set()
+    for thread in threads:
+        thread.join(1.0)
+    preprocessor.stop()
+
+    intervals = np.diff(np.asarray(frame_times))
+    fps = 1 / intervals if intervals.size else np.zeros(1)
+    return {
+        'display_fps_mean': float(np.mean(fps)),
+        'display_fps_p5': float(np.percentile(fps, 5)),
+        'step_ms_p50': float(np.percentile(step_ms, 50)),
+        'step_ms_p95': float(np.percentile(step_ms, 95)),
+        'audio_late_pct': 100 * late_blocks[0] / max(1, total_blocks[0]),
+    }
+
+def choose(results: list[tuple[dict, dict]], tolerance: float) -> tuple[dict, dict]:
+    """
+    Escolhe a melhor configuração.
+    Args:
+        results (list): Pares (configuração, métricas).
+        tolerance (float): Fração do melhor FPS p5 da exibição que ainda é aceita.
+    Returns:
+        tuple[dict, dict]: (configuração, métricas) escolhidas.
+    """
+    best_fps = max(metrics['display_fps_p5'] for _, metrics in results)
+    smooth = [(config, metrics) for config, metrics in results if metrics['display_fps_p5'] >= best_fps * (1 - tolerance)]
+    # Empate: menos threads ocupando os núcleos
+    return min(smooth, key=lambda item: (round(item[1]['step_ms_p95'], 1), item[0]['cv2_threads'] + item[0]['blas_threads']))
+
+def describe(config: dict) -> str:
+    return f"cv2={config['cv2_threads']} worker={config['worker_cv2_threads']} blas={config['blas_threads']} pin={config['pinning']}"
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=8.0, help='Duração de cada configuração')
+    parser.add_argument('--step-interval', type=float, default=0.1, help='Pausa entre passos da IA (s)')
+    parser.add_argument('--tolerance', type=float, default=0.05, help='Perda aceita no FPS p5 da exibição')
+    parser.add_argument('--shared-memory', action='store_true', help='Prepara os frames no processo separado')
+    parser.add_argument('--write', action='store_true', help=f'Salva a melhor configuração em {resource_governor.CONFIG_PATH}')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child_main(json.loads(args.child), args.seconds, args.step_interval, args.shared_memory)))
+        return 0
+
+    matrix = build_matrix(args.shared_memory)
+    print(f"{len(matrix)} configurações em {len(resource_governor.available_cpus())} CPU(s), {args.seconds:.0f}s cada.")
+    print(f"{'configuração':<40}{'fps médio':>10}{'fps p5':>10}{'passo p50':>12}{'passo p95':>12}{'áudio atrasado':>16}")
+    results = []
+    for config in matrix:
+        try:
+            metrics = run_child(config, args.seconds, args.step_interval, args.shared_memory)
+        except (RuntimeError, subprocess.TimeoutExpired, ValueError) as e:
+            print(f"{describe(config):<40}falhou: {e}")
+            continue
+        results.append((config, metrics))
+        print(f"{describe(config):<40}{metrics['display_fps_mean']:>10.1f}{metrics['display_fps_p5']:>10.1f}"
+              f"{metrics['step_ms_p50']:>10.2f}ms{metrics['step_ms_p95']:>10.2f}ms{metrics['audio_late_pct']:>15.1f}%")
+    if not results:
+        print("Nenhuma configuração foi medida.")
+        return 1
+
+    config, metrics = choose(results, args.tolerance)
+    print(f"\nMelhor: {describe(config)} (fps p5 {metrics['display_fps_p5']:.1f}, passo p95 {metrics['step_ms_p95']:.2f} ms)")
+    if args.write:
+        resource_governor.save_config(config)
+        print(f"Configuração salva em {resource_governor.CONFIG_PATH}; vale na próxima execução de main.py.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
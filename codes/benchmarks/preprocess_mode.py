@@ -0,0 +1,131 @@
+"""
+Compara o preparo dos frames da IA no próprio processo e no processo separado com memória
+compartilhada (`modules/frame_worker.py`). Sem drone e sem Tk: uma thread imita o
+`update_video_frame` da GUI (pontuação de keyframe, conversão de cor e redimensionamento a
+cada 20 ms), outra imita a decodificação do vídeo, e o laço de passos prepara um frame
+(grade, JPEG e assinatura) no ritmo de uma missão. Reporta o FPS da exibição e a latência
+de preparo por passo nos dois modos.
+
+Uso (a partir da pasta codes/):
+    python benchmarks/preprocess_mode.py --seconds 10 --step-interval 0.2
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.frame_worker import FramePreprocessor, prepare_frame # noqa: E402
+from modules.keyframe_selector import KeyframeSelector # noqa: E402
+
+FRAME_SHAPE = (720, 960, 3) # Resolução do vídeo do Tello
+DISPLAY_SIZE = (800, 600)
+DISPLAY_INTERVAL_S = 0.02 # Mesmo intervalo do root.after da GUI
+
+
+class FrameSource:
+    """Imita a thread de decodificação: gera frames ruidosos e mantém o mais recente."""
+    def __init__(self, seed: int = 0) -> None:
+        self.rng = np.random.default_rng(seed)
+        self.base = self.rng.integers(0, 255, FRAME_SHAPE, dtype=np.uint8)
+        self.frame = self.base.copy()
+        self.lock = threading.Lock()
+
+    def run(self, stop: threading.Event) -> None:
+        shift = 0
+        while not stop.is_set():
+            shift = (shift + 7) % FRAME_SHAPE[1]
+            frame = np.roll(self.base, shift, axis=1)
+            frame = cv2.GaussianBlur(frame, (5, 5), 0) # Custo parecido com o da decodificação
+            with self.lock:
+                self.frame = frame
+            time.sleep(1 / 30)
+
+    def latest(self) -> np.ndarray:
+        with self.lock:
+            return self.frame
+
+
+def display_loop(source: FrameSource, selector: KeyframeSelector, stop: threading.Event, frame_times: list[float]) -> None:
+    """Mesmo trabalho por frame do update_video_frame, sem o Tk."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        frame = source.latest()
+        selector.add(frame, time.time())
+        image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)).resize(DISPLAY_SIZE)
+        image.tobytes() # Equivale à cópia feita pelo PhotoImage.paste
+        frame_times.append(time.perf_counter())
+        time.sleep(max(0.0, DISPLAY_INTERVAL_S - (time.perf_counter() - start)))
+
+
+def run_mode(shared_memory: bool, seconds: float, step_interval: float) -> dict:
+    """Roda a exibição e os passos por `seconds` e retorna as métricas do modo."""
+    source = FrameSource()
+    selector = KeyframeSelector()
+    preprocessor = FramePreprocessor()
+    if shared_memory:
+        preprocessor.start()
+        preprocessor.prepare(source.latest()) # Aquece o processo de trabalho (imports do spawn)
+
+    stop = threading.Event()
+    frame_times: list[float] = []
+    threads = [
+        threading.Thread(target=source.run, args=(stop,), daemon=True),
+        threading.Thread(target=display_loop, args=(source, selector, stop, frame_times), daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+
+    step_ms: list[float] = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        selected = selector.best()
+        frame = selected[0] if selected is not None else source.latest()
+        start = time.perf_counter()
+        if shared_memory:
+            prepared = preprocessor.prepare(frame)
+            _ = (prepared.jpeg, prepared.signature)
+        else:
+            prepare_frame(frame)
+        step_ms.append((time.perf_counter() - start) * 1000)
+        time.sleep(step_interval)
+
+    stop.set()
+    for thread in threads:
+        thread.join(1.0)
+    fallbacks = preprocessor.local_fallbacks
+    preprocessor.stop()
+
+    intervals = np.diff(np.asarray(frame_times))
+    fps = 1 / intervals if intervals.size else np.zeros(1)
+    return {
+        'mode': 'memória compartilhada' if shared_memory else 'no processo',
+        'display_fps_mean': float(np.mean(fps)),
+        'display_fps_p5': float(np.percentile(fps, 5)),
+        'step_ms_p50': float(np.percentile(step_ms, 50)),
+        'step_ms_p95': float(np.percentile(step_ms, 95)),
+        'steps': len(step_ms),
+        'local_fallbacks': fallbacks if shared_memory else 0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=10.0, help='Duração de cada modo')
+    parser.add_argument('--step-interval', type=float, default=0.2, help='Pausa entre passos (s)')
+    args = parser.parse_args()
+
+    results = [run_mode(False, args.seconds, args.step_interval), run_mode(True, args.seconds, args.step_interval)]
+    print(f"{'modo':<24}{'fps médio':>10}{'fps p5':>10}{'passo p50':>12}{'passo p95':>12}{'passos':>8}{'locais':>8}")
+    for r in results:
+        print(f"{r['mode']:<24}{r['display_fps_mean']:>10.1f}{r['display_fps_p5']:>10.1f}"
+              f"{r['step_ms_p50']:>10.2f}ms{r['step_ms_p95']:>10.2f}ms{r['steps']:>8}{r['local_fallbacks']:>8}")
+
+if __name__ == '__main__':
+    main()
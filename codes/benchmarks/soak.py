@@ -0,0 +1,248 @@
+"""
+Teste de longa duração (soak) da GUI e do chatbot com drone e provedores falsos.
+Executa milhares de passos de missão e horas de vídeo simulado pelos caminhos reais de
+`TelloGUI` e `chatbot`, amostrando RSS, os maiores alocadores (tracemalloc) e a latência
+por passo. Falha (código de saída 1) se a memória ou a latência crescerem além das
+inclinações configuradas.
+
+Uso (a partir da pasta codes/; requer um display, ex.: xvfb-run):
+    python benchmarks/soak.py --missions 1000 --video-hours 2
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+import tkinter as tk
+import tracemalloc
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import interface # noqa: E402
+import modules.chatbot as chatbot # noqa: E402
+from modules.mission_executor import CancelToken # noqa: E402
+
+VIDEO_FPS = 50 # update_video_frame é agendado a cada 20 ms
+COMMANDS = ['forward 50', 'cw 90', 'up 30', 'left 40', 'ccw 45', 'back 20', 'down 30', 'right 40']
+
+
+class FakeTello:
+    """Substituto do TelloZune: gera frames sintéticos e aceita comandos sem rede."""
+    def __init__(self, *args, **kwargs) -> None:
+        self.image_size = (960, 720)
+        self.frame = None
+        self.commands_sent = 0
+        self.rng = np.random.default_rng(0)
+        self.base = None
+
+    def start_tello(self) -> bool:
+        return True
+
+    def end_tello(self) -> None:
+        pass
+
+    def set_image_size(self, image_size: tuple[int, int]) -> None:
+        self.image_size = image_size
+        width, height = image_size
+        gradient = np.linspace(0, 255, width, dtype=np.uint8)
+        self.base = np.repeat(np.tile(gradient, (height, 1))[:, :, None], 3, axis=2)
+
+    def get_frame(self) -> np.ndarray:
+        frame = np.roll(self.base, int(self.rng.integers(0, 50)), axis=1) # type: ignore
+        self.frame = frame
+        return frame
+
+    def get_info(self) -> tuple:
+        return ('80', '120', '60', '1013', '10')
+
+    def add_command(self, command: str) -> None:
+        self.commands_sent += 1
+
+    def takeoff(self) -> None:
+        self.add_command('takeoff')
+
+    def land(self) -> None:
+        self.add_command('land')
+
+    def send_rc_control(self, *args) -> None:
+        pass
+
+
+class FakeGeminiSession:
+    """Sessão de chat falsa que guarda o histórico como a sessão real do SDK."""
+    def __init__(self) -> None:
+        self.history: list = []
+        self.count = 0
+
+    def send_message(self, content, **kwargs):
+        self.history.append(content)
+        self.count += 1
+        command = COMMANDS[self.count % len(COMMANDS)]
+        text = json.dumps({'analise': 'Cena simulada.', 'plano': 'Seguir.', 'comando': command,
+                           'continua': self.count % 4 != 0, 'vista': 0})
+        usage = SimpleNamespace(prompt_token_count=900, cached_content_token_count=600,
+                                candidates_token_count=60, thoughts_token_count=0)
+        return SimpleNamespace(parts=[text], text=text, usage_metadata=usage)
+
+
+class FakeGeminiModel:
+    def start_chat(self, history=None) -> FakeGeminiSession:
+        return FakeGeminiSession()
+
+
+class FakeOpenAIClient:
+    """Cliente falso com a mesma forma de resposta de chat.completions.create."""
+    def __init__(self) -> None:
+        self.count = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.count += 1
+        command = COMMANDS[self.count % len(COMMANDS)]
+        text = json.dumps({'analise': 'Cena simulada.', 'plano': 'Seguir.', 'comando': command,
+                           'continua': self.count % 4 != 0, 'vista': 0})
+        usage = SimpleNamespace(prompt_tokens=900, completion_tokens=60,
+                                prompt_tokens_details=SimpleNamespace(cached_tokens=600))
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))], usage=usage)
+
+
+def install_fake_providers() -> None:
+    """Injeta os clientes falsos no lugar dos SDKs e marca os plugins como carregados."""
+    chatbot.model_gemini = FakeGeminiModel()
+    chatbot.client_openai = FakeOpenAIClient()
+    for name in ('GEMINI', 'OPENAI'):
+        chatbot.PROVIDERS[name].loaded = True
+
+def rss_mb() -> float:
+    """RSS atual do processo em MB (Linux: /proc; outros: psutil se disponível)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except OSError:
+        import psutil
+        return psutil.Process().memory_info().rss / 1e6
+
+def slope(xs: list[float], ys: list[float]) -> float:
+    """Inclinação da reta de mínimos quadrados."""
+    if len(xs) < 2:
+        return 0.0
+    return float(np.polyfit(np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64), 1)[0])
+
+def accounting_steps() -> int:
+    """Total de passos de IA registrados pela contabilidade na sessão."""
+    return interface.accounting.session_totals['steps']
+
+def build_app() -> interface.TelloGUI:
+    """Cria a GUI real com o drone falso e sem agendamentos do Tk (o harness dirige os loops)."""
+    interface.TelloZune = FakeTello # type: ignore
+    root = tk.Tk()
+    root.withdraw()
+    app = interface.TelloGUI.__new__(interface.TelloGUI)
+
+    def after(delay, callback=None, *args):
+        # Atualizações imediatas (delay 0) rodam na hora; loops periódicos são dirigidos pelo harness
+        if delay == 0 and callback is not None:
+            callback(*args)
+        return ''
+    root.after = after # type: ignore
+    interface.TelloGUI.__init__(app, root)
+    app.tk_watchdog.stop() # Sem mainloop os batimentos nunca disparam
+    app._calculate_wait_time = lambda command: 0.0 # type: ignore
+    app.show_message = lambda title, message: None # type: ignore
+    app.route_library.match = lambda objective: None # type: ignore # Força o caminho da IA
+    app.route_library.save = lambda: None # type: ignore
+    return app
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--missions', type=int, default=1000, help='Missões simuladas')
+    parser.add_argument('--video-hours', type=float, default=1.0, help='Horas de vídeo simulado (50 fps)')
+    parser.add_argument('--samples', type=int, default=40, help='Amostras de memória/latência ao longo do teste')
+    parser.add_argument('--max-rss-slope', type=float, default=2.0, help='MB por 1000 passos tolerados')
+    parser.add_argument('--max-latency-slope', type=float, default=0.5, help='ms por 1000 passos tolerados')
+    parser.add_argument('--providers', default='GEMINI,OPENAI', help='Provedores alternados entre missões')
+    parser.add_argument('--top', type=int, default=8, help='Maiores alocadores exibidos')
+    args = parser.parse_args()
+
+    install_fake_providers()
+    app = build_app()
+    providers = args.providers.split(',')
+
+    total_frames = int(args.video_hours * 3600 * VIDEO_FPS)
+    frames_per_mission = max(1, total_frames // max(1, args.missions))
+    sample_every = max(1, args.missions // args.samples)
+
+    tracemalloc.start(10)
+    baseline_snapshot = None
+    steps_done = 0
+    step_latencies: list[float] = []
+    sample_steps, sample_rss, sample_latency, sample_frame_ms = [], [], [], []
+
+    devnull = open(os.devnull, 'w') # Os logs por passo do app são descartados durante o teste
+    started = time.time()
+    for mission in range(args.missions):
+        with contextlib.redirect_stdout(devnull):
+            chatbot.set_provider(providers[mission % len(providers)])
+
+            frame_start = time.perf_counter()
+            for _ in range(frames_per_mission):
+                app.update_video_frame()
+            frame_ms = (time.perf_counter() - frame_start) * 1000 / frames_per_mission
+            app.fps_counter = 0
+
+            before = accounting_steps()
+            mission_start = time.perf_counter()
+            app._execute_ai_sequence(f'Missão simulada {mission % 20}', CancelToken())
+            new_steps = max(1, accounting_steps() - before)
+            step_latencies.append((time.perf_counter() - mission_start) * 1000 / new_steps)
+            steps_done += new_steps
+            app.update_stats()
+            app.root.update_idletasks()
+
+        if mission % sample_every == 0:
+            if baseline_snapshot is None and mission > 0:
+                baseline_snapshot = tracemalloc.take_snapshot() # Depois do aquecimento
+            sample_steps.append(steps_done)
+            sample_rss.append(rss_mb())
+            sample_latency.append(float(np.median(step_latencies[-sample_every:])))
+            sample_frame_ms.append(frame_ms)
+            print(f"missão {mission:6d} | passos {steps_done:7d} | RSS {sample_rss[-1]:8.1f} MB | "
+                  f"passo {sample_latency[-1]:6.2f} ms | frame {frame_ms:5.2f} ms")
+
+    elapsed = time.time() - started
+    # Ignora a primeira amostra (aquecimento: imports, caches, primeiros objetos Tk)
+    xs = [s / 1000 for s in sample_steps[1:]]
+    rss_slope = slope(xs, sample_rss[1:])
+    latency_slope = slope(xs, sample_latency[1:])
+    frame_slope = slope(xs, sample_frame_ms[1:])
+
+    print(f"\n{args.missions} missões, {steps_done} passos, {total_frames} frames em {elapsed:.1f}s")
+    print(f"Inclinação RSS:      {rss_slope:+.3f} MB/1000 passos (limite {args.max_rss_slope})")
+    print(f"Inclinação latência: {latency_slope:+.3f} ms/1000 passos (limite {args.max_latency_slope})")
+    print(f"Inclinação frame:    {frame_slope:+.3f} ms/1000 passos (limite {args.max_latency_slope})")
+
+    if baseline_snapshot is not None:
+        print("\nMaiores crescimentos de alocação desde o aquecimento:")
+        for stat in tracemalloc.take_snapshot().compare_to(baseline_snapshot, 'lineno')[:args.top]:
+            print(f"    {stat}")
+
+    failures = []
+    if rss_slope > args.max_rss_slope:
+        failures.append('memória')
+    if latency_slope > args.max_latency_slope or frame_slope > args.max_latency_slope:
+        failures.append('latência')
+    app.root.destroy()
+    devnull.close()
+
+    if failures:
+        print(f"\nFALHA: deriva de {' e '.join(failures)} acima do limite.")
+        return 1
+    print("\nOK: sem deriva de memória ou latência.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+Servidor substituto local dos provedores de IA, para testes e CI sem rede nem chaves.
+Responde nos mesmos endpoints que os SDKs usam:
+    - OpenAI: POST /v1/chat/completions (use OpenAI(base_url=url + '/v1'))
+    - Ollama: POST /api/chat (use OLLAMA_HOST=url)
+As respostas seguem o schema do chatbot. O comando é derivado do objetivo com a gramática
+de comandos diretos, ou escolhido de forma determinística; latência e taxa de respostas
+malformadas são configuráveis para exercitar prazos, disjuntores e o contador de parse.
+
+Uso isolado (a partir da pasta codes/):
+    python benchmarks/stand_in_server.py --port 8765 --latency 0.4
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import command_grammar # noqa: E402
+
+DEFAULT_COMMANDS = ['forward 50', 'cw 30', 'ccw 30', 'up 30', 'align center', 'approach center', 'none']
+OBJECTIVE_PATTERN = re.compile(r'Objetivo Global: "(.*?)"')
+
+
+def _last_user_text(messages: list[dict]) -> str:
+    """Texto da última mensagem do usuário (conteúdo simples ou lista de partes)."""
+    for message in reversed(messages):
+        if message.get('role') != 'user':
+            continue
+        content = message.get('content')
+        if isinstance(content, str):
+            return content
+        if isinstance(content, list):
+            return ' '.join(part.get('text', '') for part in content if isinstance(part, dict))
+    return ''
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    server: 'StandInServer'
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except json.JSONDecodeError:
+            self._send(400, {'error': 'JSON inválido'})
+            return
+
+        path = self.path.rstrip('/')
+        if path.endswith('/chat/completions'):
+            self._send(200, self.server.openai_response(body))
+        elif path == '/api/chat':
+            self._send(200, self.server.ollama_response(body))
+        else:
+            self._send(404, {'error': f'endpoint desconhecido: {self.path}'})
+
+    def _send(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:
+        pass # Sem log por requisição
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Servidor HTTP em thread própria que imita OpenAI e Ollama.
+    Args:
+        port (int): Porta (0 escolhe uma livre).
+        latency_s (float): Latência média de cada resposta.
+        jitter_s (float): Variação uniforme (+/-) da latência.
+        error_rate (float): Fração de respostas com JSON malformado.
+        seed (int): Semente do gerador aleatório.
+    """
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, latency_s: float = 0.3, jitter_s: float = 0.1, error_rate: float = 0.0, seed: int = 0) -> None:
+        super().__init__(('127.0.0.1', port), StandInHandler)
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.requests = 0
+        self.thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> str:
+        """Inicia o servidor em segundo plano e retorna a URL base."""
+        self.thread = threading.Thread(target=self.serve_forever, name='StandInServer', daemon=True)
+        self.thread.start()
+        return self.url
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def _reply(self, messages: list[dict]) -> tuple[str, int]:
+        """Espera a latência simulada e gera o conteúdo da resposta. Retorna (texto, tokens de entrada)."""
+        with self.rng_lock:
+            self.requests += 1
+            delay = max(0.0, self.latency_s + self.rng.uniform(-self.jitter_s, self.jitter_s))
+            malformed = self.rng.random() < self.error_rate
+        time.sleep(delay)
+
+        prompt = _last_user_text(messages)
+        input_tokens = sum(len(json.dumps(m.get('content', ''))) for m in messages) // 4
+        if malformed:
+            return '{"analise": "resposta cortada", "comando": ', input_tokens
+
+        match = OBJECTIVE_PATTERN.search(prompt)
+        objective = match.group(1) if match else prompt
+        direct = command_grammar.parse_direct_command(objective)
+        command = direct[0] if direct else DEFAULT_COMMANDS[zlib.crc32(prompt.encode('utf-8')) % len(DEFAULT_COMMANDS)]
+        content = json.dumps({
+            'analise': 'Resposta do servidor substituto.',
+            'plano': f'1. {command}',
+            'comando': command,
+            'continua': command != 'land',
+            'vista': 0,
+        }, ensure_ascii=False)
+        return content, input_tokens
+
+    def openai_response(self, body: dict) -> dict:
+        content, input_tokens = self._reply(body.get('messages', []))
+        output_tokens = len(content) // 4
+        return {
+            'id': f'standin-{self.requests}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'stand-in'),
+            'choices': [{'index': 0, 'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': content}}],
+            'usage': {'prompt_tokens': input_tokens, 'completion_tokens': output_tokens,
+                      'total_tokens': input_tokens + output_tokens, 'prompt_tokens_details': {'cached_tokens': 0}},
+        }
+
+    def ollama_response(self, body: dict) -> dict:
+        start = time.perf_counter()
+        content, input_tokens = self._reply(body.get('messages', []))
+        duration_ns = int((time.perf_counter() - start) * 1e9)
+        return {
+            'model': body.get('model', 'stand-in'),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'message': {'role': 'assistant', 'content': content},
+            'done': True,
+            'done_reason': 'stop',
+            'total_duration': duration_ns,
+            'prompt_eval_count': input_tokens,
+            'eval_count': len(content) // 4,
+            'eval_duration': duration_ns,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.3, help='Latência média (s)')
+    parser.add_argument('--jitter', type=float, default=0.1, help='Variação da latência (s)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fração de respostas malformadas')
+    args = parser.parse_args()
+
+    server = StandInServer(args.port, args.latency, args.jitter, args.error_rate)
+    print(f"Servidor substituto em {server.url} (OpenAI: {server.url}/v1, Ollama: OLLAMA_HOST={server.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark de inicialização a frio da GUI usando `python -X importtime`.
+Compara a importação atual de `interface` (provedores e áudio carregados sob demanda)
+com o cenário antigo, em que todos os SDKs eram importados no início.
+
+Uso (a partir da pasta codes/):
+    python benchmarks/startup_time.py --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+CODES_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos que eram importados na inicialização antes do carregamento sob demanda
+EAGER_MODULES = [
+    'google.generativeai', 'ollama', 'openai',
+    'sounddevice', 'speech_recognition', 'scipy.io.wavfile', 'scipy.signal',
+]
+
+SCENARIOS = {
+    'lazy': "import interface",
+    'eager': "import interface\n"
+             "for name in " + repr(EAGER_MODULES) + ":\n"
+             "    try:\n"
+             "        __import__(name)\n"
+             "    except Exception as e:\n"
+             "        print(f'AVISO: {name} indisponível ({e})')\n",
+}
+
+def parse_importtime(stderr: str) -> tuple[int, list[tuple[int, str]]]:
+    """
+    Extrai o tempo total e os maiores módulos da saída de -X importtime.
+    Args:
+        stderr (str): Saída de erro do interpretador.
+    Returns:
+        tuple: (tempo cumulativo dos imports de nível superior em us, [(cumulativo us, módulo)])
+    """
+    total = 0
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        cumulative = int(cumulative_us)
+        name = name[1:] # Remove o espaço após o separador; o restante da indentação indica o nível
+        if not name.startswith(' '): # Import de nível superior
+            total += cumulative
+        modules.append((cumulative, name.strip()))
+    return total, sorted(modules, reverse=True)
+
+def run_scenario(code: str) -> tuple[float, int, list[tuple[int, str]]]:
+    """
+    Executa um cenário em um interpretador novo.
+    Args:
+        code (str): Código Python a ser executado.
+    Returns:
+        tuple: (tempo de parede em s, tempo de import em us, maiores módulos)
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=CODES_DIR, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    total, modules = parse_importtime(result.stderr)
+    return wall, total, modules
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='Execuções por cenário (mediana é reportada)')
+    parser.add_argument('--top', type=int, default=10, help='Quantidade de módulos mais lentos exibidos')
+    args = parser.parse_args()
+
+    results = {}
+    for name, code in SCENARIOS.items():
+        walls, imports = [], []
+        modules = []
+        for _ in range(args.runs):
+            wall, total, modules = run_scenario(code)
+            walls.append(wall)
+            imports.append(total)
+        results[name] = (statistics.median(walls), statistics.median(imports) / 1e6)
+        print(f"\n[{name}] parede: {results[name][0]:.3f}s | imports: {results[name][1]:.3f}s")
+        for cumulative, module in modules[:args.top]:
+            print(f"    {cumulative / 1000:9.1f} ms  {module}")
+
+    lazy_wall, lazy_import = results['lazy']
+    eager_wall, eager_import = results['eager']
+    print("\nResumo (mediana):")
+    print(f"    Inicialização a frio: {eager_wall:.3f}s -> {lazy_wall:.3f}s ({eager_wall / max(lazy_wall, 1e-9):.1f}x)")
+    print(f"    Tempo de imports:     {eager_import:.3f}s -> {lazy_import:.3f}s")
+
+if __name__ == '__main__':
+    main()
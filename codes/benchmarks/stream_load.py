@@ -0,0 +1,169 @@
+"""
+Teste de carga do servidor de vídeo (`modules/stream_server.py`).
+Sobe o servidor com frames sintéticos a 30 fps e conecta muitos clientes locais, MJPEG e
+WebSocket, parte deles propositalmente lentos. Os clientes rodam em um processo separado,
+para que o tempo de CPU medido aqui seja só o do servidor (e da fonte sintética). Reporta a
+CPU do servidor, frames codificados e o FPS de cada grupo de clientes; os clientes rápidos
+não devem perder FPS por causa dos lentos.
+
+Uso (a partir da pasta codes/):
+    python benchmarks/stream_load.py --clients 50 --slow 10 --seconds 15
+"""
+import argparse
+import base64
+import multiprocessing as mp
+import os
+import socket
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.stream_server import BOUNDARY, StreamServer # noqa: E402
+
+FRAME_SHAPE = (720, 960, 3)
+SOURCE_FPS = 30
+SLOW_READ_DELAY_S = 0.2 # Pausa entre leituras de um cliente lento
+RECV_SIZE = 64 * 1024
+
+
+def synthetic_source(server: StreamServer, stop: threading.Event) -> None:
+    """Gera frames com movimento e os entrega ao servidor como a GUI faria."""
+    base = cv2.GaussianBlur(np.random.default_rng(0).integers(0, 255, FRAME_SHAPE, dtype=np.uint8), (9, 9), 0)
+    index = 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        server.submit(np.roll(base, index * 5, axis=1))
+        server.set_status(f"Missão: teste de carga | frame {index}")
+        index += 1
+        time.sleep(max(0.0, 1 / SOURCE_FPS - (time.perf_counter() - start)))
+
+
+def run_client(host: str, port: int, kind: str, slow: bool, seconds: float, results: list, index: int) -> None:
+    """Conecta, lê o fluxo por `seconds` e conta os frames recebidos."""
+    marker = f'--{BOUNDARY}'.encode('ascii') if kind == 'mjpeg' else None
+    frames = 0
+    received = 0
+    try:
+        sock = socket.create_connection((host, port), timeout=10)
+        if slow:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 16 * 1024)
+        if kind == 'mjpeg':
+            request = f'GET /stream.mjpg HTTP/1.1\r\nHost: {host}\r\n\r\n'
+        else:
+            key = base64.b64encode(os.urandom(16)).decode('ascii')
+            request = (f'GET /ws HTTP/1.1\r\nHost: {host}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                       f'Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n')
+        sock.sendall(request.encode('ascii'))
+
+        buffer = b''
+        header_done = False
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            chunk = sock.recv(RECV_SIZE)
+            if not chunk:
+                break
+            received += len(chunk)
+            buffer += chunk
+            if not header_done:
+                end = buffer.find(b'\r\n\r\n')
+                if end < 0:
+                    continue
+                buffer = buffer[end + 4:]
+                header_done = True
+            if marker is not None:
+                frames += buffer.count(marker)
+                buffer = buffer[-len(marker):] # Mantém o fim para marcadores divididos entre leituras
+            else:
+                frames_in_buffer, buffer = _parse_ws_frames(buffer)
+                frames += frames_in_buffer
+            if slow:
+                time.sleep(SLOW_READ_DELAY_S)
+        sock.close()
+    except OSError:
+        pass
+    results[index] = (kind, slow, frames, received)
+
+
+def _parse_ws_frames(buffer: bytes) -> tuple[int, bytes]:
+    """Conta mensagens WebSocket completas no buffer e retorna o restante."""
+    count = 0
+    while len(buffer) >= 2:
+        length = buffer[1] & 0x7F
+        offset = 2
+        if length == 126:
+            if len(buffer) < 4:
+                break
+            length, offset = int.from_bytes(buffer[2:4], 'big'), 4
+        elif length == 127:
+            if len(buffer) < 10:
+                break
+            length, offset = int.from_bytes(buffer[2:10], 'big'), 10
+        if len(buffer) < offset + length:
+            break
+        buffer = buffer[offset + length:]
+        count += 1
+    return count, buffer
+
+
+def client_process(host: str, port: int, clients: int, slow: int, seconds: float, queue: mp.Queue) -> None:
+    """Roda todos os clientes em threads de um processo separado do servidor."""
+    results: list = [None] * clients
+    threads = []
+    for i in range(clients):
+        kind = 'websocket' if i % 2 else 'mjpeg'
+        thread = threading.Thread(target=run_client, args=(host, port, kind, i < slow, seconds, results, i), daemon=True)
+        threads.append(thread)
+        thread.start()
+    for thread in threads:
+        thread.join(seconds + 15)
+    queue.put([r for r in results if r is not None])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--slow', type=int, default=10, help='Quantos clientes leem devagar')
+    parser.add_argument('--seconds', type=float, default=15.0)
+    args = parser.parse_args()
+
+    server = StreamServer(port=0, host='127.0.0.1')
+    server.start()
+    host, port = server.server_address[:2]
+    stop = threading.Event()
+    threading.Thread(target=synthetic_source, args=(server, stop), daemon=True).start()
+
+    queue: mp.Queue = mp.get_context('spawn').Queue()
+    process = mp.get_context('spawn').Process(target=client_process,
+                                              args=(host, port, args.clients, args.slow, args.seconds, queue))
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    process.start()
+    time.sleep(args.seconds / 2)
+    mid_stats = server.stats()
+    results = queue.get(timeout=args.seconds + 30)
+    process.join()
+    cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+    stop.set()
+    encoded = server.frames_encoded
+    encode_ms = server.encode_ms
+    server.stop()
+
+    print(f"Servidor: CPU {cpu / wall * 100:.1f}% de um núcleo em {wall:.1f} s (inclui a fonte sintética), "
+          f"{encoded} frames codificados ({encoded / wall:.1f}/s, {encode_ms:.2f} ms cada), "
+          f"{len(mid_stats['clients'])} clientes conectados no meio do teste.")
+    print(f"{'grupo':<22}{'clientes':>9}{'fps médio':>11}{'fps mín':>9}{'MB/s':>8}")
+    for kind in ('mjpeg', 'websocket'):
+        for slow in (False, True):
+            group = [r for r in results if r[0] == kind and r[1] == slow]
+            if not group:
+                continue
+            fps = [r[2] / args.seconds for r in group]
+            mbps = sum(r[3] for r in group) / args.seconds / 1e6
+            print(f"{kind + (' lento' if slow else ''):<22}{len(group):>9}{np.mean(fps):>11.1f}{min(fps):>9.1f}{mbps:>8.2f}")
+
+if __name__ == '__main__':
+    main()
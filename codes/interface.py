@@ -6,20 +6,34 @@ import time
 import cv2
 import numpy as np
 from PIL import Image, ImageTk
-import sounddevice as sd
-import io
-import speech_recognition as sr
-from scipy.io.wavfile import write
 
+import modules.accounting as accounting
 import modules.chatbot as chatbot
+import modules.command_grammar as command_grammar
+import modules.look_around as look_around
+import modules.resource_governor as resource_governor
 import modules.tello_control as tello_control
+from modules.mission_executor import CancelToken, MissionCancelled, MissionExecutor
+from modules.circuit_breaker import STATE_LABELS
+from modules.command_tracker import (ACK_SETTLE_S, ERROR, TIMEOUT, UNCONFIRMED, CommandTracker, TrackedCommand,
+                                     command_timeout)
+from modules.keyframe_selector import KeyframeSelector
+from modules.latency import FRESH_FRAME_POLL_S, FRESH_FRAME_TIMEOUT_S, PLACEHOLDER_WAIT_S, STALE_FRAME_MS, LatencyTracker
+from modules.profiler import SamplingProfiler, env_rate
+from modules.rc_controller import RCController
+from modules.frame_worker import FramePreprocessor
+from modules.route_library import RouteLibrary, frame_signature
+from modules.stream_server import STREAM_PORT, StreamServer
+from modules.tk_watchdog import TkWatchdog
+from modules.video_recorder import VideoRecorder
 from tello_zune import TelloZune
 
 BG_COLOR = "#262626"
 TEXT_COLOR = "#FFFFFF"
 LBF_COLOR = "#3c3c3c"
-SAMPLE_RATE = 44100
-AUDIO_DURATION = 5
+VOICE_DIRECT_DISPATCH = True # Comandos diretos falados são enviados sem precisar apertar Enter
+SHARED_MEMORY_PREPROCESSING = False # Prepara os frames da IA em outro processo (memória compartilhada)
+STREAM_SERVER_ENABLED = False # Transmite o vídeo para supervisores em outras máquinas (sem autenticação)
 
 class TelloGUI:
     def __init__(self, root: tk.Tk) -> None:
@@ -56,10 +70,33 @@ class TelloGUI:
         self.tello.set_image_size(self.video_size)
         self.last_time_fps = time.time()
         self.fps = 0 # FPS calculado
-        self.is_sequence_running = False
         self.max_steps = "7"
         self.drone_height = 0 # cm
-        self.abort_sequence_event = threading.Event()
+        self.command_tracker = CommandTracker(self.tello) # Id, resposta do drone e tempos de cada comando
+        self.command_tracker.start()
+        self.mission_executor = MissionExecutor(on_abort=self._on_mission_abort)
+        self.voice_capture = None # Criado na primeira gravação
+        self.video_recorder = VideoRecorder()
+        self.keyframe_selector = KeyframeSelector()
+        self.rc_controller = RCController(self.tello, self.keyframe_selector.latest) # Ajuste fino entre passos da IA
+        self.route_library = RouteLibrary()
+        self.latency = LatencyTracker() # Captura -> exibição, requisição à IA e resposta do drone
+        self.tk_watchdog = TkWatchdog(self.root) # Atraso do root.after e pilha do Tk quando ele trava
+        self.tk_watchdog.start()
+        self.profile_missions_rate = env_rate() # TELLO_PROFILE: perfila cada missão automaticamente
+        self.profiler = SamplingProfiler(self.profile_missions_rate or 100)
+        self.frame_preprocessor = FramePreprocessor(cv2_threads=resource_governor.config['worker_cv2_threads'])
+        if SHARED_MEMORY_PREPROCESSING:
+            self.frame_preprocessor.start()
+        self.stream_server = None
+        if STREAM_SERVER_ENABLED:
+            try:
+                self.stream_server = StreamServer(STREAM_PORT)
+                self.stream_server.start()
+            except OSError as e:
+                print(f"Servidor de vídeo não iniciado (porta {STREAM_PORT}): {e}")
+                self.stream_server = None
+        self._apply_resource_governor()
 
         # Configurações de layout da janela
         self.root.columnconfigure(0, weight=3) # Coluna do vídeo (75%)
@@ -169,6 +206,10 @@ class TelloGUI:
         self.finish_button.pack(fill="x", padx=5, pady=2)
         self.emergency_button = ttk.Button(sidebar_frame, text="Emergência", command=self.emergency_stop)
         self.emergency_button.pack(fill="x", padx=5, pady=5)
+        self.record_video_button = ttk.Button(sidebar_frame, text="Gravar Vídeo", command=self.toggle_video_recording)
+        self.record_video_button.pack(fill="x", padx=5, pady=2)
+        self.profile_button = ttk.Button(sidebar_frame, text="Perfilar", command=self.toggle_profiler)
+        self.profile_button.pack(fill="x", padx=5, pady=2)
 
         ttk.Separator(sidebar_frame, orient='horizontal').pack(fill='x', pady=5, padx=5)
 
@@ -189,8 +230,15 @@ class TelloGUI:
 
         model_frame = ttk.Frame(sidebar_frame)
         model_frame.pack(fill='x', padx=5, pady=(0,5))
-        model_name = chatbot.get_model_name()
-        ttk.Label(model_frame, text="Modelo: " + model_name).pack(anchor="w")
+        ttk.Label(model_frame, text="Provedor:").pack(side="left")
+        self.provider_var = tk.StringVar(value=chatbot.AI_PROVIDER)
+        self.provider_combobox = ttk.Combobox(
+            model_frame, textvariable=self.provider_var, values=list(chatbot.PROVIDERS), state="readonly", width=8
+        )
+        self.provider_combobox.pack(side="left", padx=5)
+        self.provider_combobox.bind("<<ComboboxSelected>>", lambda event: self.change_provider())
+        self.model_label = ttk.Label(sidebar_frame, text="Modelo: " + chatbot.get_model_name())
+        self.model_label.pack(anchor="w", padx=5, pady=(0, 5))
         
         self.log_listbox = tk.Listbox(log_frame, height=10)
         self.log_listbox.pack(fill='both', expand=True, side='left')
@@ -200,6 +248,7 @@ class TelloGUI:
         self.log_listbox.config(yscrollcommand=scrollbar.set)
         
         ttk.Button(sidebar_frame, text="Limpar Log", command=self.clear_logs).pack(fill='x', padx=5, pady=5)
+        ttk.Button(sidebar_frame, text="Exportar Uso", command=self.export_usage).pack(fill='x', padx=5, pady=(0, 5))
 
     def _create_params_widgets(self, container: ttk.Frame) -> None:
         """
@@ -219,24 +268,46 @@ class TelloGUI:
             'height': ("icons/height_icon.png", "cm"),
             'temp': ("icons/temp_icon.png", "°C"),
             'pres': ("icons/pressure_icon.png", "hPa"),
-            'time': ("icons/time_icon.png", "s")
+            'time': ("icons/time_icon.png", "s"),
+            'tokens': (None, "tokens"), # Missão atual (ou última)
+            'cost': (None, "US$"), # Missão atual (ou última)
+            'tok_rate': (None, "tok/s"),
+            'session_cost': (None, "US$ sessão"),
+            'parse_fail': (None, "% respostas ilegíveis"),
+            'breaker': (None, "(disjuntor do provedor)"),
+            'fallbacks': (None, "passos no modelo local"),
+            'rec_drops': (None, "frames descartados (gravação)"),
+            'abort': (None, "ms (último aborto)"),
+            'lat_display': (None, "ms p50/p95 captura -> tela"),
+            'lat_request': (None, "ms p50/p95 captura -> IA"),
+            'lat_ack': (None, "ms p50/p95 resposta IA -> drone"),
+            'cmd_exec': (None, "ms p50/p95 execução (movimentos)"),
+            'cmd_fail': (None, "comandos com erro/sem resposta"),
+            'stale': (None, "frames velhos recusados"),
+            'tk_lag': (None, "ms atraso máx. do Tk (1 s)"),
+            'viewers': (None, "espectadores (vídeo remoto)"),
+            'rc': (None, "Hz (controle rc)")
         }
 
         for i, (key, (icon_path, unit)) in enumerate(params_info.items()):
             row_frame = ttk.Frame(params_frame)
             row_frame.pack(fill='x', padx=5, pady=5)
             
-            try:
-                img = Image.open(icon_path).resize((30, 30), Image.Resampling.LANCZOS)
-                photo_image = ImageTk.PhotoImage(img)
-                self.param_icons[key] = photo_image
-                icon_label = ttk.Label(row_frame, image=self.param_icons[key])
+            if icon_path is None: # Parâmetros de uso da IA não têm ícone
+                icon_label = ttk.Label(row_frame, width=4)
                 icon_label.pack(side="left", padx=(0, 10))
-
-            except FileNotFoundError:
-                print(f"ERRO DE ARQUIVO: Ícone não encontrado no caminho: '{icon_path}'")
-            except Exception as e:
-                print(f"ERRO AO CARREGAR IMAGEM: '{icon_path}'. Detalhes: {e}")
+            else:
+                try:
+                    img = Image.open(icon_path).resize((30, 30), Image.Resampling.LANCZOS)
+                    photo_image = ImageTk.PhotoImage(img)
+                    self.param_icons[key] = photo_image
+                    icon_label = ttk.Label(row_frame, image=self.param_icons[key])
+                    icon_label.pack(side="left", padx=(0, 10))
+
+                except FileNotFoundError:
+                    print(f"ERRO DE ARQUIVO: Ícone não encontrado no caminho: '{icon_path}'")
+                except Exception as e:
+                    print(f"ERRO AO CARREGAR IMAGEM: '{icon_path}'. Detalhes: {e}")
 
             value_label = ttk.Label(row_frame, text=f"N/A {unit}", font=("Ubuntu", 11, "bold"))
             value_label.pack(side="left")
@@ -251,9 +322,28 @@ class TelloGUI:
 
     def land(self) -> None:
         """Pousa o drone e atualiza o log."""
-        self.tello.land()
+        threading.Thread(target=self.tello.land, daemon=True).start() # No tello_zune 0.7.7 o pouso espera a confirmação
         self.update_log("land")
 
+    def toggle_video_recording(self) -> None:
+        """Inicia ou encerra a gravação segmentada do vídeo do drone."""
+        if self.video_recorder.running:
+            threading.Thread(target=self.video_recorder.stop, daemon=True).start() # Finaliza o segmento fora da thread do Tk
+            self.record_video_button.config(text="Gravar Vídeo")
+        else:
+            self.video_recorder.start()
+            resource_governor.pin_thread('video', self.video_recorder.thread)
+            self.record_video_button.config(text="Parar Vídeo")
+
+    def toggle_profiler(self) -> None:
+        """Liga ou desliga o profiler por amostragem de todas as threads."""
+        if self.profiler.running:
+            threading.Thread(target=self.profiler.stop, daemon=True).start() # Grava os flame graphs fora da thread do Tk
+            self.profile_button.config(text="Perfilar")
+        else:
+            self.profiler.start('manual')
+            self.profile_button.config(text="Parar Profiler")
+
     def show_message(self, title: str, message: str) -> None:
         """
         Exibe uma mensagem de alerta.
@@ -270,6 +360,11 @@ class TelloGUI:
             self.max_steps = int(new_max_steps)
         self.show_message("Atualização", f"Número máximo de passos definido para: {self.max_steps}")
 
+    def change_provider(self) -> None:
+        """Troca o provedor de IA; o SDK é carregado no primeiro passo da próxima missão."""
+        chatbot.set_provider(self.provider_var.get())
+        self.model_label.config(text="Modelo: " + chatbot.get_model_name())
+
     def clear_logs(self) -> None:
         """Limpa o log de comandos"""
         self.command_log.clear()
@@ -277,8 +372,21 @@ class TelloGUI:
         self.log_listbox.delete(0, tk.END)
         self.show_message("Log", "Log de comandos limpo.")
 
+    def export_usage(self) -> None:
+        """Exporta tokens, custo e latência por passo e por missão para análise offline."""
+        try:
+            csv_path, json_path = accounting.export_usage()
+            self.show_message("Uso exportado", f"Passos: {csv_path}\nMissões: {json_path}")
+        except OSError as e:
+            self.show_message("Erro", f"Não foi possível exportar o uso: {e}")
+
+    @property
+    def is_sequence_running(self) -> bool:
+        """Indica se há uma missão em execução no executor."""
+        return self.mission_executor.is_running
+
     def send_ai_command(self) -> None:
-        """Prepara e inicia a sequência de comandos da IA em uma thread gerenciadora."""
+        """Prepara e entrega a sequência de comandos da IA ao executor de missões."""
         if self.is_sequence_running:
             self.show_message("Atenção", "Uma sequência já está em execução. Por favor, aguarde.")
             return
@@ -287,35 +395,95 @@ class TelloGUI:
 
         self.text_input_entry.delete(0, tk.END) # Limpa a caixa de entrada de texto
 
-        threading.Thread(
-            target=self._execute_ai_sequence,
-            args=(user_text,),
-            daemon=True
-        ).start()
+        if self._dispatch_direct_command(user_text):
+            return
+
+        if not self.mission_executor.submit(self._execute_ai_sequence, user_text):
+            self.show_message("Atenção", "Uma sequência já está em execução. Por favor, aguarde.")
 
-    def _get_frame(self) -> Image.Image:
+    def _dispatch_direct_command(self, user_text: str) -> bool:
         """
-        Captura frame mais recente direto da thread de vídeo.
+        Envia imediatamente comandos diretos reconhecidos pela gramática, sem chamar a IA.
+        Args:
+            user_text (str): Texto digitado ou transcrito.
         Returns:
-            Image.Image: O frame atual como uma imagem PIL.
+            bool: True se o texto era um comando direto e foi despachado.
         """
+        start = time.perf_counter()
+        commands = command_grammar.parse_direct_command(user_text)
+        if not commands:
+            return False
+
+        for command in commands:
+            if chatbot.validate_command(command):
+                self.command_tracker.submit(command)
+                self.update_log(f'direto: {command}')
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"Comando direto {commands} despachado em {elapsed_ms:.2f} ms.")
+        self.update_chat_display(user_text, f"Comando direto: {', '.join(commands)}")
+        return True
+
+    def _get_frame(self, token: CancelToken | None = None) -> tuple[Image.Image | chatbot.PreparedFrame | None, float]:
+        """
+        Retorna o frame mais nítido dos últimos instantes para o passo de IA.
+        Frames mais velhos que STALE_FRAME_MS são recusados: espera chegar um novo por até
+        FRESH_FRAME_TIMEOUT_S. Com o preparo em processo separado, o frame já volta codificado.
+        Args:
+            token (CancelToken | None): Token da missão; interrompe a espera ao abortar.
+        Returns:
+            tuple: (frame, instante de captura). O frame é None se nenhum frame novo chegou a tempo
+                ou se ele não pôde ser preparado: a missão nunca recebe um frame substituto.
+        """
+        deadline = time.time() + FRESH_FRAME_TIMEOUT_S
+        refused = False
+        while True:
+            frame, frame_time = self._select_frame()
+            age_ms = (time.time() - frame_time) * 1000
+            if frame is not None and age_ms <= STALE_FRAME_MS:
+                break
+            if frame is not None and not refused:
+                refused = True
+                self.latency.record_stale()
+                print(f"Frame com {age_ms:.0f} ms recusado; aguardando um frame novo.")
+            if time.time() >= deadline or (token is not None and token.cancelled):
+                return None, frame_time
+            time.sleep(FRESH_FRAME_POLL_S)
+        if self.keyframe_selector.selection_times_ms:
+            print(f"Keyframe: idade {age_ms:.0f} ms, seleção {self.keyframe_selector.selection_times_ms[-1]:.2f} ms")
+
         try:
-            if hasattr(self.tello, 'frame') and isinstance(self.tello.frame, np.ndarray):
-                if self.tello.frame.size > 0:
-                    frame = self.tello.frame.copy()
-                    img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    return Image.fromarray(img_rgb)
-            # ret, frame = self.webcam.read()
-            # if ret:
-            #     img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            #     return Image.fromarray(img_rgb)
-        except Exception:
-            pass
-    
-        if hasattr(self, 'img_ai') and self.img_ai:
-            return self.img_ai
-        return Image.new('RGB', (640, 480), color='black')
-    
+            if self.frame_preprocessor.running:
+                prepared = self.frame_preprocessor.prepare(frame)
+                print(f"Frame preparado em {prepared.prep_ms:.2f} ms ({len(prepared.jpeg)} bytes)")
+                return prepared, frame_time
+            return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)), frame_time
+        except Exception as e:
+            print(f"Erro ao preparar o frame da IA: {e}")
+            return None, frame_time
+
+    def _select_frame(self) -> tuple[np.ndarray | None, float]:
+        """
+        Escolhe o frame BGR do passo: o melhor keyframe recente, senão o keyframe mais novo.
+        Só frames que chegaram à interface têm instante de chegada conhecido; sem keyframes
+        (vídeo da GUI ainda parado) não há frame, em vez de um `tello.frame` de idade desconhecida.
+        Returns:
+            tuple: (frame BGR ou None, instante de chegada do frame; 0.0 sem frame)
+        """
+        selected = self.keyframe_selector.best()
+        if selected is None:
+            return None, 0.0
+        if (time.time() - selected[1]) * 1000 > STALE_FRAME_MS:
+            selected = self.keyframe_selector.latest() or selected # O mais nítido pode ser velho demais
+        return selected
+
+    @staticmethod
+    def _frame_signature(frame: Image.Image | chatbot.PreparedFrame) -> str:
+        """Assinatura do frame; frames preparados em outro processo já trazem a sua."""
+        if isinstance(frame, chatbot.PreparedFrame):
+            return frame.signature
+        return frame_signature(frame)
+
     def _calculate_wait_time(self, command: str) -> float:
         """
         Calcula quanto tempo esperar baseado na física do drone.
@@ -340,72 +508,323 @@ class TelloGUI:
             
         return 3.0 # Takeoff/Land
 
-    def _execute_ai_sequence(self, user_text: str) -> None:
+    def _execute_ai_sequence(self, user_text: str, token: CancelToken) -> None:
         """
-        Roda em uma thread e gerencia o loop de múltiplos passos.
+        Roda no worker do executor e gerencia o loop de múltiplos passos.
         Args:
             user_text (str): A entrada de texto do usuário.
+            token (CancelToken): Token de cancelamento da missão.
         """
-        self.is_sequence_running = True
-        self.abort_sequence_event.clear()
         self.root.after(0, self._set_ui_for_sequence, True)
 
         MAX_STEPS = 1 if chatbot.AI_PROVIDER == 'LOCAL' else int(self.max_steps)
-        current_frame = self._get_frame()
-        
         last_action = "Nenhuma."
+        mission = accounting.start_mission(user_text)
+        self.video_recorder.mark('mission_start', objective=user_text)
+        self._set_stream_status(f"Missão: {user_text}")
+        route_commands: list[str] = [] # Comandos e assinaturas gravados para a biblioteca de rotas
+        route_signatures: list[str] = []
+        mission_completed = False
+        auto_profile = self.profile_missions_rate is not None and not self.profiler.running
+        if auto_profile:
+            self.profiler.start('missao')
 
         try:
-            for step in range(MAX_STEPS):
-                current_frame = self._get_frame()
-                
-                prompt_text = user_text
-
-                # Chamada atualizada passando last_action
-                response, command, continue_route = chatbot.run_ai(
-                    text=prompt_text,
-                    frame=current_frame,
-                    step=step,
-                    height=self.drone_height,
-                    last_action=last_action,
-                    max_steps=MAX_STEPS
-                )
+            start_step = 0
+            route = self.route_library.match(user_text)
+            if route:
+                start_step, last_action, mission_completed = self._replay_route(route, user_text, route_commands, route_signatures, token)
+                if mission_completed or token.cancelled:
+                    return
+                print(f"Rota divergiu no passo {start_step + 1}; retomando com a IA.")
+
+            # Buscas começam olhando em volta: uma requisição com todas as direções
+            look_next = look_around.LOOK_AROUND_ON_SEARCH and start_step == 0 and look_around.is_search_objective(user_text)
+            for step in range(start_step, MAX_STEPS):
+                budget_reason = mission.budget_exceeded()
+                if budget_reason:
+                    print(f"Missão encerrada: {budget_reason}.")
+                    self.root.after(0, self.update_chat_display, user_text, f"Missão encerrada: {budget_reason}.")
+                    break
+
+                self.profiler.mark(f'passo {step + 1}')
+                if look_next:
+                    look_next = False
+                    looked = self._look_around(user_text, step, MAX_STEPS, last_action, token, route_commands, route_signatures)
+                    if looked is None:
+                        print("Look-around interrompido.")
+                        break
+                    response, command, continue_route, current_frame, frame_time = looked
+                else:
+                    current_frame, frame_time = self._get_frame(token)
+                    if current_frame is None:
+                        print("Missão encerrada: nenhum frame novo do vídeo.")
+                        self.root.after(0, self.update_chat_display, user_text, "Missão encerrada: vídeo sem frames novos.")
+                        break
+
+                    prompt_text = user_text
+
+                    # Chamada atualizada passando last_action
+                    # A chamada à IA roda fora do worker para que o aborto não espere a rede
+                    response, command, continue_route, _ = self.mission_executor.run_cancellable(
+                        token,
+                        chatbot.run_ai,
+                        text=prompt_text,
+                        frame=current_frame,
+                        step=step,
+                        height=self.drone_height,
+                        last_action=last_action,
+                        max_steps=MAX_STEPS
+                    )
+                response_time = time.time()
+                if chatbot.request_sent_at > frame_time:
+                    self.latency.record('request', (chatbot.request_sent_at - frame_time) * 1000)
 
                 # Atualiza UI
                 display_text = user_text if step == 0 else f"Sequência de comandos, passo {step + 1}/{MAX_STEPS}"
                 self.root.after(0, self.update_chat_display, display_text, response)
 
-                if command and chatbot.validate_command(command):
+                self.video_recorder.mark('step', step=step + 1, command=command, continua=continue_route)
+                self._set_stream_status(f"Missão: {user_text} | passo {step + 1}/{MAX_STEPS}: {command or '-'}")
+
+                if command == chatbot.LOOK_AROUND_COMMAND:
+                    look_next = True # O próximo passo gira, fotografa e consulta a IA uma vez
                     last_action = command
-                    tello_control.process_ai_command(self.tello, command)
+                    continue
+
+                if command and chatbot.validate_command(command):
+                    signature = self._frame_signature(current_frame)
                     self.root.after(0, self.update_log, f'{step + 1}: {command}')
-                    
-                    wait_time = self._calculate_wait_time(command)
-                    
-                    was_interrupted = self.abort_sequence_event.wait(wait_time)
+                    # Não ultrapassa o orçamento de tempo esperando
+                    last_action, was_interrupted, failed = self._execute_command(command, token, mission.remaining_time(), response_time)
                     if was_interrupted:
                         print("Sequência abortada durante espera.")
                         break
+                    if not failed: # A biblioteca só guarda comandos que o drone executou
+                        route_commands.append(command)
+                        route_signatures.append(signature)
+                    if not continue_route:
+                        mission_completed = not failed # A rota só é salva se terminou em um comando executado
+                        break
                 else:
                     last_action = "Nenhum comando."
                     print(f"Sem comando válido no passo {step}.")
-                    if not continue_route: break
+                    if not continue_route:
+                        break # A IA desistiu: não há rota para salvar
 
-                if not continue_route:
-                    break
-                
                 # Se não houve comando (apenas análise), espera um pouco menos antes do próximo loop
                 if not command:
-                    if self.abort_sequence_event.wait(2): break
+                    if token.wait(2): break
 
+        except MissionCancelled:
+            print("Sequência abortada.")
         except Exception as e:
             print(f"Erro seq: {e}")
             import traceback
             traceback.print_exc()
         finally:
-            self.is_sequence_running = False
+            if mission_completed and not token.cancelled:
+                self.route_library.add(user_text, route_commands, route_signatures)
+            accounting.end_mission()
+            print(f"Keyframes: {self.keyframe_selector.report()}")
+            print(f"Latência: {self.latency.report()}")
+            print(f"Comandos: {self.command_tracker.report()}")
+            self.video_recorder.mark('mission_end')
+            self._set_stream_status(None)
+            self.profiler.mark(None)
+            if auto_profile:
+                threading.Thread(target=self.profiler.stop, daemon=True).start() # Grava os flame graphs sem atrasar o fim da missão
             self.root.after(0, self._set_ui_for_sequence, False)
 
+    def _execute_command(self, command: str, token: CancelToken, max_wait: float | None = None,
+                         response_time: float | None = None) -> tuple[str, bool, bool]:
+        """
+        Executa um comando validado: metas de ajuste fino vão para o controlador rc local,
+        os demais são enviados ao drone e aguardados até a resposta dele.
+        Args:
+            command (str): Comando validado.
+            token (CancelToken): Token de cancelamento da missão.
+            max_wait (float | None): Limite da espera em segundos.
+            response_time (float | None): Chegada da resposta da IA, para medir despacho e resposta do drone.
+        Returns:
+            tuple[str, bool, bool]: (descrição da ação para o próximo prompt, interrompido, falhou)
+        """
+        token.raise_if_cancelled()
+        if self.rc_controller.is_goal(command):
+            result = self.rc_controller.run(command, token)
+            self.video_recorder.mark('rc_goal', **result)
+            interrupted = token.cancelled or result['status'] == 'cancelled'
+            failed = not interrupted and result['status'] not in ('aligned', 'reached') # lost, timeout ou no_frame
+            if failed:
+                self.root.after(0, self.update_log, f"falhou: {command} ({result['status']})")
+            return f"{command} (resultado: {result['status']})", interrupted, failed
+
+        tracked = self.command_tracker.submit(command)
+        if response_time is not None:
+            self.latency.record('dispatch', (time.time() - response_time) * 1000)
+        interrupted = self._await_command(tracked, token, max_wait)
+        if response_time is not None and tracked.response: # Só há resposta se o drone respondeu
+            self.latency.record('ack', (tracked.acked_at - response_time) * 1000) # type: ignore
+        failed = tracked.status in (ERROR, TIMEOUT)
+        if failed:
+            print(f"Comando #{tracked.id} falhou: {tracked.describe()}")
+            self.video_recorder.mark('command_failed', command=command, status=tracked.status, response=tracked.response)
+            self.root.after(0, self.update_log, f'falhou: {command} ({tracked.response or tracked.status})')
+        return tracked.describe(), interrupted, failed
+
+    def _await_command(self, tracked: TrackedCommand, token: CancelToken, max_wait: float | None = None) -> bool:
+        """
+        Espera o drone responder ao comando (ou o cancelamento da missão). Drones que não devolvem
+        a resposta (ex.: os falsos dos benchmarks) voltam à espera estimada por _calculate_wait_time.
+        Args:
+            tracked (TrackedCommand): Comando submetido ao rastreador.
+            token (CancelToken): Token de cancelamento da missão.
+            max_wait (float | None): Limite da espera em segundos.
+        Returns:
+            bool: True se a missão foi cancelada durante a espera.
+        """
+        if tracked.status == UNCONFIRMED:
+            wait_time = self._calculate_wait_time(tracked.command)
+            if max_wait is not None:
+                wait_time = min(wait_time, max_wait)
+            return token.wait(wait_time)
+
+        timeout = command_timeout(tracked.command) + 1.0 # O rastreador desiste antes e marca 'timeout'
+        if max_wait is not None:
+            timeout = min(timeout, max_wait)
+        tracked.wait(timeout, token.event)
+        if tracked.succeeded and token.wait(ACK_SETTLE_S):
+            return True
+        return token.cancelled
+
+    def _capture_view(self, token: CancelToken) -> tuple[Image.Image, float] | None:
+        """
+        Escolhe o keyframe mais nítido logo após a estabilização do giro do look-around.
+        Args:
+            token (CancelToken): Token de cancelamento da missão.
+        Returns:
+            tuple | None: (vista, instante de captura), ou None se não chegou frame novo.
+        """
+        deadline = time.time() + FRESH_FRAME_TIMEOUT_S
+        while not token.cancelled and time.time() < deadline:
+            selected = self.keyframe_selector.best(look_around.LOOK_KEYFRAME_WINDOW_MS) or self._select_frame()
+            frame, frame_time = selected
+            if frame is not None and (time.time() - frame_time) * 1000 <= STALE_FRAME_MS:
+                return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)), frame_time
+            time.sleep(FRESH_FRAME_POLL_S)
+        return None
+
+    def _look_around(self, user_text: str, step: int, max_steps: int, last_action: str, token: CancelToken,
+                     commands: list[str], signatures: list[str]) -> tuple | None:
+        """
+        Gira por LOOK_AROUND_VIEWS direções, fotografa cada uma e envia o mosaico em uma única
+        chamada à IA, que escolhe a vista do alvo e o próximo comando. Ao final o drone é girado
+        até a vista escolhida; o comando seguinte fica para o laço da missão.
+        Args:
+            user_text (str): Objetivo da missão.
+            step (int): Passo atual.
+            max_steps (int): Número máximo de passos.
+            last_action (str): Última ação executada.
+            token (CancelToken): Token de cancelamento da missão.
+            commands (list[str]): Lista onde os giros executados são acumulados (biblioteca de rotas).
+            signatures (list[str]): Lista onde as assinaturas dos frames são acumuladas.
+        Returns:
+            tuple | None: (resposta, comando, continuar, frame da vista escolhida, captura da primeira vista),
+                ou None se o giro foi interrompido ou o vídeo parou.
+        """
+        views = look_around.LOOK_AROUND_VIEWS
+        rotation = f'cw {look_around.heading_step(views)}'
+        frames: list[Image.Image] = []
+        first_capture = time.time()
+        for index in range(views):
+            if index:
+                _, interrupted, failed = self._execute_command(rotation, token)
+                if failed:
+                    print(f"Look-around: giro {index} falhou; as vistas não seriam confiáveis.")
+                if interrupted or failed:
+                    return None
+                commands.append(rotation)
+                signatures.append(frame_signature(frames[-1]))
+                if token.wait(look_around.LOOK_SETTLE_S):
+                    return None
+            view = self._capture_view(token)
+            if view is None:
+                return None
+            frames.append(view[0])
+            if index == 0:
+                first_capture = view[1]
+        self.root.after(0, self.update_log, f'{step + 1}: look ({views} vistas)')
+
+        mosaic = look_around.build_mosaic(frames)
+        prepared = chatbot.PreparedFrame(look_around.mosaic_to_jpeg(mosaic), frame_signature(mosaic), mosaic.size)
+        response, command, continue_route, view = self.mission_executor.run_cancellable(
+            token,
+            chatbot.run_ai,
+            text=look_around.look_around_objective(user_text, views),
+            frame=prepared,
+            step=step,
+            height=self.drone_height,
+            last_action=last_action,
+            max_steps=max_steps
+        )
+        chosen = view if 1 <= view <= views else views # Sem escolha: fica na vista atual
+        turn = look_around.rotation_between(views, chosen, views)
+        print(f"Look-around: vista {chosen} escolhida ({turn or 'sem giro'}), próximo comando: {command}.")
+        if turn:
+            _, interrupted, failed = self._execute_command(turn, token)
+            if failed:
+                print(f"Look-around: giro até a vista {chosen} falhou.")
+            if interrupted or failed:
+                return None
+            commands.append(turn)
+            signatures.append(frame_signature(frames[-1]))
+        return f"{response}\nVista escolhida: {chosen}", command, continue_route, frames[chosen - 1], first_capture
+
+    def _replay_route(self, route: dict, user_text: str, commands: list[str], signatures: list[str], token: CancelToken) -> tuple[int, str, bool]:
+        """
+        Repete uma rota conhecida sem chamar a IA, conferindo a assinatura do frame em cada passo.
+        Args:
+            route (dict): Rota encontrada na biblioteca.
+            user_text (str): Objetivo da missão.
+            commands (list[str]): Lista onde os comandos executados são acumulados.
+            signatures (list[str]): Lista onde as assinaturas dos frames são acumuladas.
+            token (CancelToken): Token de cancelamento da missão.
+        Returns:
+            tuple: (passos executados, última ação, rota concluída)
+        """
+        print(f"Rota conhecida encontrada: '{route['objective']}' ({len(route['commands'])} passos).")
+        last_action = "Nenhuma."
+        for step, command in enumerate(route['commands']):
+            self.profiler.mark(f'rota {step + 1}')
+            frame, _ = self._get_frame(token)
+            if frame is None:
+                print(f"Ponto de controle {step + 1} sem frame novo do vídeo.")
+                return step, last_action, False
+            signature = self._frame_signature(frame)
+            matches, distance = self.route_library.checkpoint_matches(route, step, signature)
+            if not matches:
+                print(f"Ponto de controle {step + 1} não confere (distância {distance}).")
+                self.route_library.record_replay(route, completed=False)
+                return step, last_action, False
+
+            self.root.after(0, self.update_chat_display, user_text,
+                            f"Repetindo rota conhecida: passo {step + 1}/{len(route['commands'])}\nComando: {command}")
+            self.video_recorder.mark('step', step=step + 1, command=command, replay=True)
+            self._set_stream_status(f"Rota: {user_text} | passo {step + 1}/{len(route['commands'])}: {command}")
+            self.root.after(0, self.update_log, f'{step + 1} (rota): {command}')
+            last_action, was_interrupted, failed = self._execute_command(command, token)
+            if was_interrupted:
+                print("Sequência abortada durante espera.")
+                return step + 1, last_action, False
+            if failed: # A rota supõe que o comando foi executado; a IA retoma sabendo da falha
+                self.route_library.record_replay(route, completed=False)
+                return step + 1, last_action, False
+            commands.append(command)
+            signatures.append(signature)
+
+        self.route_library.record_replay(route, completed=True)
+        return len(route['commands']), last_action, True
+
     def _set_ui_for_sequence(self, is_running: bool) -> None:
         """
         Habilita ou desabilita os controles da UI durante uma sequência.
@@ -422,25 +841,43 @@ class TelloGUI:
         self.takeoff_button.config(state=state)
         self.land_button.config(state=state)
         self.max_steps_button.config(state=state)
+        self.provider_combobox.config(state="disabled" if is_running else "readonly")
 
     # --- Funções de Atualização da Interface ---
 
     def update_video_frame(self) -> None:
         """Captura, processa e exibe um novo frame de vídeo."""
+        wait_start = time.time()
         frame = self.tello.get_frame()
         # frame = self.webcam.read()[1] # Ativar webcam
+        frame_time = time.time()
+        # Sem vídeo, o get_frame devolve um frame preto depois do timeout: ele é exibido, mas não
+        # é um frame que chegou, então não vira keyframe nem ganha instante de captura
+        arrived = frame_time - wait_start < PLACEHOLDER_WAIT_S or frame.any()
+        if arrived:
+            self.video_recorder.submit(frame, frame_time) # Não bloqueia: descarta se o codificador atrasar
+            self.keyframe_selector.add(frame, frame_time) # Notas de nitidez calculadas uma vez por frame
+            if self.stream_server:
+                self.stream_server.submit(frame) # Não bloqueia: o codificador pega sempre o mais recente
         img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
 
         # Garante que temos um array válido antes de prosseguir.
         if isinstance(img_rgb, np.ndarray):
-            self.img_ai = Image.fromarray(img_rgb)
-            photo = ImageTk.PhotoImage(image=self.img_ai)
+            image = Image.fromarray(img_rgb)
         else:
-            null_img = Image.new("RGB", self.video_size, color="black")
-            photo = ImageTk.PhotoImage(image=null_img)
-        
-        self.video_label.config(image=photo)
-        self._video_frame = photo
+            image = Image.new("RGB", self.video_size, color="black")
+
+        # Reaproveita o PhotoImage quando o tamanho não muda, em vez de criar um novo a cada 20 ms
+        photo = getattr(self, '_video_frame', None)
+        if photo is not None and (photo.width(), photo.height()) == image.size:
+            photo.paste(image)
+        else:
+            photo = ImageTk.PhotoImage(image=image)
+            self.video_label.config(image=photo)
+            self._video_frame = photo
+
+        if arrived:
+            self.latency.record('display', (time.time() - frame_time) * 1000)
 
         # Contagem de frames para cálculo do FPS
         self.fps_counter += 1
@@ -470,15 +907,77 @@ class TelloGUI:
         self._update_param_label('pres', pres)
         self._update_param_label('time', time_elapsed)
 
+        usage = accounting.get_running_totals()
+        self._update_param_label('tokens', usage['mission_tokens'])
+        self._update_param_label('cost', round(usage['mission_cost_usd'], 4))
+        self._update_param_label('tok_rate', round(usage['mission_tokens_per_s'], 1))
+        self._update_param_label('session_cost', round(usage['cost_usd'], 4))
+        self._update_param_label('parse_fail', round(accounting.parse_failure_rate() * 100, 1))
+        breaker = chatbot.PROVIDERS[chatbot.AI_PROVIDER].breaker
+        if breaker:
+            status = breaker.snapshot()
+            self._update_param_label('breaker', STATE_LABELS[status['state']])
+            self._update_param_label('fallbacks', status['fallbacks'])
+        else:
+            self._update_param_label('breaker', '-')
+        self._update_param_label('rec_drops', self.video_recorder.frames_dropped)
+        if self.mission_executor.abort_latencies_ms:
+            self._update_param_label('abort', round(self.mission_executor.abort_latencies_ms[-1], 1))
+        if self.rc_controller.last_result:
+            self._update_param_label('rc', self.rc_controller.last_result['hz'])
+        if self.stream_server:
+            self._update_param_label('viewers', len(self.stream_server.clients))
+        for key, stage in (('lat_display', 'display'), ('lat_request', 'request'), ('lat_ack', 'ack')):
+            result = self.latency.percentiles(stage)
+            if result:
+                self._update_param_label(key, f"{result[0]:.0f}/{result[1]:.0f}")
+        self._update_param_label('stale', self.latency.stale_frames)
+        commands = self.command_tracker.report()
+        if commands['motion_ms']:
+            self._update_param_label('cmd_exec', f"{commands['motion_ms']['p50']:.0f}/{commands['motion_ms']['p95']:.0f}")
+        self._update_param_label('cmd_fail', commands['status'].get('error', 0) + commands['status'].get('timeout', 0))
+        self._update_param_label('tk_lag', round(self.tk_watchdog.recent_max_ms()))
+
         # Agendar a próxima atualização a cada segundo
         self.root.after(1000, self.update_stats)
 
-    def _update_param_label(self, key: str, value: int | float) -> None:
+    def _apply_resource_governor(self) -> None:
+        """
+        Aplica os limites de threads e fixa os trabalhadores de longa duração nas CPUs de cada papel.
+        A thread do Tk é fixada por último, pois as threads criadas por ela herdam a sua afinidade.
+        """
+        resource_governor.apply_library_limits()
+        resource_governor.pin_thread('video', getattr(self.tello, 'videoThread', None)) # Decodificação do TelloZune
+        resource_governor.pin_thread('ai', self.mission_executor.worker) # As chamadas à IA herdam do worker
+        if self.frame_preprocessor.process is not None:
+            resource_governor.pin('ai', self.frame_preprocessor.process.pid, 'FramePreprocessor') # type: ignore
+        resource_governor.pin('render', name='Tk')
+        print(f"Governador de recursos: {resource_governor.report()}")
+
+    def _on_mission_abort(self) -> None:
+        """
+        Descarta os comandos ainda não enviados (no rastreador e na fila do TelloZune) e a conversa
+        com a IA, para que uma chamada abandonada não escreva no histórico da próxima missão.
+        """
+        self.command_tracker.flush()
+        tello_control.flush_commands(self.tello)
+        chatbot.discard_conversation()
+
+    def _set_stream_status(self, text: str | None) -> None:
+        """
+        Atualiza o status sobreposto ao vídeo transmitido.
+        Args:
+            text (str | None): Missão e passo atuais, ou None ao terminar.
+        """
+        if self.stream_server:
+            self.stream_server.set_status(text)
+
+    def _update_param_label(self, key: str, value: int | float | str) -> None:
         """
         Atualiza o label de um parâmetro específico.
         Args:
             key (str): A chave do parâmetro a ser atualizado.
-            value (int | float): O novo valor do parâmetro.
+            value (int | float | str): O novo valor do parâmetro.
         """
         if key in self.param_labels:
             label, unit = self.param_labels[key]
@@ -491,12 +990,13 @@ class TelloGUI:
         Args:
             message (str): A mensagem a ser adicionada ao log.
         """
-        tello_control.log_messages.append(message)
-        
-        # Atualiza a Listbox
-        self.log_listbox.delete(0, tk.END)
-        for log in reversed(tello_control.log_messages):
-            self.log_listbox.insert(0, log)
+        tello_control.append_log(message)
+
+        # Atualiza a Listbox de forma incremental, mantendo o mesmo limite do log
+        self.log_listbox.insert(tk.END, message)
+        overflow = self.log_listbox.size() - tello_control.MAX_LOG_MESSAGES
+        if overflow > 0:
+            self.log_listbox.delete(0, overflow - 1)
 
     def update_chat_display(self, user_msg: str, ai_msg: str) -> None:
         """
@@ -510,63 +1010,52 @@ class TelloGUI:
         self.response_text_ai.config(state="disabled")
         self.response_text_ai.see(tk.END)
 
-    def _transcribe_audio(self, audio_data: np.ndarray) -> str:
-        """Transcreve o áudio gravado para texto.
+    def _show_partial_transcript(self, text: str) -> None:
+        """
+        Mostra o texto parcial na caixa de entrada enquanto o usuário fala.
         Args:
-            audio_data (np.ndarray): O áudio gravado.
-        Returns:
-            str: O texto transcrito.
+            text (str): Transcrição parcial.
         """
-        recognizer = sr.Recognizer()
-        try:
-            mem_wav = io.BytesIO()
-            write(mem_wav, SAMPLE_RATE, audio_data)
-            mem_wav.seek(0)
-            with sr.AudioFile(mem_wav) as source:
-                audio_for_recognition = recognizer.record(source)
-            
-            transcribed_text = recognizer.recognize_google(audio_for_recognition, language='pt-BR') # type: ignore
-            # transcribed_text = recognizer.recognize_sphinx(audio_for_recognition, language='pt-BR') # type: ignore
-            print(f"Texto reconhecido: '{transcribed_text}'")
-            return transcribed_text
-        except sr.UnknownValueError:
-            return "Não foi possível entender o áudio."
-        except sr.RequestError:
-            return "Erro de conexão com o serviço de transcrição."
-        except Exception as e:
-            print(f"Erro inesperado na transcrição: {e}")
-            return "Erro ao processar o áudio."
-
-    def _record_audio(self) -> None:
-        """Grava e depois dispara a transcrição em uma thread."""
-        try:
-            print(f"Gravando áudio por até {AUDIO_DURATION} segundos...")
-            audio_data = sd.rec(int(AUDIO_DURATION * SAMPLE_RATE), samplerate=SAMPLE_RATE, channels=1, dtype='int16')
-            sd.wait()
-
-            self.root.after(0, lambda: self.text_input_entry.insert(0, "Transcrevendo áudio..."))
-            transcribed_text = self._transcribe_audio(audio_data)
+        self.text_input_entry.delete(0, tk.END)
+        self.text_input_entry.insert(0, text)
 
-            def update_entry():
-                self.text_input_entry.delete(0, tk.END)
-                self.text_input_entry.insert(0, transcribed_text)
-            
-            self.root.after(0, update_entry)
-
-        except Exception as e:
-            print(f"Ocorreu um erro durante o ciclo de gravação: {e}")
-        finally:
-            self.root.after(0, self.reset_recording_buttons)
+    def _on_transcript_final(self, text: str) -> None:
+        """
+        Recebe a transcrição final da captura de voz.
+        Args:
+            text (str): Texto transcrito ou mensagem de erro.
+        """
+        self.text_input_entry.delete(0, tk.END)
+        self.text_input_entry.insert(0, text)
+        self.reset_recording_buttons()
+        if VOICE_DIRECT_DISPATCH and not self.is_sequence_running and command_grammar.parse_direct_command(text):
+            self.send_ai_command()
 
     def start_recording(self) -> None:
-        """Inicia a gravação de áudio."""
-        self.start_record_button.config(state="disabled", text=f"Gravando...({AUDIO_DURATION}s)")
+        """Inicia a captura de voz; a gravação termina sozinha quando a fala acaba."""
+        self.start_record_button.config(state="disabled", text="Ouvindo...")
         self.stop_record_button.config(state="normal")
-        threading.Thread(target=self._record_audio, daemon=True).start()
+        try:
+            if self.voice_capture is None:
+                # Áudio e reconhecimento de fala só são importados na primeira gravação
+                from modules import voice_capture
+                self.voice_capture = voice_capture.VoiceCapture(voice_capture.get_recognizer())
+        except Exception as e:
+            print(f"Erro ao iniciar o reconhecedor de voz: {e}")
+            self.reset_recording_buttons()
+            return
+
+        self.text_input_entry.delete(0, tk.END)
+        self.voice_capture.start(
+            on_partial=lambda text: self.root.after(0, self._show_partial_transcript, text),
+            on_final=lambda text: self.root.after(0, self._on_transcript_final, text)
+        )
+        resource_governor.pin_thread('audio', self.voice_capture.thread)
 
     def stop_recording(self) -> None:
         """Para a gravação de áudio."""
-        sd.stop()
+        if self.voice_capture:
+            self.voice_capture.stop()
 
     def reset_recording_buttons(self) -> None:
         """Função auxiliar para reabilitar o botão de gravação."""
@@ -576,12 +1065,18 @@ class TelloGUI:
     def emergency_stop(self) -> None:
         """Função para parar imediatamente o drone."""
         # self.tello.send_cmd('stop')
-        if self.abort_sequence_event:
-            self.abort_sequence_event.set()
-            print("Comando de emergência enviado ao drone.")
+        self.mission_executor.abort() # Cancela todas as etapas e esvazia a fila de comandos
+        print("Comando de emergência enviado ao drone.")
 
     def _exit(self) -> None:
         """Função chamada ao fechar a janela."""
         print("Encerrando conexão...")
+        self.video_recorder.stop()
+        self.tk_watchdog.stop() # Imprime o histograma de atrasos da sessão
+        self.command_tracker.stop()
+        self.frame_preprocessor.stop()
+        self.profiler.stop()
+        if self.stream_server:
+            self.stream_server.stop()
         self.tello.end_tello()
         self.root.destroy()
\ No newline at end of file
@@ -1,6 +1,11 @@
 import tkinter as tk
-from interface import TelloGUI
 
-root = tk.Tk()
-app = TelloGUI(root)
-root.mainloop()
\ No newline at end of file
+from modules import resource_governor
+resource_governor.configure() # Limites de BLAS/OpenMP precisam ser definidos antes do import do NumPy
+
+if __name__ == '__main__': # O preparo de frames usa 'spawn': o processo filho reimporta este módulo
+    from interface import TelloGUI
+
+    root = tk.Tk()
+    app = TelloGUI(root)
+    root.mainloop()
@@ -0,0 +1,357 @@
+"""
+Contabilidade de tokens, custo e vazão por passo e por missão.
+Os provedores informam o uso em cada resposta; este módulo normaliza esses dados,
+acumula totais, aplica orçamentos opcionais por missão e exporta para análise offline.
+"""
+import csv
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Preços em US$ por 1 milhão de tokens: (entrada, entrada em cache, saída)
+MODEL_PRICES = {
+    'gemini-2.5-flash': (0.30, 0.03, 2.50),
+    'gpt-4o-mini': (0.15, 0.075, 0.60),
+    'minicpm-v:8b': (0.0, 0.0, 0.0),
+}
+
+# Orçamentos por missão (None desativa)
+MISSION_TOKEN_BUDGET: int | None = None
+MISSION_TIME_BUDGET_S: float | None = None
+
+EXPORT_DIR = 'usage_exports'
+MAX_STORED_MISSIONS = 500
+
+_lock = threading.Lock()
+missions: deque['MissionAccount'] = deque(maxlen=MAX_STORED_MISSIONS)
+current_mission: 'MissionAccount | None' = None
+session_totals = {'input_tokens': 0, 'cached_tokens': 0, 'output_tokens': 0, 'cost_usd': 0.0, 'steps': 0}
+# Resultado do parse das respostas por provedor: ok (segue o schema), repaired (ajustada) ou failed (ilegível)
+parse_stats: dict[str, dict[str, int]] = {}
+# Eventos dos provedores remotos: timeout, error e fallback (passo executado no modelo local)
+provider_events: dict[str, dict[str, int]] = {}
+
+
+class StepUsage:
+    """
+    Uso de um passo de IA.
+    Args:
+        provider (str): Nome do provedor.
+        model (str): Nome do modelo.
+        step (int): Passo da missão.
+        input_tokens (int): Tokens de entrada.
+        cached_tokens (int | None): Tokens de entrada servidos do cache (None se não informado).
+        output_tokens (int): Tokens gerados.
+        latency_s (float): Tempo de parede da chamada.
+        generation_s (float | None): Tempo de geração informado pelo provedor (Ollama).
+    """
+    def __init__(self, provider: str, model: str, step: int, input_tokens: int, cached_tokens: int | None,
+                 output_tokens: int, latency_s: float, generation_s: float | None = None) -> None:
+        self.timestamp = time.time()
+        self.provider = provider
+        self.model = model
+        self.step = step
+        self.input_tokens = input_tokens
+        self.cached_tokens = cached_tokens
+        self.output_tokens = output_tokens
+        self.latency_s = latency_s
+        self.generation_s = generation_s
+        self.cost_usd = estimate_cost(model, input_tokens, cached_tokens or 0, output_tokens)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    @property
+    def tokens_per_s(self) -> float:
+        """Vazão de saída: usa o tempo de geração do provedor quando disponível."""
+        duration = self.generation_s if self.generation_s else self.latency_s
+        return self.output_tokens / duration if duration > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'timestamp': self.timestamp,
+            'provider': self.provider,
+            'model': self.model,
+            'step': self.step,
+            'input_tokens': self.input_tokens,
+            'cached_tokens': self.cached_tokens,
+            'output_tokens': self.output_tokens,
+            'latency_s': round(self.latency_s, 4),
+            'generation_s': None if self.generation_s is None else round(self.generation_s, 4),
+            'tokens_per_s': round(self.tokens_per_s, 2),
+            'cost_usd': round(self.cost_usd, 6),
+        }
+
+
+class MissionAccount:
+    """
+    Totais de uma missão e verificação de orçamento.
+    Args:
+        objective (str): Objetivo informado pelo usuário.
+        token_budget (int | None): Limite de tokens da missão.
+        time_budget_s (float | None): Limite de duração da missão em segundos.
+    """
+    def __init__(self, objective: str, token_budget: int | None = None, time_budget_s: float | None = None) -> None:
+        self.objective = objective
+        self.start_time = time.time()
+        self.end_time: float | None = None
+        self.token_budget = token_budget
+        self.time_budget_s = time_budget_s
+        self.steps: list[StepUsage] = []
+        self.parse_failures = 0
+        self.fallback_steps = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(s.total_tokens for s in self.steps)
+
+    @property
+    def cost_usd(self) -> float:
+        return sum(s.cost_usd for s in self.steps)
+
+    @property
+    def elapsed_s(self) -> float:
+        return (self.end_time or time.time()) - self.start_time
+
+    @property
+    def tokens_per_s(self) -> float:
+        """Vazão média de saída dos passos da missão."""
+        output = sum(s.output_tokens for s in self.steps)
+        duration = sum((s.generation_s or s.latency_s) for s in self.steps)
+        return output / duration if duration > 0 else 0.0
+
+    def budget_exceeded(self) -> str | None:
+        """
+        Verifica os orçamentos da missão.
+        Returns:
+            str | None: Motivo do estouro, ou None se dentro do orçamento.
+        """
+        if self.token_budget is not None and self.total_tokens >= self.token_budget:
+            return f"orçamento de tokens atingido ({self.total_tokens}/{self.token_budget})"
+        if self.time_budget_s is not None and self.elapsed_s >= self.time_budget_s:
+            return f"orçamento de tempo atingido ({self.elapsed_s:.1f}/{self.time_budget_s:.0f}s)"
+        return None
+
+    def remaining_time(self) -> float | None:
+        """Tempo restante do orçamento de tempo, ou None se não houver limite."""
+        if self.time_budget_s is None:
+            return None
+        return max(0.0, self.time_budget_s - self.elapsed_s)
+
+    def summary(self) -> dict:
+        return {
+            'objective': self.objective,
+            'start_time': self.start_time,
+            'elapsed_s': round(self.elapsed_s, 3),
+            'steps': len(self.steps),
+            'input_tokens': sum(s.input_tokens for s in self.steps),
+            'cached_tokens': sum(s.cached_tokens or 0 for s in self.steps),
+            'output_tokens': sum(s.output_tokens for s in self.steps),
+            'total_tokens': self.total_tokens,
+            'tokens_per_s': round(self.tokens_per_s, 2),
+            'cost_usd': round(self.cost_usd, 6),
+            'parse_failures': self.parse_failures,
+            'fallback_steps': self.fallback_steps,
+        }
+
+
+def estimate_cost(model: str, input_tokens: int, cached_tokens: int, output_tokens: int) -> float:
+    """
+    Estima o custo de uma chamada em US$.
+    Args:
+        model (str): Nome do modelo.
+        input_tokens (int): Tokens de entrada (incluindo os em cache).
+        cached_tokens (int): Tokens de entrada servidos do cache.
+        output_tokens (int): Tokens gerados.
+    Returns:
+        float: Custo estimado.
+    """
+    price_in, price_cached, price_out = MODEL_PRICES.get(model, (0.0, 0.0, 0.0))
+    uncached = max(0, input_tokens - cached_tokens)
+    return (uncached * price_in + cached_tokens * price_cached + output_tokens * price_out) / 1_000_000
+
+def start_mission(objective: str) -> MissionAccount:
+    """
+    Abre a contabilidade de uma nova missão com os orçamentos configurados.
+    Args:
+        objective (str): Objetivo da missão.
+    Returns:
+        MissionAccount: Conta da missão.
+    """
+    global current_mission
+    with _lock:
+        current_mission = MissionAccount(objective, MISSION_TOKEN_BUDGET, MISSION_TIME_BUDGET_S)
+        missions.append(current_mission)
+    return current_mission
+
+def end_mission() -> dict | None:
+    """
+    Fecha a missão atual e imprime o resumo.
+    Returns:
+        dict | None: Resumo da missão encerrada.
+    """
+    global current_mission
+    with _lock:
+        mission = current_mission
+        current_mission = None
+    if mission is None:
+        return None
+    mission.end_time = time.time()
+    summary = mission.summary()
+    print(f"Missão: {summary['steps']} passos, {summary['total_tokens']} tokens, "
+          f"US$ {summary['cost_usd']:.5f}, {summary['tokens_per_s']} tok/s, {summary['elapsed_s']}s")
+    return summary
+
+def record_step(provider: str, model: str, step: int, input_tokens: int | None, cached_tokens: int | None,
+                output_tokens: int | None, latency_s: float, generation_s: float | None = None,
+                in_mission: bool = True) -> StepUsage:
+    """
+    Registra o uso de um passo na missão atual e nos totais da sessão.
+    Args:
+        provider (str): Nome do provedor.
+        model (str): Nome do modelo.
+        step (int): Passo da missão.
+        input_tokens (int | None): Tokens de entrada.
+        cached_tokens (int | None): Tokens em cache (None se o provedor não informa).
+        output_tokens (int | None): Tokens gerados.
+        latency_s (float): Tempo de parede da chamada.
+        generation_s (float | None): Tempo de geração informado pelo provedor.
+        in_mission (bool): False para chamadas abandonadas, que só entram nos totais da sessão.
+    Returns:
+        StepUsage: Registro criado.
+    """
+    usage = StepUsage(provider, model, step, input_tokens or 0, cached_tokens, output_tokens or 0, latency_s, generation_s)
+    with _lock:
+        if in_mission and current_mission is not None:
+            current_mission.steps.append(usage)
+        session_totals['input_tokens'] += usage.input_tokens
+        session_totals['cached_tokens'] += usage.cached_tokens or 0
+        session_totals['output_tokens'] += usage.output_tokens
+        session_totals['cost_usd'] += usage.cost_usd
+        session_totals['steps'] += 1
+
+    cached_text = 'n/d' if cached_tokens is None else cached_tokens
+    print(f"[{provider}] Passo {step + 1}: {usage.input_tokens} tokens de entrada ({cached_text} em cache), "
+          f"{usage.output_tokens} de saída, {latency_s:.2f}s, {usage.tokens_per_s:.1f} tok/s, US$ {usage.cost_usd:.5f}")
+    return usage
+
+def record_parse(provider: str, status: str, in_mission: bool = True) -> None:
+    """
+    Registra o resultado do parse de uma resposta.
+    Args:
+        provider (str): Nome do provedor.
+        status (str): 'ok', 'repaired' ou 'failed'.
+        in_mission (bool): False para chamadas abandonadas, que não contam na missão atual.
+    """
+    with _lock:
+        stats = parse_stats.setdefault(provider, {'ok': 0, 'repaired': 0, 'failed': 0})
+        stats[status] += 1
+        if status == 'failed' and in_mission and current_mission is not None:
+            current_mission.parse_failures += 1
+
+def record_provider_event(provider: str, event: str) -> None:
+    """
+    Registra um evento de disponibilidade de um provedor remoto.
+    Args:
+        provider (str): Nome do provedor.
+        event (str): 'timeout', 'error' ou 'fallback'.
+    """
+    with _lock:
+        events = provider_events.setdefault(provider, {'timeout': 0, 'error': 0, 'fallback': 0})
+        events[event] += 1
+        if event == 'fallback' and current_mission is not None:
+            current_mission.fallback_steps += 1
+
+def parse_failure_rate(provider: str | None = None) -> float:
+    """
+    Fração de respostas ilegíveis na sessão.
+    Args:
+        provider (str | None): Provedor específico, ou todos se None.
+    Returns:
+        float: Falhas / respostas (0.0 se não houver respostas).
+    """
+    with _lock:
+        if provider is None:
+            selected = list(parse_stats.values())
+        else:
+            selected = [parse_stats[provider]] if provider in parse_stats else []
+        total = sum(sum(stats.values()) for stats in selected)
+        failed = sum(stats['failed'] for stats in selected)
+    return failed / total if total else 0.0
+
+def usage_from_gemini(response) -> tuple[int | None, int | None, int | None]:
+    """Extrai (entrada, cache, saída) do usage_metadata do Gemini."""
+    meta = getattr(response, 'usage_metadata', None)
+    if meta is None:
+        return None, None, None
+    output = (getattr(meta, 'candidates_token_count', 0) or 0) + (getattr(meta, 'thoughts_token_count', 0) or 0)
+    return meta.prompt_token_count, getattr(meta, 'cached_content_token_count', 0) or 0, output
+
+def usage_from_openai(response) -> tuple[int | None, int | None, int | None]:
+    """Extrai (entrada, cache, saída) do campo usage da OpenAI."""
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return None, None, None
+    details = getattr(usage, 'prompt_tokens_details', None)
+    cached = (getattr(details, 'cached_tokens', 0) or 0) if details else 0
+    return usage.prompt_tokens, cached, usage.completion_tokens
+
+def usage_from_ollama(response) -> tuple[int | None, int | None, int | None, float | None]:
+    """
+    Extrai (entrada avaliada, cache, saída, tempo de geração) da resposta do Ollama.
+    O Ollama não informa tokens em cache: prompt_eval_count conta apenas os tokens avaliados.
+    """
+    eval_duration = response.get('eval_duration')
+    generation_s = eval_duration / 1e9 if eval_duration else None
+    return response.get('prompt_eval_count'), None, response.get('eval_count'), generation_s
+
+def get_running_totals() -> dict:
+    """
+    Retorna os totais correntes para exibição na GUI.
+    Returns:
+        dict: Tokens e custo da missão atual (ou da última) e da sessão.
+    """
+    with _lock:
+        mission = current_mission or (missions[-1] if missions else None)
+        totals = dict(session_totals)
+    totals['mission_tokens'] = mission.total_tokens if mission else 0
+    totals['mission_cost_usd'] = mission.cost_usd if mission else 0.0
+    totals['mission_tokens_per_s'] = mission.tokens_per_s if mission else 0.0
+    return totals
+
+def export_usage(directory: str = EXPORT_DIR) -> tuple[str, str]:
+    """
+    Exporta os passos (CSV) e os resumos das missões (JSON) para análise offline.
+    Args:
+        directory (str): Pasta de destino.
+    Returns:
+        tuple[str, str]: Caminhos do CSV e do JSON gerados.
+    """
+    os.makedirs(directory, exist_ok=True)
+    stamp = time.strftime('%Y%m%d_%H%M%S')
+    csv_path = os.path.join(directory, f'usage_steps_{stamp}.csv')
+    json_path = os.path.join(directory, f'usage_missions_{stamp}.json')
+
+    with _lock:
+        mission_list = list(missions)
+
+    fields = ['mission', 'objective'] + list(StepUsage('', '', 0, 0, 0, 0, 0.0).to_dict())
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for index, mission in enumerate(mission_list):
+            for step in mission.steps:
+                writer.writerow({'mission': index, 'objective': mission.objective, **step.to_dict()})
+
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'session': dict(session_totals),
+            'parse': {provider: dict(stats) for provider, stats in parse_stats.items()},
+            'provider_events': {provider: dict(events) for provider, events in provider_events.items()},
+            'missions': [m.summary() for m in mission_list],
+        }, f, ensure_ascii=False, indent=2)
+
+    return csv_path, json_path
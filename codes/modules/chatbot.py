@@ -1,73 +1,274 @@
-import google.generativeai as genai
-from google.generativeai.types import GenerationConfig
 from PIL import Image, ImageDraw
 import traceback
-import ollama
+import importlib
+import threading
+import time
 import io
 import re
 import base64
+import contextlib
 import json
-from openai import OpenAI
-from openai.types.chat import ChatCompletionMessageParam
+import datetime
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as StepTimeout
+from typing import TYPE_CHECKING, Callable
 
-from modules import utils
+from modules import accounting
+from modules.circuit_breaker import CircuitBreaker
 from modules.tello_control import log_messages
 
+if TYPE_CHECKING:
+    from openai.types.chat import ChatCompletionMessageParam
+
 AI_PROVIDER = 'GEMINI'
 #AI_PROVIDER = 'LOCAL'
 #AI_PROVIDER = 'OPENAI'
 LOCAL_MODEL_NAME = 'minicpm-v:8b'
 GEMINI_MODEL_NAME = 'gemini-2.5-flash'
 OPENAI_MODEL_NAME = 'gpt-4o-mini'
-OPENAI_API_KEY = utils.get_openai_key()
+# Prazo de cada passo por provedor remoto (s); ao estourar, o passo vai para o modelo local
+STEP_DEADLINE_S = {'GEMINI': 12.0, 'OPENAI': 12.0}
+FALLBACK_PROVIDER = 'LOCAL'
+STEP_WORKERS = 4 # Threads para chamadas remotas (uma chamada abandonada ocupa a sua até o timeout do SDK)
 ACCEPTED_ROTATIONS = [10, 15, 30, 45, 90, 135, 180, 360]
-COMMAND_LIST = [
-    'takeoff', 'land', 'up', 'down', 'left', 'right', 'forward', 'back', 'cw', 'ccw'
+ACCEPTED_DISTANCES = list(range(20, 501, 10)) # cm, limites do SDK Tello em múltiplos de 10
+GRID_CELLS = [
+    'top-left', 'top-center', 'top-right',
+    'center-left', 'center', 'center-right',
+    'bottom-left', 'bottom-center', 'bottom-right'
 ]
-SYSTEM_INSTRUCTION_TEXT = f"""
-VOCÊ É UM PILOTO DE DRONE TELLO.
+# Definição única dos comandos: gera COMMAND_LIST, o schema de saída estruturada de cada
+# provedor e as regras de fix_command/validate_command. (tipo do argumento, valor padrão)
+COMMAND_SPEC: dict[str, tuple[str, int | None] | None] = {
+    'takeoff': None,
+    'land': None,
+    'up': ('distance', 50),
+    'down': ('distance', 50),
+    'left': ('distance', 50),
+    'right': ('distance', 50),
+    'forward': ('distance', 50),
+    'back': ('distance', 50),
+    'cw': ('rotation', 90),
+    'ccw': ('rotation', 90),
+    'align': ('cell', None),
+    'approach': ('cell', None),
+    'look': None,
+}
+ARGUMENT_VALUES: dict[str, list] = {'distance': ACCEPTED_DISTANCES, 'rotation': ACCEPTED_ROTATIONS, 'cell': GRID_CELLS}
+COMMAND_LIST = list(COMMAND_SPEC)
+RC_GOAL_COMMANDS = ['align', 'approach'] # Metas executadas pelo controlador local (rc_controller)
+LOOK_AROUND_COMMAND = 'look' # Gira por várias direções e manda todas as vistas em uma única requisição
+# Campos da resposta: (tipo, descrição). 'command' é uma string restrita aos comandos canônicos.
+RESPONSE_FIELDS = {
+    'analise': ('string', "Explicação breve da situação e obstáculos em português."),
+    'plano': ('string', "1. Passo atual, 2. Próximo passo"),
+    'comando': ('command', "Comando canônico ou 'none'."),
+    'continua': ('boolean', "true se a missão não acabou, false se acabou."),
+    'vista': ('integer', "Vista escolhida no mosaico do look-around; 0 nos passos normais."),
+}
+GRID_CELL_ALIASES = {
+    'cima': 'top', 'topo': 'top', 'superior': 'top', 'meio': 'center', 'centro': 'center',
+    'baixo': 'bottom', 'inferior': 'bottom', 'esquerda': 'left', 'direita': 'right',
+    'middle': 'center', 'centre': 'center'
+}
+# Prefixo imutável enviado a todos os provedores. Não inserir valores dinâmicos aqui:
+# qualquer byte diferente invalida o cache de prompt do provedor.
+SYSTEM_INSTRUCTION_TEXT = f"""VOCÊ É UM PILOTO DE DRONE TELLO.
 Comandos válidos: {COMMAND_LIST}
-Argumentos numéricos em cm [20-500] ou graus [1-360].
-Exemplos: 'forward 100', 'cw 90', 'up 50', 'takeoff', 'land'.
+Comandos de voo requerem argumento numérico em cm: forward 20 (para frente 20cm)
+Comandos de rotação em graus: cw 90 (girar sentido horário 90 graus)
+Comandos que não precisam de argumento: [takeoff, land, look]
+Ajuste fino: 'align <célula>' centraliza na imagem o alvo que está na célula do grid; 'approach <célula>' centraliza e se aproxima dele.
+Células: {', '.join(GRID_CELLS)}. Prefira 'align'/'approach' a vários 'cw 10' ou 'forward 20' seguidos.
+Procurando algo que não está à vista: use 'look' em vez de vários 'cw 90'. O drone gira, fotografa cada direção e
+você recebe um mosaico com as vistas numeradas. Nessa resposta, "vista" é o número da vista com o alvo e "comando"
+é o próximo comando a partir dela (o giro até a vista é feito automaticamente). Nos demais passos, "vista": 0.
+Valores dos argumentos devem estar entre: [20, 500], representam a distância em cm (movimentos) ou graus [1-360] (rotações)
+Exemplos: 'forward 100', 'cw 90', 'up 50', 'align center-right', 'takeoff', 'land'.
+Altura de 10cm geralmente significa que o drone está no chão.
+A imagem da câmera tem um grid 3x3 vermelho para referência espacial.
+A cada passo você recebe o STATUS ATUAL (objetivo, passo, altura e última ação) e a imagem atual.
+Se o caminho estiver bloqueado, use "none". Mova-se com segurança (20-100cm por passo).
+Avalie se é necessário continuar a missão, se não for necessário: "continua": false
 
 SAÍDA OBRIGATÓRIA EM JSON:
 {{
-    "analise": "Breve descrição visual e do status em português.",
-    "plano": "O que fará a seguir.",
-    "comando": "comando valor" (ou "none"),
-    "continua": boolean (true se a missão não acabou)
+    "analise": "Explicação breve da situação e obstáculos em português.",
+    "plano": "1. Passo atual, 2. Próximo passo",
+    "comando": "comando valor" (ex: "forward 100", "approach top-center" ou "none"),
+    "continua": boolean (true se a missão não acabou, false se acabou),
+    "vista": inteiro (vista escolhida no mosaico do look-around, senão 0)
 }}
 """
-openai_history: list[ChatCompletionMessageParam] = []
-
-utils.configure_generative_ai()
-config = GenerationConfig(
-    temperature=0.7,
-    top_p=0.95,
-    top_k=40,
-    max_output_tokens=2048, # Limita o tamanho da resposta para não gastar tempo/tokens
-    response_mime_type="application/json"
-)
-
-# Passa a config na inicialização do modelo
-model_gemini = genai.GenerativeModel( # type: ignore
-    model_name=GEMINI_MODEL_NAME,
-    generation_config=config,
-)
-
+OLLAMA_KEEP_ALIVE = '30m' # Mantém o modelo e o cache KV do prefixo carregados entre passos
+OPENAI_PROMPT_CACHE_KEY = 'tello-pilot-v1' # Agrupa as requisições no mesmo cache de prefixo
+GEMINI_CONTEXT_CACHE_TTL_MIN = 60 # Validade do cache explícito do Gemini (min)
+openai_history: list["ChatCompletionMessageParam"] = []
+
+# SDKs e clientes são carregados sob demanda pelo plugin do provedor ativo
+genai = None
+ollama = None
+model_gemini = None
 client_openai = None
-if AI_PROVIDER == 'OPENAI':
-    if not OPENAI_API_KEY:
-        print("ERRO: OPENAI_API_KEY não encontrada no utils")
-    else:
-        try:
-            client_openai = OpenAI(api_key=OPENAI_API_KEY)
-        except Exception as e:
-            print(f"Erro ao configurar OpenAI: {e}")
 
 # Variável global para armazenar o objeto da sessão de chat
 chat_session_gemini = None
 
+_step_pool = ThreadPoolExecutor(max_workers=STEP_WORKERS, thread_name_prefix='AIStep')
+
+request_sent_at = 0.0 # time.time() da última requisição enviada a um provedor (medição de latência)
+# Geração da conversa: incrementada sempre que o estado de conversa é descartado (aborto da missão
+# ou prazo estourado). Chamadas de gerações anteriores foram abandonadas e não gravam estado compartilhado.
+conversation_generation = 0
+_generation_lock = threading.Lock()
+_call_context = threading.local()
+
+class ProviderError(Exception):
+    """Falha do provedor remoto (rede, SDK ou cliente não configurado) que conta para o disjuntor."""
+
+class ProviderPlugin:
+    """
+    Provedor de IA registrado no chatbot.
+    O SDK só é importado e inicializado no primeiro uso (load), e não na importação do módulo.
+    Args:
+        name (str): Nome do provedor (GEMINI, OPENAI, LOCAL).
+        model_name (str): Nome do modelo usado pelo provedor.
+        loader (Callable[[], None]): Importa o SDK e cria o cliente.
+        runner (Callable): Executa um passo de IA (mesma assinatura de run_ai).
+        reset (Callable[[], None] | None): Limpa o estado de conversa ao trocar de provedor.
+        deadline_s (float | None): Prazo de cada passo. Provedores com prazo ganham um disjuntor e
+            recorrem ao FALLBACK_PROVIDER quando falham.
+    """
+    def __init__(self, name: str, model_name: str, loader: Callable[[], None], runner: Callable, reset: Callable[[], None] | None = None,
+                 deadline_s: float | None = None) -> None:
+        self.name = name
+        self.model_name = model_name
+        self.loader = loader
+        self.runner = runner
+        self.reset = reset
+        self.deadline_s = deadline_s
+        self.breaker = CircuitBreaker(name) if deadline_s is not None else None
+        self.loaded = False
+        self.load_time = 0.0 # Tempo gasto na inicialização (s)
+        self.lock = threading.Lock()
+
+    def ensure_loaded(self) -> None:
+        """Carrega o SDK do provedor na primeira chamada."""
+        if self.loaded:
+            return
+        with self.lock:
+            if not self.loaded:
+                start = time.perf_counter()
+                self.loader()
+                self.load_time = time.perf_counter() - start
+                self.loaded = True
+                print(f"Provedor {self.name} carregado em {self.load_time:.2f}s.")
+
+PROVIDERS: dict[str, ProviderPlugin] = {}
+
+def register_provider(plugin: ProviderPlugin) -> None:
+    """
+    Registra um provedor de IA.
+    Args:
+        plugin (ProviderPlugin): Plugin a ser registrado.
+    """
+    PROVIDERS[plugin.name] = plugin
+
+def get_provider(name: str | None = None) -> ProviderPlugin:
+    """
+    Retorna o plugin do provedor, carregando o SDK se necessário.
+    Args:
+        name (str | None): Nome do provedor. Usa AI_PROVIDER se None.
+    Returns:
+        ProviderPlugin: Plugin pronto para uso.
+    """
+    plugin = PROVIDERS[name or AI_PROVIDER]
+    plugin.ensure_loaded()
+    return plugin
+
+def set_provider(name: str) -> None:
+    """
+    Troca o provedor ativo em tempo de execução. O SDK é carregado no primeiro passo de IA.
+    Args:
+        name (str): Nome do provedor registrado.
+    """
+    global AI_PROVIDER
+    if name not in PROVIDERS:
+        raise ValueError(f"Provedor desconhecido: {name}")
+    if name == AI_PROVIDER:
+        return
+    previous = PROVIDERS.get(AI_PROVIDER)
+    if previous and previous.reset:
+        previous.reset()
+    AI_PROVIDER = name
+    print(f"Provedor de IA alterado para {name}.")
+
+def _get_utils():
+    """Importa o módulo de chaves do usuário apenas quando um provedor online é carregado."""
+    return importlib.import_module('modules.utils')
+
+def _load_gemini() -> None:
+    """Importa o SDK do Gemini, configura a chave e cria o modelo."""
+    global genai, model_gemini
+    import google.generativeai as genai_module
+    from google.generativeai.types import GenerationConfig
+
+    genai = genai_module
+    _get_utils().configure_generative_ai()
+    config = GenerationConfig(
+        temperature=0.7,
+        top_p=0.95,
+        top_k=40,
+        max_output_tokens=2048, # Limita o tamanho da resposta para não gastar tempo/tokens
+        response_mime_type="application/json",
+        response_schema=build_response_schema('gemini')
+    )
+
+    # Tenta o cache de contexto explícito com o prefixo estático; o Gemini exige um tamanho
+    # mínimo de prompt para isso. Se não for possível, o system_instruction estável ainda
+    # aproveita o cache implícito do provedor.
+    try:
+        from google.generativeai import caching
+        cache = caching.CachedContent.create(
+            model=GEMINI_MODEL_NAME,
+            display_name='tello-pilot-prefix',
+            system_instruction=SYSTEM_INSTRUCTION_TEXT,
+            ttl=datetime.timedelta(minutes=GEMINI_CONTEXT_CACHE_TTL_MIN),
+        )
+        model_gemini = genai.GenerativeModel.from_cached_content(cached_content=cache, generation_config=config) # type: ignore
+        print("Cache de contexto do Gemini criado.")
+    except Exception as e:
+        print(f"Cache explícito do Gemini indisponível, usando cache implícito: {e}")
+        model_gemini = genai.GenerativeModel( # type: ignore
+            model_name=GEMINI_MODEL_NAME,
+            generation_config=config,
+            system_instruction=SYSTEM_INSTRUCTION_TEXT,
+        )
+
+def _load_openai() -> None:
+    """Importa o SDK da OpenAI e cria o cliente."""
+    global client_openai
+    from openai import OpenAI
+
+    api_key = _get_utils().get_openai_key()
+    if not api_key:
+        print("ERRO: OPENAI_API_KEY não encontrada no utils")
+        return
+    try:
+        client_openai = OpenAI(api_key=api_key)
+    except Exception as e:
+        print(f"Erro ao configurar OpenAI: {e}")
+
+def _load_local() -> None:
+    """Importa o cliente do Ollama."""
+    global ollama
+    import ollama as ollama_module
+    ollama = ollama_module
+
+def reset_gemini_session() -> None:
+    """Descarta a sessão de chat do Gemini."""
+    global chat_session_gemini
+    chat_session_gemini = None
+
 def get_chat_session():
     """
     Inicializa e retorna a sessão de chat.
@@ -77,7 +278,7 @@ def get_chat_session():
     """
     global chat_session_gemini
     if chat_session_gemini is None:
-        chat_session_gemini = model_gemini.start_chat(history=[])
+        chat_session_gemini = model_gemini.start_chat(history=[]) # type: ignore
         print('Sessão de chat iniciada.')
     return chat_session_gemini
 
@@ -91,72 +292,70 @@ def reset_openai_history():
         }
     ]
 
+def discard_conversation(plugin: ProviderPlugin | None = None) -> None:
+    """
+    Descarta o estado de conversa (de um provedor ou de todos) e invalida as chamadas em andamento.
+    Uma chamada abandonada segue na sua thread até o SDK responder, mas ao terminar não grava
+    histórico, sessão, instante de envio nem uso na missão atual.
+    Args:
+        plugin (ProviderPlugin | None): Provedor cujo estado é descartado; None descarta todos.
+    """
+    global conversation_generation
+    with _generation_lock:
+        conversation_generation += 1
+    for provider in ([plugin] if plugin else PROVIDERS.values()):
+        if provider.reset:
+            provider.reset()
+
+def is_current_call() -> bool:
+    """False se a chamada desta thread pertence a uma geração descartada (chamada abandonada)."""
+    generation = getattr(_call_context, 'generation', None)
+    return generation is None or generation == conversation_generation
+
+@contextlib.contextmanager
+def _in_generation(generation: int):
+    """Associa as chamadas desta thread à geração da conversa em que foram iniciadas."""
+    previous = getattr(_call_context, 'generation', None)
+    _call_context.generation = generation
+    try:
+        yield
+    finally:
+        _call_context.generation = previous
+
+def _run_in_generation(generation: int, runner: Callable, *args):
+    """Executa o runner de um provedor em outra thread, mantendo a geração de quem o chamou."""
+    with _in_generation(generation):
+        return runner(*args)
+
+def _check_current(provider: str) -> None:
+    """Impede que uma chamada abandonada antes de começar recrie a sessão ou o histórico."""
+    if not is_current_call():
+        raise ProviderError(f"{provider}: chamada descartada")
+
 def get_model_name():
     """
     Retorna o nome do modelo de IA atualmente em uso.
     Returns:
         str: Nome do modelo.
     """
-    if AI_PROVIDER == 'LOCAL':
-        return LOCAL_MODEL_NAME
-    elif AI_PROVIDER == 'OPENAI':
-        return OPENAI_MODEL_NAME
-    else:
-        return GEMINI_MODEL_NAME
+    return PROVIDERS[AI_PROVIDER].model_name
 
 def get_ai_instruction(objective: str, history: str, height: int, step: int, max_steps: int) -> str:
     """
-    Gera o prompt para a IA com base no contexto atual.
+    Gera o delta do prompt para o Gemini, que também recebe o histórico recente de comandos.
+    As regras ficam no prefixo estático (SYSTEM_INSTRUCTION_TEXT).
     Args:
         objective (str): Objetivo da missão.
         history (str): Histórico de comandos.
         height (int): Altura atual do drone em cm.
         step (int): Passo atual na sequência de comandos.
+        max_steps (int): Número máximo de passos permitidos.
     Returns:
         str: Instrução formatada para a IA.
     """
-    if step == 0:
-        return f"""
-            ATUAR COMO PILOTO DE DRONE TELLO (Simulação Lógica).
-            Objetivo: {objective}
-            Histórico: {history}
-            Comandos válidos: {COMMAND_LIST}
-            Altura do drone: {height} (10cm geralmente significa que está no chão)
-
-            Comandos de voo requerem argumento numérico em cm: forward 20 (para frente 20cm)
-            Comandos de rotação em graus: cw 90 (girar sentido horário 90 graus)
-            Comandos que não precisam de argumento: [takeoff, land]
-            Valores dos argumentos devem estar entre: [20, 500], representam a distância em cm (movimentos) ou graus [1-360] (rotações)
-            Avalie se é necessário continuar a missão, se não for necessário: "continua": false
-
-            SAÍDA OBRIGATÓRIA EM JSON:
-            {{
-                "analise": "Explicação breve da situação e obstáculos em português.",
-                "plano": "1. Passo atual, 2. Próximo passo",
-                "comando": "comando valor" (ex: "forward 100" ou "none"),
-                "continua": boolean (true se a missão não acabou, false se acabou)
-            }}
-            """
-    else:
-        return f"""
-            CONTINUAÇÃO DA MISSÃO.
-            Objetivo: {objective}
-            Histórico: {history}
-            Altura: {height} cm
-            Passo: {step}/{max_steps}
-
-            Comandos válidos: {COMMAND_LIST}
-
-            SAÍDA OBRIGATÓRIA EM JSON:
-            {{
-                "analise": "Explicação breve da situação e obstáculos em português.",
-                "plano": "2 próximos passos",
-                "comando": "comando valor" (ex: "forward 100" ou "none"),
-                "continua": boolean (true se a missão não acabou, false se acabou)
-            }}
-            """
-    
-def get_step_prompt(objective: str, last_action: str, height: int, step: int, max_steps: int) -> str:
+    return get_step_prompt(objective, history, height, step, max_steps, label="Histórico")
+
+def get_step_prompt(objective: str, last_action: str, height: int, step: int, max_steps: int, label: str = "Última Ação Executada") -> str:
     """
     Gera apenas o delta do prompt para o passo atual.
     Args:
@@ -165,19 +364,65 @@ def get_step_prompt(objective: str, last_action: str, height: int, step: int, ma
         height (int): Altura atual do drone em cm.
         step (int): Passo atual na sequência de comandos.
         max_steps (int): Número máximo de passos permitidos.
+        label (str): Rótulo do campo de contexto (última ação ou histórico).
     Returns:
         str: Prompt formatado para o passo atual.
     """
-    return f"""
-    STATUS ATUAL:
-    - Objetivo Global: "{objective}"
-    - Passo: {step + 1}/{max_steps}
-    - Altura: {height} cm
-    - Última Ação Executada: "{last_action}"
-    
-    Analise a imagem atual e determine o próximo comando.
-    Siga a formatação JSON obrigatória.
+    return (
+        "STATUS ATUAL:\n"
+        f"- Objetivo Global: \"{objective}\"\n"
+        f"- Passo: {step + 1}/{max_steps}\n"
+        f"- Altura: {height} cm\n"
+        f"- {label}: \"{last_action}\"\n"
+        "Analise a imagem atual e responda no JSON obrigatório."
+    )
+
+def command_values() -> list[str]:
+    """
+    Lista todos os comandos canônicos aceitos (incluindo 'none'), gerada a partir de COMMAND_SPEC.
+    Returns:
+        list[str]: Comandos na forma produzida por fix_command.
     """
+    values = ['none']
+    for cmd, spec in COMMAND_SPEC.items():
+        if spec is None:
+            values.append(cmd)
+        else:
+            values.extend(f"{cmd} {value}" for value in ARGUMENT_VALUES[spec[0]])
+    return values
+
+COMMAND_VALUES = command_values()
+_COMMAND_VALUE_SET = frozenset(COMMAND_VALUES)
+
+def build_response_schema(dialect: str) -> dict:
+    """
+    Gera o schema da resposta a partir de RESPONSE_FIELDS e COMMAND_SPEC, no dialeto de cada provedor.
+    Args:
+        dialect (str): 'openai' (JSON Schema estrito), 'gemini' (Schema OpenAPI do SDK) ou 'ollama' (JSON Schema).
+    Returns:
+        dict: Schema do objeto de resposta.
+    """
+    gemini = dialect == 'gemini'
+    properties = {}
+    for name, (kind, description) in RESPONSE_FIELDS.items():
+        if kind == 'command':
+            prop = {'type': 'string', 'enum': COMMAND_VALUES}
+            if gemini:
+                prop['format'] = 'enum' # O Gemini só aplica enum em strings com este formato
+        else:
+            prop = {'type': kind}
+        prop['description'] = description
+        properties[name] = prop
+
+    schema = {'type': 'object', 'properties': properties, 'required': list(RESPONSE_FIELDS)}
+    if gemini:
+        # O SDK do Gemini usa os nomes de tipo em maiúsculas e não aceita additionalProperties
+        schema['type'] = 'OBJECT'
+        for prop in properties.values():
+            prop['type'] = prop['type'].upper()
+    else:
+        schema['additionalProperties'] = False # Exigido pelo modo estrito da OpenAI
+    return schema
 
 def _snap_to_closest(value: int, allowed_values: list[int]) -> int:
     """
@@ -220,7 +465,7 @@ def extract_command(text: str) -> str | None:
 
 def fix_command(raw_command: str) -> str | None:
     """
-    Ajusta o comando recebido para o formato técnico esperado.
+    Ajusta o comando recebido para o formato técnico esperado, seguindo COMMAND_SPEC.
     Args:
         raw_command (str): Comando bruto recebido da IA.
     Returns:
@@ -236,43 +481,52 @@ def fix_command(raw_command: str) -> str | None:
         
     parts = clean_text.split()
     cmd = parts[0]
+    if cmd not in COMMAND_SPEC:
+        return None
 
     # Comandos de sistema (sem valor)
-    if cmd in ['takeoff', 'land']:
+    spec = COMMAND_SPEC[cmd]
+    if spec is None:
         return cmd
 
-    # Tratamento de valor
-    val = 0
-    
-    # Comandos que requerem valor
-    # Caso 1: Comando veio sem número -> Aplica padrão
-    if len(parts) == 1:
-        if cmd in ['cw', 'ccw']:
-            val = 90
-        elif cmd in ['up', 'down', 'left', 'right', 'forward', 'back']:
-            val = 50
-    
-    # Caso 2: Comando com número -> Aplica Snapping
-    elif len(parts) >= 2:
-        val_str = ''.join(filter(str.isdigit, parts[1])) # Extrai apenas dígitos
-        if not val_str:
-            val = 90 if cmd in ['cw', 'ccw'] else 50 # Se falhar em achar número, usa padrão
-        else:
-            val = int(val_str)
+    kind, default = spec
+
+    # Metas do controlador local: o argumento é uma célula do grid
+    if kind == 'cell':
+        cell = normalize_grid_cell(' '.join(parts[1:]))
+        return f"{cmd} {cell}" if cell else None
 
-    final_val = val
+    # Comando sem número (ou sem dígitos no argumento) -> Aplica padrão
+    val_str = ''.join(filter(str.isdigit, parts[1])) if len(parts) >= 2 else ''
+    val = int(val_str) if val_str else default
 
-    # Rotações: Arredonda para valores aceitos
-    if cmd in ['cw', 'ccw']:
-        val = max(1, min(val, 360)) # Garante limites absolutos antes de arredondar
-        final_val = _snap_to_closest(val, ACCEPTED_ROTATIONS)
+    # Rotações: Garante limites absolutos antes de arredondar
+    if kind == 'rotation':
+        val = max(1, min(val, 360)) # type: ignore
 
-    # Movimentos: Arredonda para múltiplos de 10
-    elif cmd in ['up', 'down', 'left', 'right', 'forward', 'back']:
-        final_val = int(round(val / 10.0) * 10) # Arredonda para a dezena mais próxima
-        final_val = max(20, min(final_val, 500)) # Garante limites do SDK Tello (20-500)
+    # Arredonda para o valor aceito mais próximo (ângulos aceitos ou múltiplos de 10 entre 20 e 500)
+    return f"{cmd} {_snap_to_closest(val, ARGUMENT_VALUES[kind])}" # type: ignore
 
-    return f"{cmd} {final_val}"
+def normalize_grid_cell(text: str) -> str | None:
+    """
+    Converte o nome de uma célula do grid 3x3 para a forma canônica (ex.: 'centro direita' -> 'center-right').
+    Args:
+        text (str): Nome da célula, em inglês ou português.
+    Returns:
+        str | None: Célula canônica ou None se não reconhecida.
+    """
+    words = [GRID_CELL_ALIASES.get(w, w) for w in re.findall(r'[a-z]+', text.lower())]
+    if not words:
+        return None
+    row = next((w for w in words if w in ('top', 'center', 'bottom')), 'center')
+    col = next((w for w in words if w in ('left', 'right')), None)
+    if col is None:
+        col = 'center'
+        if words.count('center') == 0 and row == 'center':
+            return None # Nenhuma palavra de posição reconhecida
+    if row == 'center' and col == 'center':
+        return 'center'
+    return f"{row}-{col}"
 
 def pil_image_to_bytes(image: Image.Image) -> bytes:
     """Converte PIL Image para bytes, redimensionando para performance local."""
@@ -297,13 +551,60 @@ def pil_image_to_base64(image: Image.Image) -> str:
     img_bytes = pil_image_to_bytes(image)
     return base64.b64encode(img_bytes).decode('utf-8')
 
-def parse_json_response(text_response: str) -> dict:
+class PreparedFrame:
+    """
+    Frame já preparado para a IA fora do processo principal (modo de memória compartilhada):
+    JPEG com a grade desenhada e a assinatura usada pela biblioteca de rotas.
+    Args:
+        jpeg (bytes): Imagem com a grade, codificada como em pil_image_to_bytes.
+        signature (str): Assinatura dHash do frame (route_library.frame_signature).
+        size (tuple[int, int]): Tamanho original do frame.
+        prep_ms (float): Tempo de preparo no processo de trabalho.
+    """
+    def __init__(self, jpeg: bytes, signature: str, size: tuple[int, int], prep_ms: float = 0.0) -> None:
+        self.jpeg = jpeg
+        self.signature = signature
+        self.size = size
+        self.prep_ms = prep_ms
+
+def frame_jpeg(frame: Image.Image | PreparedFrame) -> bytes:
+    """
+    Retorna o JPEG com a grade de um frame, reaproveitando o preparo feito pelo processo de trabalho.
+    Args:
+        frame (Image.Image | PreparedFrame): Frame da câmera.
+    Returns:
+        bytes: Imagem codificada.
+    """
+    if isinstance(frame, PreparedFrame):
+        return frame.jpeg
+    return pil_image_to_bytes(add_grid_to_image(frame))
+
+def _conforms_to_schema(data: dict) -> bool:
+    """Confere se a resposta segue exatamente o schema gerado de RESPONSE_FIELDS."""
+    if not isinstance(data, dict) or set(data) != set(RESPONSE_FIELDS):
+        return False
+    for name, (kind, _) in RESPONSE_FIELDS.items():
+        value = data[name]
+        if kind == 'boolean' and not isinstance(value, bool):
+            return False
+        if kind == 'string' and not isinstance(value, str):
+            return False
+        if kind == 'integer' and (not isinstance(value, int) or isinstance(value, bool)):
+            return False
+        if kind == 'command' and value not in _COMMAND_VALUE_SET:
+            return False
+    return True
+
+def parse_json_response(text_response: str, provider: str = 'DESCONHECIDO') -> dict:
     """
     Função unificada para parsear respostas JSON de qualquer provedor de IA.
+    Com saída estruturada a resposta já segue o schema; a limpeza de markdown e o fix_command
+    ficam como reparo para modelos que ignoram o schema. O resultado é contabilizado por provedor.
     Args:
         text_response (str): Resposta em texto da IA.
+        provider (str): Provedor que gerou a resposta.
     Returns:
-        dict: Dicionário com os campos esperados.
+        dict: Dicionário com os campos esperados (sem comando e com continua=True se a resposta não pôde ser lida).
     """
     try:
         text_response = text_response.strip()
@@ -316,30 +617,36 @@ def parse_json_response(text_response: str) -> dict:
         
         # Tenta carregar o JSON
         data = json.loads(text_response)
-        
+        if not isinstance(data, dict):
+            raise ValueError(f"JSON não é um objeto: {type(data).__name__}")
+
+        accounting.record_parse(provider, 'ok' if _conforms_to_schema(data) else 'repaired', is_current_call())
+        try:
+            view = max(int(data.get("vista") or 0), 0)
+        except (TypeError, ValueError):
+            view = 0
         return {
             "analise": data.get("analise", "Sem análise."),
             "plano": data.get("plano", ""),
             "comando": fix_command(data.get("comando")),
-            "continua": data.get("continua", False)
+            "continua": bool(data.get("continua", False)),
+            "vista": view
         }
-    except json.JSONDecodeError as e:
+    except (json.JSONDecodeError, ValueError) as e:
         print(f"ERRO JSON: {e}")
         print(f"Texto recebido (Raw): {text_response}")
-        
-        # Retorno de segurança para não travar a UI
-        return {
-            "analise": "Erro na comunicação (JSON Inválido). Tentando estabilizar.",
-            "comando": "none",
-            "continua": False
-        }
     except Exception as e:
         print(f"Erro genérico no parse: {e}")
-        return {
-            "analise": f"Erro: {str(e)}",
-            "comando": None,
-            "continua": False
-        }
+
+    # Retorno de segurança: o passo é gasto sem comando e a missão segue com um frame novo, em vez de encerrar em silêncio
+    accounting.record_parse(provider, 'failed', is_current_call())
+    return {
+        "analise": "Erro na comunicação (JSON Inválido). Tentando de novo no próximo passo.",
+        "plano": "",
+        "comando": None,
+        "continua": True,
+        "vista": 0
+    }
 
 def add_grid_to_image(image: Image.Image) -> Image.Image:
     """
@@ -363,48 +670,40 @@ def add_grid_to_image(image: Image.Image) -> Image.Image:
     
     return img
 
-def run_ai_local(text: str | None, frame: Image.Image) -> tuple[str, str | None, bool]:
+def mark_request_sent() -> None:
+    """Registra o instante em que a requisição do passo sai para o provedor (só na chamada corrente)."""
+    global request_sent_at
+    if is_current_call():
+        request_sent_at = time.time()
+
+def run_ai_local(text: str | None, frame: Image.Image | PreparedFrame, step: int=0, height: int=0, last_action: str="Nenhuma.", max_steps: int=1) -> tuple[str, str | None, bool, int]:
     """
     Executa a IA localmente com Ollama retornando JSON.
     Args:
         text (str | None): Descrição do que o drone deve fazer.
-        frame (Image.Image): Frame da câmera do drone.
+        frame (Image.Image | PreparedFrame): Frame da câmera do drone.
+        step (int): Passo atual na sequência de comandos.
+        height (int): Altura atual do drone em cm.
+        last_action (str): Último comando executado pelo drone.
+        max_steps (int): Número máximo de passos permitidos.
     Returns:
-        tuple: (resposta formatada, comando técnico)
+        tuple: (resposta formatada, comando técnico, continuar rota, vista do look-around)
     """
     try:
+        _check_current('Local')
         user_objective = text if text else 'Analise a cena e aguarde instruções.'
+        user_prompt = get_step_prompt(user_objective, last_action, height, step, max_steps)
 
-        system_rules = f"""You are a TELLO DRONE PILOT. 
-        COMMANDS: {COMMAND_LIST}.
-        FORMAT: direction [value] (e.g., 'forward 50', 'cw 90').
-        JSON OUTPUT ONLY:
-        {{
-            "analise": "string (descrição em português)",
-            "plano": "string (intenção em português)",
-            "comando": "string (technical command)",
-            "continua": false
-        }}
-        """
-
-        user_prompt = f"""USER COMMAND: "{user_objective}"
-        
-        INSTRUCTION: Look at the image and execute the USER COMMAND.
-        - If blocked: "none".
-        - If rotation is needed: use 'cw' or 'ccw'.
-        - Move safely (20-100cm per step).
-
-        Remember: Respond ONLY with the JSON object."""
+        img_bytes = frame_jpeg(frame)
 
-        frame_grid = add_grid_to_image(frame)
-        img_bytes = pil_image_to_bytes(frame_grid)
-
-        response = ollama.chat(
+        mark_request_sent()
+        start = time.perf_counter()
+        response = ollama.chat( # type: ignore
             model=LOCAL_MODEL_NAME,
             messages=[
                 {
                     'role': 'system',
-                    'content': system_rules
+                    'content': SYSTEM_INSTRUCTION_TEXT
                 },
                 {
                     'role': 'user',
@@ -417,41 +716,57 @@ def run_ai_local(text: str | None, frame: Image.Image) -> tuple[str, str | None,
                 'num_predict': 256, # Limita para evitar alucinações longas
                 'top_p': 0.9,
                 'seed': 42
-            }
+            },
+            keep_alive=OLLAMA_KEEP_ALIVE,
+            format=build_response_schema('ollama')
         )
-        
+
+        # O Ollama reaproveita o cache KV do prefixo e só avalia os tokens novos
+        input_tokens, cached_tokens, output_tokens, generation_s = accounting.usage_from_ollama(response)
+        accounting.record_step('LOCAL', LOCAL_MODEL_NAME, step, input_tokens, cached_tokens, output_tokens,
+                               time.perf_counter() - start, generation_s, in_mission=is_current_call())
         full_response_text = response['message']['content']
-        data = parse_json_response(full_response_text)
+        data = parse_json_response(full_response_text, 'LOCAL')
 
         chat_display_text = f"Análise: {data['analise']}\nPlano: {data['plano']}\nComando: {data['comando']}"
-        return chat_display_text, data['comando'], False
+        return chat_display_text, data['comando'], data['continua'], data['vista'] # Só é usado em missões de vários passos na contingência
 
     except Exception as e:
         error_details = traceback.format_exc()
         print(f"DEBUG: Erro em run_ai_local: {str(e)}\n{error_details}")
-        return f"Erro Local: {str(e)}", None, False
+        return f"Erro Local: {str(e)}", None, False, 0
 
-def run_ai_gemini(text: str | None, frame: Image.Image, step: int=0, height: int=0, max_steps: int=7) -> tuple[str, str | None, bool]:
+def run_ai_gemini(text: str | None, frame: Image.Image | PreparedFrame, step: int=0, height: int=0, max_steps: int=7) -> tuple[str, str | None, bool, int]:
     """
     Executa a IA para gerar comandos de controle do drone via Gemini.
     Args:
         text (str | None): Descrição do que o drone deve fazer.
-        frame (Image.Image): Frame da câmera do drone.
+        frame (Image.Image | PreparedFrame): Frame da câmera do drone.
         step (int): Passo atual na sequência de comandos.
         height (int): Altura atual do drone em cm.
         max_steps (int): Número máximo de passos permitidos.
     Returns:
-        tuple: (resposta natural, comando técnico, continuar rota)
+        tuple: (resposta natural, comando técnico, continuar rota, vista do look-around)
     """
     try:
+        _check_current('Gemini')
+        if step == 0:
+            reset_gemini_session() # Cada missão começa logo após o prefixo em cache
         current_chat = get_chat_session()
         user_text = text if text else 'Analise a cena.'
         formatted_log = ", ".join(log_messages[-5:]) if log_messages else 'Nenhum.'
 
-        system_prompt = get_ai_instruction(user_text, formatted_log, height, step, max_steps)
-        frame_grid = add_grid_to_image(frame)
+        step_prompt = get_ai_instruction(user_text, formatted_log, height, step, max_steps)
+        if isinstance(frame, PreparedFrame):
+            image_part = {'mime_type': 'image/jpeg', 'data': frame.jpeg}
+        else:
+            image_part = add_grid_to_image(frame)
 
-        response = current_chat.send_message([system_prompt, frame_grid])
+        mark_request_sent()
+        start = time.perf_counter()
+        response = current_chat.send_message([step_prompt, image_part], request_options={'timeout': step_deadline('GEMINI')})
+        accounting.record_step('GEMINI', GEMINI_MODEL_NAME, step, *accounting.usage_from_gemini(response), time.perf_counter() - start,
+                               in_mission=is_current_call())
 
         if not response.parts:
             print("\n--- DEBUG GEMINI BLOQUEADO ---")
@@ -461,33 +776,35 @@ def run_ai_gemini(text: str | None, frame: Image.Image, step: int=0, height: int
                 print(f"Finish Reason: {response.candidates[0].finish_reason}")
                 print(f"Safety Ratings: {response.candidates[0].safety_ratings}")
             print("------------------------------\n")
-            return "Erro: Bloqueio de Segurança Rígido.", None, False
+            return "Erro: Bloqueio de Segurança Rígido.", None, False, 0
         
         # Processa o JSON
-        data = parse_json_response(response.text)
+        data = parse_json_response(response.text, 'GEMINI')
         
         # Retorna formatado como a interface espera: (Texto para o chat, Comando Técnico, Bool Continua)
         chat_display_text = f"Análise: {data['analise']}\nPlano: {data['plano']}\nComando: {data['comando']}\nContinuar: {data['continua']}"
-        return chat_display_text, data['comando'], data['continua']
+        return chat_display_text, data['comando'], data['continua'], data['vista']
 
     except Exception as e:
-        return f"Erro crítico: {str(e)}", None, False
+        raise ProviderError(f"Gemini: {e}") from e
     
-def run_ai_openai(text: str | None, frame: Image.Image, step: int=0, height: int=0, last_action: str="Nenhuma", max_steps: int=7) -> tuple[str, str | None, bool]:
+def run_ai_openai(text: str | None, frame: Image.Image | PreparedFrame, step: int=0, height: int=0, last_action: str="Nenhuma", max_steps: int=7) -> tuple[str, str | None, bool, int]:
     global openai_history
-    if not client_openai: return "Erro OpenAI Client.", None, False
+    if not client_openai:
+        raise ProviderError("Cliente OpenAI não configurado.")
 
     try:
+        _check_current('OpenAI')
         if step == 0:
             reset_openai_history()
+        history = openai_history # Se a chamada for abandonada, o descarte troca a lista global e esta fica órfã
         if not text:
             text = "Analise a cena."
         prompt = get_step_prompt(text, last_action, height, step, max_steps)
 
-        frame_grid = add_grid_to_image(frame)
-        base64_img = pil_image_to_base64(frame_grid)
+        base64_img = base64.b64encode(frame_jpeg(frame)).decode('utf-8')
 
-        current_user_msg: ChatCompletionMessageParam = {
+        current_user_msg: "ChatCompletionMessageParam" = {
             "role": "user",
             "content": [
                 {"type": "text", "text": prompt},
@@ -500,52 +817,149 @@ def run_ai_openai(text: str | None, frame: Image.Image, step: int=0, height: int
                 }
             ]
         }
-        openai_history.append(current_user_msg)
+        history.append(current_user_msg)
 
+        mark_request_sent()
+        start = time.perf_counter()
         response = client_openai.chat.completions.create(
             model=OPENAI_MODEL_NAME,
-            messages=openai_history,
-            response_format={ "type": "json_object" },
+            messages=history,
+            response_format={
+                "type": "json_schema",
+                "json_schema": {"name": "tello_step", "strict": True, "schema": build_response_schema('openai')}
+            },
             max_tokens=300,
             temperature=0.7,
+            prompt_cache_key=OPENAI_PROMPT_CACHE_KEY,
+            timeout=step_deadline('OPENAI'),
         )
 
+        accounting.record_step('OPENAI', OPENAI_MODEL_NAME, step, *accounting.usage_from_openai(response), time.perf_counter() - start,
+                               in_mission=is_current_call())
+
         full_text = response.choices[0].message.content
         if not full_text:
-            return "Erro OpenAI: Resposta vazia.", None, False
-        data = parse_json_response(full_text)
+            return "Erro OpenAI: Resposta vazia.", None, False, 0
+        data = parse_json_response(full_text, 'OPENAI')
 
-        openai_history.append({"role": "assistant", "content": full_text})
-        
-        last_user_index = len(openai_history) - 2
-        if openai_history[last_user_index]['role'] == 'user':
-            openai_history[last_user_index]['content'] = f"[Passo {step}] Prompt: {prompt} | Imagem processada."
+        if is_current_call(): # Resposta tardia de uma chamada abandonada não entra no histórico
+            history.append({"role": "assistant", "content": full_text})
+            last_user_index = len(history) - 2
+            if history[last_user_index]['role'] == 'user':
+                history[last_user_index]['content'] = f"[Passo {step}] Prompt: {prompt} | Imagem processada."
 
         chat_text = f"Análise: {data['analise']}\nPlano: {data['plano']}\nComando: {data['comando']}\nContinuar: {data['continua']}"
-        return chat_text, data['comando'], data['continua']
+        return chat_text, data['comando'], data['continua'], data['vista']
 
     except Exception as e:
-        print(f"Erro OpenAI: {e}")
-        return f"Erro OpenAI: {str(e)}", None, False
+        raise ProviderError(f"OpenAI: {e}") from e
+
+def step_deadline(name: str) -> float | None:
+    """
+    Prazo do passo atual para o provedor, limitado pelo tempo restante do orçamento da missão.
+    Args:
+        name (str): Nome do provedor.
+    Returns:
+        float | None: Prazo em segundos, ou None se o provedor não tem prazo.
+    """
+    deadline = PROVIDERS[name].deadline_s
+    mission = accounting.current_mission
+    remaining = mission.remaining_time() if mission else None
+    if deadline is None or remaining is None:
+        return deadline
+    return max(1.0, min(deadline, remaining))
+
+def get_breaker_status() -> dict[str, dict]:
+    """
+    Estado dos disjuntores dos provedores remotos.
+    Returns:
+        dict: Provedor -> snapshot do disjuntor.
+    """
+    return {name: plugin.breaker.snapshot() for name, plugin in PROVIDERS.items() if plugin.breaker}
+
+def _run_fallback(provider_name: str, reason: str, text: str | None, frame: Image.Image | PreparedFrame, step: int, height: int, last_action: str, max_steps: int) -> tuple[str, str | None, bool, int]:
+    """Executa o passo no modelo local quando o provedor remoto falhou ou está com o disjuntor aberto."""
+    breaker = PROVIDERS[provider_name].breaker
+    if breaker:
+        breaker.record_fallback()
+    accounting.record_provider_event(provider_name, 'fallback')
+    print(f"Passo {step + 1}: {provider_name} indisponível ({reason}); usando {FALLBACK_PROVIDER}.")
+    try:
+        fallback = get_provider(FALLBACK_PROVIDER)
+    except Exception as e:
+        print(f"Erro ao carregar o provedor {FALLBACK_PROVIDER}: {e}")
+        return f"Erro: {provider_name} indisponível ({reason}) e {FALLBACK_PROVIDER} não carregou: {str(e)}", None, False, 0
+    response, command, continue_route, view = fallback.runner(text, frame, step, height, last_action, max_steps)
+    return f"[Contingência {FALLBACK_PROVIDER}: {provider_name} {reason}]\n{response}", command, continue_route, view
 
-def run_ai(text: str | None, frame: Image.Image, step: int=0, height: int=0, last_action: str="Nenhuma", max_steps: int=7) -> tuple[str, str | None, bool | None]:
+def run_ai(text: str | None, frame: Image.Image | PreparedFrame, step: int=0, height: int=0, last_action: str="Nenhuma", max_steps: int=7) -> tuple[str, str | None, bool | None, int]:
     """
     Função Mestra que decide qual IA usar.
+    Provedores remotos rodam com prazo por passo e disjuntor; se o prazo estourar, o SDK falhar
+    ou o disjuntor estiver aberto, o passo é executado no modelo local (FALLBACK_PROVIDER).
+    A chamada pertence à geração da conversa em que começou; se ela for descartada no meio
+    (missão abortada), o resultado não grava estado compartilhado.
     Args:
         text (str | None): Descrição do que o drone deve fazer.
-        frame (Image.Image): Frame da câmera do drone.
+        frame (Image.Image | PreparedFrame): Frame da câmera do drone.
         step (int): Passo atual na sequência de comandos.
         height (int): Altura atual do drone em cm.
         last_action (str): Último comando executado pelo drone.
     Returns:
-        tuple: (resposta natural, comando técnico, continuar rota)
+        tuple: (resposta natural, comando técnico, continuar rota, vista do look-around)
     """
-    if AI_PROVIDER == 'LOCAL':
-        return run_ai_local(text, frame)
-    elif AI_PROVIDER == 'OPENAI':
-        return run_ai_openai(text, frame, step, height, last_action, max_steps)
-    else:
-        return run_ai_gemini(text, frame, step, height, max_steps)
+    with _in_generation(conversation_generation):
+        return _run_ai_step(text, frame, step, height, last_action, max_steps)
+
+def _run_ai_step(text: str | None, frame: Image.Image | PreparedFrame, step: int, height: int, last_action: str, max_steps: int) -> tuple[str, str | None, bool | None, int]:
+    """Corpo de run_ai, já associado à geração da conversa."""
+    args = (text, frame, step, height, last_action, max_steps)
+    provider = PROVIDERS[AI_PROVIDER]
+    breaker = provider.breaker
+    if breaker is None:
+        try:
+            provider.ensure_loaded()
+        except Exception as e:
+            print(f"Erro ao carregar o provedor {AI_PROVIDER}: {e}")
+            return f"Erro ao carregar o provedor {AI_PROVIDER}: {str(e)}", None, False, 0
+        return provider.runner(*args)
+
+    if not breaker.allow_request():
+        return _run_fallback(provider.name, 'disjuntor aberto', *args)
+
+    deadline = step_deadline(provider.name)
+    try:
+        provider.ensure_loaded()
+        future = _step_pool.submit(_run_in_generation, _call_context.generation, provider.runner, *args)
+        result = future.result(timeout=deadline)
+        breaker.record_success()
+        return result
+    except StepTimeout:
+        reason, event = f'prazo de {deadline:.0f}s estourado', 'timeout'
+    except Exception as e:
+        print(f"Erro no provedor {provider.name}: {e}")
+        reason, event = 'erro', 'error'
+
+    breaker.record_failure(event)
+    accounting.record_provider_event(provider.name, event)
+    if not is_current_call(): # Missão abortada durante o passo: sem reset nem contingência para uma missão que já acabou
+        return f"Erro: {provider.name} {reason} (chamada descartada)", None, False, 0
+    # O runner abandonado ainda pode responder: o descarte troca a geração, então a resposta tardia
+    # não entra no histórico novo (o reset sozinho não impediria o append)
+    discard_conversation(provider)
+    _call_context.generation = conversation_generation # A contingência pertence à conversa nova
+    return _run_fallback(provider.name, reason, *args)
+
+register_provider(ProviderPlugin(
+    'GEMINI', GEMINI_MODEL_NAME, _load_gemini,
+    lambda text, frame, step, height, last_action, max_steps: run_ai_gemini(text, frame, step, height, max_steps),
+    reset_gemini_session, STEP_DEADLINE_S['GEMINI']
+))
+register_provider(ProviderPlugin(
+    'OPENAI', OPENAI_MODEL_NAME, _load_openai, run_ai_openai,
+    reset_openai_history, STEP_DEADLINE_S['OPENAI']
+))
+register_provider(ProviderPlugin('LOCAL', LOCAL_MODEL_NAME, _load_local, run_ai_local))
 
 def validate_command(cmd: str) -> bool:
     """
@@ -561,11 +975,5 @@ def validate_command(cmd: str) -> bool:
     if not parts or parts[0] not in COMMAND_LIST:
         return False
 
-    base_cmd = parts[0]
-
-    # Comandos de Sistema (sem argumento)
-    if base_cmd in ['takeoff', 'land']:
-        return len(parts) == 1
-
-    # Comandos de Movimento/Rotação (precisam de 1 argumento numérico)
-    return len(parts) == 2 and parts[1].isdigit()
\ No newline at end of file
+    # Somente a forma canônica gerada de COMMAND_SPEC (a mesma do schema de saída)
+    return ' '.join(parts) in _COMMAND_VALUE_SET
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""
+Disjuntor (circuit breaker) por provedor de IA.
+Falhas seguidas (estouro do prazo do passo ou erro do SDK) abrem o disjuntor: os passos
+seguintes vão direto para o modelo local, sem esperar o provedor degradado. Depois do
+tempo de resfriamento o disjuntor fica meio-aberto e deixa passar uma única tentativa;
+se ela der certo o disjuntor fecha, senão volta a abrir.
+"""
+import threading
+import time
+
+FAILURE_THRESHOLD = 3 # Falhas seguidas para abrir
+COOLDOWN_S = 30.0 # Tempo aberto antes de testar o provedor de novo
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+STATE_LABELS = {CLOSED: 'fechado', OPEN: 'aberto', HALF_OPEN: 'meio-aberto'}
+
+
+class CircuitBreaker:
+    """
+    Estado do disjuntor de um provedor e contadores para as métricas.
+    Args:
+        name (str): Nome do provedor.
+        failure_threshold (int): Falhas seguidas para abrir.
+        cooldown_s (float): Segundos aberto antes de meio-abrir.
+    """
+    def __init__(self, name: str, failure_threshold: int = FAILURE_THRESHOLD, cooldown_s: float = COOLDOWN_S) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown_s = cooldown_s
+        self.lock = threading.Lock()
+        self._state = CLOSED
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.consecutive_failures = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.trips = 0
+        self.fallbacks = 0
+
+    @property
+    def state(self) -> str:
+        with self.lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.time() - self.opened_at >= self.cooldown_s:
+            self._state = HALF_OPEN
+            self.trial_in_flight = False
+        return self._state
+
+    def allow_request(self) -> bool:
+        """
+        Indica se o passo pode ir para o provedor.
+        Returns:
+            bool: True se fechado, ou se meio-aberto e nenhuma tentativa está em andamento.
+        """
+        with self.lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """Registra um passo concluído no prazo; fecha o disjuntor."""
+        with self.lock:
+            if self._state != CLOSED:
+                print(f"Disjuntor {self.name}: fechado.")
+            self._state = CLOSED
+            self.consecutive_failures = 0
+            self.trial_in_flight = False
+
+    def record_failure(self, reason: str) -> None:
+        """
+        Registra uma falha e abre o disjuntor se necessário.
+        Args:
+            reason (str): 'timeout' ou 'error'.
+        """
+        with self.lock:
+            if reason == 'timeout':
+                self.timeouts += 1
+            else:
+                self.errors += 1
+            self.consecutive_failures += 1
+            state = self._current_state()
+            if state == HALF_OPEN or (state == CLOSED and self.consecutive_failures >= self.failure_threshold):
+                self._state = OPEN
+                self.opened_at = time.time()
+                self.trial_in_flight = False
+                self.trips += 1
+                print(f"Disjuntor {self.name}: aberto após {self.consecutive_failures} falha(s) seguida(s).")
+
+    def record_fallback(self) -> None:
+        """Conta um passo desviado para o modelo local."""
+        with self.lock:
+            self.fallbacks += 1
+
+    def snapshot(self) -> dict:
+        """
+        Retorna o estado e os contadores para a GUI e a exportação de métricas.
+        Returns:
+            dict: Estado, falhas seguidas, timeouts, erros, aberturas e passos em contingência.
+        """
+        with self.lock:
+            return {
+                'state': self._current_state(),
+                'consecutive_failures': self.consecutive_failures,
+                'timeouts': self.timeouts,
+                'errors': self.errors,
+                'trips': self.trips,
+                'fallbacks': self.fallbacks,
+            }
@@ -0,0 +1,215 @@
+"""
+Gramática determinística de comandos diretos em português.
+Frases imperativas simples ("sobe 50", "gira 90 horário", "pousar") são convertidas
+diretamente em comandos do SDK, sem passar pela IA. Qualquer frase que não seja
+totalmente reconhecida pela gramática retorna None e segue para o modelo.
+"""
+import re
+import unicodedata
+
+from modules.chatbot import COMMAND_LIST, fix_command
+
+# Verbos/direções -> comando do SDK. Chaves sem acento, em minúsculas.
+DIRECTION_WORDS = {
+    'sobe': 'up', 'subir': 'up', 'suba': 'up', 'subindo': 'up', 'cima': 'up',
+    'desce': 'down', 'descer': 'down', 'desca': 'down', 'descendo': 'down', 'baixo': 'down',
+    'esquerda': 'left',
+    'direita': 'right',
+    'frente': 'forward', 'avanca': 'forward', 'avancar': 'forward', 'avance': 'forward', 'adiante': 'forward',
+    'tras': 'back', 'recua': 'back', 'recuar': 'back', 'recue': 'back', 're': 'back', 'volta': 'back', 'voltar': 'back', 'volte': 'back',
+}
+ROTATION_WORDS = {'gira', 'girar', 'gire', 'vira', 'virar', 'vire', 'rotaciona', 'rotacionar', 'rotacione', 'roda', 'rodar', 'rode'}
+ROTATION_CW = {'horario', 'direita'}
+ROTATION_CCW = {'antihorario', 'esquerda'}
+TAKEOFF_WORDS = {'decola', 'decolar', 'decole', 'decolagem', 'takeoff'}
+LAND_WORDS = {'pousa', 'pousar', 'pouse', 'aterrissa', 'aterrissar', 'aterrisse', 'land'}
+
+# Palavras sem significado para o comando (ignoradas)
+FILLER_WORDS = {
+    'drone', 'tello', 'por', 'favor', 'o', 'a', 'os', 'as', 'para', 'pra', 'pro', 'ao', 'em', 'no', 'na',
+    'vai', 'va', 'ir', 'mova', 'mover', 'move', 'movimente', 'se', 'de', 'do', 'da', 'sentido', 'lado',
+    'agora', 'entao', 'um', 'uma', 'pouco', 'pouquinho', 'siga', 'segue', 'seguir', 'anda', 'andar', 'ande',
+}
+UNIT_SCALE = {
+    'cm': 1, 'centimetro': 1, 'centimetros': 1,
+    'm': 100, 'metro': 100, 'metros': 100,
+    'grau': 1, 'graus': 1,
+}
+SEQUENCE_SEPARATORS = {'e', 'depois', 'entao', ',', ';'}
+
+NUMBER_WORDS = {
+    'zero': 0, 'um': 1, 'uma': 1, 'dois': 2, 'duas': 2, 'tres': 3, 'quatro': 4, 'cinco': 5,
+    'seis': 6, 'sete': 7, 'oito': 8, 'nove': 9, 'dez': 10, 'onze': 11, 'doze': 12, 'treze': 13,
+    'quatorze': 14, 'catorze': 14, 'quinze': 15, 'dezesseis': 16, 'dezessete': 17, 'dezoito': 18,
+    'dezenove': 19, 'vinte': 20, 'trinta': 30, 'quarenta': 40, 'cinquenta': 50, 'sessenta': 60,
+    'setenta': 70, 'oitenta': 80, 'noventa': 90, 'cem': 100, 'cento': 100, 'duzentos': 200,
+    'trezentos': 300, 'quatrocentos': 400, 'quinhentos': 500, 'meio': 0.5, 'meia': 0.5,
+}
+
+def normalize_text(text: str) -> str:
+    """
+    Normaliza o texto: minúsculas, sem acentos e sem pontuação final.
+    Args:
+        text (str): Texto bruto (digitado ou transcrito).
+    Returns:
+        str: Texto normalizado.
+    """
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    text = text.replace('anti-horario', 'antihorario').replace('anti horario', 'antihorario')
+    text = re.sub(r'(\d),(\d)', r'\1.\2', text) # "1,5 metro" -> "1.5 metro"
+    text = re.sub(r'(\d)([a-z])', r'\1 \2', text) # "50cm" -> "50 cm"
+    return re.sub(r'[!?.](?!\d)', ' ', text).strip()
+
+def _parse_number(tokens: list[str]) -> float | None:
+    """
+    Converte a sequência de tokens numéricos em valor ("cento e vinte" -> 120).
+    Args:
+        tokens (list[str]): Tokens que compõem o número.
+    Returns:
+        float | None: Valor numérico ou None se algum token não for número.
+    """
+    total = 0.0
+    for tok in tokens:
+        if re.fullmatch(r'\d+(?:\.\d+)?', tok):
+            total += float(tok)
+        elif tok in NUMBER_WORDS:
+            total += NUMBER_WORDS[tok]
+        else:
+            return None
+    return total
+
+def _split_segments(normalized: str) -> list[str]:
+    """
+    Divide a frase em trechos de um comando cada ("sobe 50 e gira 90").
+    O "e" entre palavras numéricas não separa comandos ("cento e vinte", "um metro e meio").
+    Args:
+        normalized (str): Texto normalizado.
+    Returns:
+        list[str]: Trechos não vazios.
+    """
+    tokens = normalized.replace(',', ' , ').replace(';', ' ; ').split()
+    segments: list[list[str]] = [[]]
+    for i, tok in enumerate(tokens):
+        if tok in SEQUENCE_SEPARATORS:
+            prev_tok = tokens[i - 1] if i > 0 else ''
+            next_tok = tokens[i + 1] if i + 1 < len(tokens) else ''
+            joins_number = tok == 'e' and (
+                (prev_tok in NUMBER_WORDS and next_tok in NUMBER_WORDS and next_tok not in ('um', 'uma'))
+                or (prev_tok in UNIT_SCALE and next_tok in ('meio', 'meia'))
+            )
+            if not joins_number:
+                segments.append([])
+                continue
+        segments[-1].append(tok)
+    return [' '.join(seg) for seg in segments if seg]
+
+def _parse_segment(segment: str) -> str | None:
+    """
+    Reconhece um único comando. Todos os tokens precisam ser consumidos pela gramática.
+    Args:
+        segment (str): Trecho normalizado contendo um comando.
+    Returns:
+        str | None: Comando bruto (ex.: "cw 90") ou None se não reconhecido.
+    """
+    tokens = segment.split()
+    if not tokens:
+        return None
+
+    cmd = None
+    rotation = False
+    rotation_dir = None
+    number_tokens: list[str] = []
+    scale = 1
+    special_angle = None
+
+    for i, tok in enumerate(tokens):
+        if tok in TAKEOFF_WORDS or tok in LAND_WORDS:
+            new_cmd = 'takeoff' if tok in TAKEOFF_WORDS else 'land'
+            if cmd and cmd != new_cmd:
+                return None
+            cmd = new_cmd
+        elif tok in ROTATION_WORDS:
+            rotation = True
+        elif rotation and tok in ROTATION_CW | ROTATION_CCW:
+            new_dir = 'cw' if tok in ROTATION_CW else 'ccw'
+            if rotation_dir and rotation_dir != new_dir:
+                return None
+            rotation_dir = new_dir
+        elif tok in DIRECTION_WORDS:
+            # "volta" em "meia volta"/"uma volta" é rotação, não recuo
+            if tok == 'volta' and i > 0 and tokens[i - 1] in ('meia', 'uma'):
+                special_angle = 180 if tokens[i - 1] == 'meia' else 360
+                number_tokens = [t for t in number_tokens if t not in ('meia', 'uma')]
+                rotation = True
+                continue
+            new_cmd = DIRECTION_WORDS[tok]
+            if cmd and cmd != new_cmd:
+                return None
+            cmd = new_cmd
+        elif tok == 'e' and number_tokens:
+            continue # Conector numérico preservado por _split_segments
+        elif tok in UNIT_SCALE:
+            scale = UNIT_SCALE[tok]
+        elif re.fullmatch(r'\d+(?:\.\d+)?', tok) or (tok in NUMBER_WORDS and tok not in ('um', 'uma')):
+            number_tokens.append(tok)
+        elif tok in ('um', 'uma') and i + 1 < len(tokens) and tokens[i + 1] in ('metro', 'volta', 'grau'):
+            number_tokens.append(tok)
+        elif tok in FILLER_WORDS:
+            continue
+        else:
+            return None # Token desconhecido: frase não é um comando direto
+
+    if rotation:
+        # "vira para a esquerda" vira rotação anti-horária, não translação
+        if cmd in ('left', 'right') and not rotation_dir:
+            rotation_dir = 'ccw' if cmd == 'left' else 'cw'
+            cmd = None
+        if cmd is not None:
+            return None
+        cmd = rotation_dir or 'cw'
+        scale = 1
+        if special_angle is not None:
+            number_tokens = number_tokens or [str(special_angle)]
+
+    if cmd is None:
+        return None
+    if cmd in ('takeoff', 'land'):
+        return cmd if not number_tokens else None
+
+    value = _parse_number(number_tokens) if number_tokens else None
+    if number_tokens and value is None:
+        return None
+    if value is None:
+        return cmd # fix_command aplica o valor padrão
+    return f"{cmd} {int(round(value * scale))}"
+
+def parse_direct_command(text: str) -> list[str] | None:
+    """
+    Tenta interpretar o texto como uma sequência de comandos diretos de pilotagem.
+    Os comandos passam por fix_command, com as mesmas regras de ajuste usadas nas respostas da IA.
+    Args:
+        text (str): Texto digitado ou transcrição de voz.
+    Returns:
+        list[str] | None: Comandos técnicos válidos, ou None se a frase deve ir para a IA.
+    """
+    if not text or not text.strip():
+        return None
+
+    normalized = normalize_text(text)
+    segments = _split_segments(normalized)
+    if not segments:
+        return None
+
+    commands = []
+    for segment in segments:
+        if all(tok in FILLER_WORDS for tok in segment.split()):
+            continue # Vocativos como "drone," não formam comando
+        raw = _parse_segment(segment)
+        if raw is None:
+            return None
+        command = fix_command(raw)
+        if not command or command.split()[0] not in COMMAND_LIST:
+            return None
+        commands.append(command)
+    return commands or None
@@ -0,0 +1,253 @@
+"""
+Despacho de comandos com confirmação do drone.
+Cada comando recebe um id e entra em uma fila própria; uma thread envia um por vez com
+`tello.send_cmd_return(cmd, timeout)`, que no tello_zune 0.7.7 segura o lock de comandos e
+devolve a resposta do próprio comando ('ok', 'error ...' ou vazio se estourar o prazo). Versões
+sem o prazo (0.7.6 espera 1 s sem lock, disputando a resposta com a fila interna) não servem
+para confirmar: nelas o comando vai para `add_command` e a missão usa a espera estimada. O Tello só responde aos
+movimentos quando eles terminam, então o tempo entre envio e resposta é o tempo de execução;
+para os demais comandos é o tempo de ida e volta. A missão espera a conclusão ou a falha pelo
+objeto do comando, em vez de adivinhar com temporizadores.
+"""
+import inspect
+import itertools
+import queue
+import threading
+import time
+from collections import Counter, deque
+
+import numpy as np
+
+from modules.tello_control import VALID_COMMANDS, process_ai_command
+
+MOTION_COMMANDS = ('up', 'down', 'left', 'right', 'forward', 'back', 'cw', 'ccw')
+COMMAND_TIMEOUT_S = {'takeoff': 20.0, 'land': 20.0} # Prazo da resposta por comando
+MOTION_TIMEOUT_S = 12.0
+DEFAULT_TIMEOUT_S = 3.0
+ACK_SETTLE_S = 0.3 # Estabilização depois do 'ok' de um movimento, antes do próximo frame
+STATS_SIZE = 200
+
+PENDING = 'pending'
+SENT = 'sent'
+OK = 'ok'
+ERROR = 'error'
+TIMEOUT = 'timeout'
+CANCELLED = 'cancelled'
+UNCONFIRMED = 'unconfirmed' # Drone sem send_cmd_return com prazo: enfileirado sem como confirmar
+
+
+def command_timeout(command: str) -> float:
+    """Prazo da resposta do drone para um comando."""
+    base_cmd = command.split()[0]
+    if base_cmd in COMMAND_TIMEOUT_S:
+        return COMMAND_TIMEOUT_S[base_cmd]
+    return MOTION_TIMEOUT_S if base_cmd in MOTION_COMMANDS else DEFAULT_TIMEOUT_S
+
+
+class TrackedCommand:
+    """
+    Comando despachado e seus tempos.
+    Args:
+        command_id (int): Identificador sequencial.
+        command (str): Comando do SDK do Tello.
+    """
+    def __init__(self, command_id: int, command: str) -> None:
+        self.id = command_id
+        self.command = command
+        self.status = PENDING
+        self.response = ''
+        self.enqueued_at = time.time()
+        self.sent_at: float | None = None
+        self.acked_at: float | None = None
+        self.done = threading.Event()
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status == OK
+
+    @property
+    def queue_ms(self) -> float | None:
+        """Espera na fila até o envio."""
+        return (self.sent_at - self.enqueued_at) * 1000 if self.sent_at else None
+
+    @property
+    def response_ms(self) -> float | None:
+        """Envio até a resposta do drone (execução nos movimentos, ida e volta nos demais)."""
+        return (self.acked_at - self.sent_at) * 1000 if self.sent_at and self.acked_at else None
+
+    def wait(self, timeout: float | None = None, cancel_event: threading.Event | None = None) -> bool:
+        """
+        Espera a conclusão (ou falha) do comando.
+        Args:
+            timeout (float | None): Tempo máximo de espera.
+            cancel_event (threading.Event | None): Interrompe a espera quando sinalizado.
+        Returns:
+            bool: True se o comando chegou a um estado final.
+        """
+        if cancel_event is None:
+            return self.done.wait(timeout)
+        deadline = None if timeout is None else time.time() + timeout
+        while not self.done.is_set():
+            if cancel_event.is_set() or (deadline is not None and time.time() >= deadline):
+                break
+            self.done.wait(0.02)
+        return self.done.is_set()
+
+    def describe(self) -> str:
+        """Resultado em texto, para o log e para a última ação informada à IA."""
+        if self.status == OK:
+            return f"{self.command} (ok em {self.response_ms:.0f} ms)"
+        if self.status == ERROR:
+            return f"{self.command} (FALHOU: {self.response})"
+        if self.status == TIMEOUT:
+            return f"{self.command} (FALHOU: sem resposta do drone)"
+        if self.status == CANCELLED:
+            return f"{self.command} (cancelado)"
+        if self.status == UNCONFIRMED:
+            return self.command
+        return f"{self.command} (aguardando confirmação)"
+
+    def _finish(self, status: str, response: str = '') -> None:
+        self.status = status
+        self.response = response
+        self.acked_at = time.time()
+        self.done.set()
+
+
+class CommandTracker:
+    """
+    Fila de comandos com id, envio sequencial e métricas de resposta.
+    Args:
+        tello (object): Objeto da classe TelloZune.
+    """
+    def __init__(self, tello: object) -> None:
+        self.tello = tello
+        self.ids = itertools.count(1)
+        self.commands: queue.Queue[TrackedCommand | None] = queue.Queue()
+        self.status_counts: Counter[str] = Counter()
+        self.response_ms: dict[str, deque[float]] = {'motion': deque(maxlen=STATS_SIZE), 'instant': deque(maxlen=STATS_SIZE)}
+        self.queue_ms: deque[float] = deque(maxlen=STATS_SIZE)
+        self.lock = threading.Lock()
+        self.thread: threading.Thread | None = None
+        self.running = False
+
+    @property
+    def confirms(self) -> bool:
+        """True se o drone devolve a resposta de cada comando com prazo (TelloZune 0.7.7+)."""
+        send = getattr(self.tello, 'send_cmd_return', None)
+        if not callable(send):
+            return False
+        try:
+            return 'timeout' in inspect.signature(send).parameters
+        except (TypeError, ValueError):
+            return False
+
+    def start(self) -> None:
+        """Inicia a thread de envio."""
+        if self.running:
+            return
+        self.running = True
+        if not self.confirms:
+            print("Drone sem send_cmd_return com prazo (requer tello_zune 0.7.7): comandos sem confirmação e sem latência 'ack'.")
+        self.thread = threading.Thread(target=self._run, name='CommandTracker', daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Cancela os pendentes e encerra a thread de envio."""
+        if not self.running:
+            return
+        self.running = False
+        self.flush()
+        self.commands.put(None)
+
+    def submit(self, command: str) -> TrackedCommand:
+        """
+        Enfileira um comando sem bloquear.
+        Args:
+            command (str): Comando validado.
+        Returns:
+            TrackedCommand: Objeto para esperar a conclusão e ler os tempos.
+        """
+        tracked = TrackedCommand(next(self.ids), command)
+        if command.split()[0] not in VALID_COMMANDS:
+            tracked._finish(ERROR, 'comando não suportado')
+            self._record(tracked)
+        elif not self.confirms or not self.running:
+            process_ai_command(self.tello, command)
+            tracked._finish(UNCONFIRMED)
+            self._record(tracked)
+        else:
+            self.commands.put(tracked)
+        return tracked
+
+    def flush(self) -> int:
+        """
+        Cancela os comandos que ainda não foram enviados (usado ao abortar uma missão).
+        Returns:
+            int: Quantidade de comandos cancelados.
+        """
+        cancelled = 0
+        while True:
+            try:
+                tracked = self.commands.get_nowait()
+            except queue.Empty:
+                break
+            if tracked is None:
+                self.commands.put(None) # Preserva o sinal de parada
+                break
+            tracked._finish(CANCELLED)
+            self._record(tracked)
+            cancelled += 1
+        if cancelled:
+            print(f"{cancelled} comando(s) rastreado(s) cancelado(s).")
+        return cancelled
+
+    def _run(self) -> None:
+        while True:
+            tracked = self.commands.get()
+            if tracked is None:
+                break
+            if tracked.done.is_set():
+                continue
+            tracked.status = SENT
+            tracked.sent_at = time.time()
+            try:
+                response = (self.tello.send_cmd_return(tracked.command, timeout=command_timeout(tracked.command)) or '').strip() # type: ignore
+            except Exception as e:
+                response = f'error {e}'
+            if response == 'ok':
+                tracked._finish(OK, response)
+            elif not response:
+                tracked._finish(TIMEOUT)
+            else:
+                tracked._finish(ERROR, response)
+            self._record(tracked)
+            print(f"Comando #{tracked.id}: {tracked.describe()}")
+
+    def _record(self, tracked: TrackedCommand) -> None:
+        with self.lock:
+            self.status_counts[tracked.status] += 1
+            if tracked.queue_ms is not None:
+                self.queue_ms.append(tracked.queue_ms)
+            if tracked.status == OK and tracked.response_ms is not None:
+                kind = 'motion' if tracked.command.split()[0] in MOTION_COMMANDS else 'instant'
+                self.response_ms[kind].append(tracked.response_ms)
+
+    def report(self) -> dict:
+        """
+        Retorna contagens por estado e percentis dos tempos (ms).
+        Returns:
+            dict: {'status': {...}, 'queue_ms': {...}, 'motion_ms': {...}, 'instant_ms': {...}}
+        """
+        def percentiles(values) -> dict:
+            if not values:
+                return {}
+            arr = np.asarray(values, dtype=np.float64)
+            return {'p50': round(float(np.percentile(arr, 50)), 1), 'p95': round(float(np.percentile(arr, 95)), 1), 'n': len(arr)}
+        with self.lock:
+            return {
+                'status': dict(self.status_counts),
+                'queue_ms': percentiles(self.queue_ms),
+                'motion_ms': percentiles(self.response_ms['motion']),
+                'instant_ms': percentiles(self.response_ms['instant']),
+            }
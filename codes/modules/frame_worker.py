@@ -0,0 +1,197 @@
+"""
+Preparo dos frames da IA em um processo separado, com memória compartilhada.
+A conversão de cor, a grade, o redimensionamento e a codificação JPEG disputam o GIL com o
+loop do Tk e a decodificação do vídeo. Neste modo o frame BGR é copiado para um dos slots de
+um anel em `multiprocessing.shared_memory`, o processo de trabalho faz todo o preparo e
+devolve apenas os bytes do JPEG e a assinatura do frame.
+"""
+import itertools
+import multiprocessing as mp
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as PrepareTimeout
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from modules.chatbot import PreparedFrame, add_grid_to_image, pil_image_to_bytes
+from modules.route_library import frame_signature
+
+RING_SLOTS = 4 # Frames que podem estar em preparo ao mesmo tempo
+MAX_FRAME_SHAPE = (720, 960, 3) # Maior frame BGR aceito pelos slots
+PREPARE_TIMEOUT_S = 2.0 # Acima disto o frame é preparado no próprio processo
+STATS_SIZE = 500
+
+
+def prepare_frame(frame: np.ndarray) -> tuple[bytes, str]:
+    """
+    Prepara um frame BGR para a IA: JPEG com a grade e assinatura dHash.
+    Usado pelo processo de trabalho e, como contingência, no processo principal.
+    Args:
+        frame (np.ndarray): Frame BGR.
+    Returns:
+        tuple[bytes, str]: (JPEG, assinatura)
+    """
+    image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    return pil_image_to_bytes(add_grid_to_image(image)), frame_signature(image)
+
+def _worker_main(shm_name: str, slot_bytes: int, jobs: mp.Queue, results: mp.Queue, cv2_threads: int | None) -> None:
+    """Laço do processo de trabalho: lê o slot indicado, prepara e devolve os bytes."""
+    if cv2_threads is not None:
+        cv2.setNumThreads(cv2_threads)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+            job_id, slot, shape = job
+            start = time.perf_counter()
+            try:
+                frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+                jpeg, signature = prepare_frame(frame)
+                results.put((job_id, jpeg, signature, (time.perf_counter() - start) * 1000, None))
+            except Exception as e:
+                results.put((job_id, None, None, 0.0, str(e)))
+            finally:
+                frame = None # Solta a visão do buffer antes de fechar a memória compartilhada
+    finally:
+        shm.close()
+
+
+class FramePreprocessor:
+    """
+    Anel de slots em memória compartilhada e um processo de trabalho que prepara os frames.
+    Args:
+        slots (int): Quantidade de slots do anel.
+        max_frame_shape (tuple): Maior forma (altura, largura, canais) aceita.
+        cv2_threads (int | None): Pool do OpenCV no processo de trabalho (None mantém o padrão).
+    """
+    def __init__(self, slots: int = RING_SLOTS, max_frame_shape: tuple[int, int, int] = MAX_FRAME_SHAPE,
+                 cv2_threads: int | None = None) -> None:
+        self.slots = slots
+        self.cv2_threads = cv2_threads
+        self.slot_bytes = int(np.prod(max_frame_shape))
+        self.shm: shared_memory.SharedMemory | None = None
+        self.process: mp.process.BaseProcess | None = None
+        self.jobs: mp.Queue | None = None
+        self.results: mp.Queue | None = None
+        self.free_slots: queue.Queue[int] = queue.Queue()
+        self.pending: dict[int, tuple[Future, int]] = {}
+        self.pending_lock = threading.Lock()
+        self.job_ids = itertools.count()
+        self.receiver: threading.Thread | None = None
+        self.running = False
+        self.round_trip_ms: deque[float] = deque(maxlen=STATS_SIZE) # Do envio até os bytes voltarem
+        self.worker_ms: deque[float] = deque(maxlen=STATS_SIZE) # Preparo dentro do processo de trabalho
+        self.local_fallbacks = 0
+
+    def start(self) -> None:
+        """Cria a memória compartilhada e inicia o processo de trabalho."""
+        if self.running:
+            return
+        context = mp.get_context('spawn') # fork com as threads do Tk e do vídeo não é seguro
+        self.shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+        self.jobs = context.Queue()
+        self.results = context.Queue()
+        for slot in range(self.slots):
+            self.free_slots.put(slot)
+        self.process = context.Process(target=_worker_main, name='FramePreprocessor', daemon=True,
+                                       args=(self.shm.name, self.slot_bytes, self.jobs, self.results, self.cv2_threads))
+        self.process.start()
+        self.running = True
+        self.receiver = threading.Thread(target=self._receive, name='FramePreprocessorResults', daemon=True)
+        self.receiver.start()
+        print(f"Preparo de frames em processo separado iniciado ({self.slots} slots).")
+
+    def stop(self) -> None:
+        """Encerra o processo de trabalho e libera a memória compartilhada."""
+        if not self.running:
+            return
+        self.running = False
+        self.jobs.put(None) # type: ignore
+        self.process.join(2.0) # type: ignore
+        if self.process.is_alive(): # type: ignore
+            self.process.terminate() # type: ignore
+        self.results.put(None) # type: ignore # Encerra a thread receptora
+        with self.pending_lock:
+            for future, _ in self.pending.values():
+                future.cancel()
+            self.pending.clear()
+        self.shm.close() # type: ignore
+        self.shm.unlink() # type: ignore
+        self.shm = None
+
+    def prepare(self, frame: np.ndarray, timeout: float = PREPARE_TIMEOUT_S) -> PreparedFrame:
+        """
+        Prepara um frame BGR no processo de trabalho. Se o modo estiver parado, o frame não couber,
+        não houver slot livre ou o processo demorar, o preparo é feito aqui mesmo.
+        Args:
+            frame (np.ndarray): Frame BGR.
+            timeout (float): Tempo máximo de espera pelo processo de trabalho.
+        Returns:
+            PreparedFrame: JPEG com a grade e assinatura do frame.
+        """
+        size = (frame.shape[1], frame.shape[0])
+        if self.running and frame.dtype == np.uint8 and frame.nbytes <= self.slot_bytes and self.process.is_alive(): # type: ignore
+            try:
+                slot = self.free_slots.get_nowait()
+            except queue.Empty:
+                slot = None
+            if slot is not None:
+                start = time.perf_counter()
+                view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.shm.buf, offset=slot * self.slot_bytes) # type: ignore
+                view[...] = frame
+                del view
+                future: Future = Future()
+                job_id = next(self.job_ids)
+                with self.pending_lock:
+                    self.pending[job_id] = (future, slot)
+                self.jobs.put((job_id, slot, frame.shape)) # type: ignore
+                try:
+                    jpeg, signature, worker_ms = future.result(timeout)
+                    self.round_trip_ms.append((time.perf_counter() - start) * 1000)
+                    self.worker_ms.append(worker_ms)
+                    return PreparedFrame(jpeg, signature, size, worker_ms)
+                except (PrepareTimeout, RuntimeError) as e:
+                    print(f"Preparo em processo separado falhou ({e or 'tempo esgotado'}); preparando localmente.")
+
+        self.local_fallbacks += 1
+        start = time.perf_counter()
+        jpeg, signature = prepare_frame(frame)
+        return PreparedFrame(jpeg, signature, size, (time.perf_counter() - start) * 1000)
+
+    def _receive(self) -> None:
+        """Entrega os resultados do processo de trabalho e devolve os slots ao anel."""
+        while True:
+            try:
+                item = self.results.get() # type: ignore
+            except (EOFError, OSError):
+                break
+            if item is None:
+                break
+            job_id, jpeg, signature, worker_ms, error = item
+            with self.pending_lock:
+                entry = self.pending.pop(job_id, None)
+            if entry is None:
+                continue
+            future, slot = entry
+            self.free_slots.put(slot) # O processo de trabalho já terminou de ler o slot
+            if error:
+                future.set_exception(RuntimeError(error))
+            else:
+                future.set_result((jpeg, signature, worker_ms))
+
+    def report(self) -> dict:
+        """Percentis de ida e volta e do preparo no processo de trabalho (ms)."""
+        def percentiles(values) -> dict:
+            if not values:
+                return {}
+            arr = np.asarray(values, dtype=np.float64)
+            return {'p50': round(float(np.percentile(arr, 50)), 2), 'p95': round(float(np.percentile(arr, 95)), 2)}
+        return {'round_trip_ms': percentiles(self.round_trip_ms), 'worker_ms': percentiles(self.worker_ms),
+                'local_fallbacks': self.local_fallbacks}
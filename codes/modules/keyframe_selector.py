@@ -0,0 +1,129 @@
+"""
+Seleção do frame mais nítido para os passos de IA.
+Cada frame recebe, uma única vez na chegada, notas baratas de nitidez (variância do
+Laplaciano em escala reduzida) e exposição. O passo de IA recebe o melhor frame da
+janela recente em vez do mais novo, evitando imagens borradas ou com artefatos.
+"""
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+WINDOW_MS = 400 # Janela de frames considerada na escolha
+MAX_FRAMES = 30 # Limite de frames guardados
+SCORE_WIDTH = 160 # Largura usada no cálculo das notas (frame reduzido)
+STATS_SIZE = 500 # Amostras guardadas para o relatório
+
+
+class KeyframeSelector:
+    """
+    Janela deslizante de frames com notas de nitidez e exposição.
+    Args:
+        window_ms (int): Idade máxima (ms) dos frames candidatos.
+        max_frames (int): Quantidade máxima de frames guardados.
+    """
+    def __init__(self, window_ms: int = WINDOW_MS, max_frames: int = MAX_FRAMES) -> None:
+        self.window_ms = window_ms
+        self.frames: deque[tuple[float, np.ndarray, float, float]] = deque(maxlen=max_frames)
+        self.lock = threading.Lock()
+        self.score_times_ms: deque[float] = deque(maxlen=STATS_SIZE)
+        self.selection_times_ms: deque[float] = deque(maxlen=STATS_SIZE)
+        self.selected_ages_ms: deque[float] = deque(maxlen=STATS_SIZE)
+        self.sharpness_history: deque[float] = deque(maxlen=STATS_SIZE)
+        self.selected_sharpness: deque[float] = deque(maxlen=STATS_SIZE)
+
+    @staticmethod
+    def score(frame: np.ndarray) -> tuple[float, float]:
+        """
+        Calcula as notas de um frame BGR.
+        Args:
+            frame (np.ndarray): Frame BGR.
+        Returns:
+            tuple[float, float]: (nitidez, exposição em [0, 1])
+        """
+        height, width = frame.shape[:2]
+        scale = SCORE_WIDTH / float(width)
+        small = cv2.resize(frame, (SCORE_WIDTH, max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        sharpness = float(cv2.Laplacian(gray, cv2.CV_32F).var())
+
+        mean = float(gray.mean())
+        clipped = float(np.count_nonzero((gray < 8) | (gray > 247))) / gray.size
+        exposure = max(0.0, 1.0 - abs(mean - 128.0) / 128.0) * (1.0 - clipped)
+        return sharpness, exposure
+
+    def add(self, frame: np.ndarray, timestamp: float | None = None) -> None:
+        """
+        Adiciona um frame recém-chegado, calculando suas notas.
+        Args:
+            frame (np.ndarray): Frame BGR.
+            timestamp (float | None): Momento de captura. Usa o atual se None.
+        """
+        if not isinstance(frame, np.ndarray) or frame.size == 0:
+            return
+        start = time.perf_counter()
+        sharpness, exposure = self.score(frame)
+        self.score_times_ms.append((time.perf_counter() - start) * 1000)
+        with self.lock:
+            self.frames.append((timestamp or time.time(), frame, sharpness, exposure))
+        self.sharpness_history.append(sharpness)
+
+    def best(self, window_ms: int | None = None) -> tuple[np.ndarray, float] | None:
+        """
+        Retorna o melhor frame da janela recente.
+        A nitidez é normalizada pelo máximo da janela e multiplicada pela exposição.
+        Args:
+            window_ms (int | None): Janela em ms. Usa a padrão se None.
+        Returns:
+            tuple | None: (frame BGR, timestamp) ou None se não houver frames.
+        """
+        start = time.perf_counter()
+        now = time.time()
+        limit = now - (window_ms or self.window_ms) / 1000.0
+        with self.lock:
+            candidates = [f for f in self.frames if f[0] >= limit] or list(self.frames)[-1:]
+        if not candidates:
+            return None
+
+        max_sharpness = max(c[2] for c in candidates) or 1.0
+        timestamp, frame, sharpness, _ = max(candidates, key=lambda c: (c[2] / max_sharpness) * (0.5 + 0.5 * c[3]))
+
+        self.selection_times_ms.append((time.perf_counter() - start) * 1000)
+        self.selected_ages_ms.append((now - timestamp) * 1000)
+        self.selected_sharpness.append(sharpness)
+        return frame, timestamp
+
+    def latest(self) -> tuple[np.ndarray, float] | None:
+        """
+        Retorna o frame mais novo, sem seleção por nitidez (usado pelo controle em malha fechada).
+        Returns:
+            tuple | None: (frame BGR, timestamp) ou None se não houver frames.
+        """
+        with self.lock:
+            if not self.frames:
+                return None
+            timestamp, frame, _, _ = self.frames[-1]
+        return frame, timestamp
+
+    def report(self) -> dict:
+        """
+        Resume latências e distribuição das notas.
+        Returns:
+            dict: Percentis de tempo de cálculo/seleção, idade do frame escolhido e nitidez.
+        """
+        def percentiles(values) -> dict:
+            if not values:
+                return {}
+            arr = np.asarray(values, dtype=np.float64)
+            return {'p50': round(float(np.percentile(arr, 50)), 3), 'p95': round(float(np.percentile(arr, 95)), 3),
+                    'max': round(float(arr.max()), 3)}
+
+        return {
+            'score_ms': percentiles(self.score_times_ms),
+            'selection_ms': percentiles(self.selection_times_ms),
+            'selected_age_ms': percentiles(self.selected_ages_ms),
+            'sharpness_all': percentiles(self.sharpness_history),
+            'sharpness_selected': percentiles(self.selected_sharpness),
+        }
@@ -0,0 +1,77 @@
+"""
+Medição de latência ponta a ponta do pipeline e guarda contra frames velhos.
+O instante de captura é o de chegada do frame à interface (o TelloZune não expõe o
+timestamp do decodificador); o frame preto que o get_frame devolve sem vídeo não conta
+como chegada. Estágios medidos, em ms:
+    display   captura -> frame exibido na GUI
+    request   captura -> requisição enviada ao provedor de IA
+    dispatch  resposta da IA -> comando entregue ao CommandTracker
+    ack       resposta da IA -> resposta do drone ao comando
+"""
+import threading
+from collections import deque
+
+import numpy as np
+
+STALE_FRAME_MS = 500 # Frames mais velhos que isto não vão para chatbot.run_ai
+FRESH_FRAME_TIMEOUT_S = 2.0 # Espera máxima por um frame novo antes de desistir do passo
+FRESH_FRAME_POLL_S = 0.02
+PLACEHOLDER_WAIT_S = 0.9 # get_frame do tello_zune 0.7.7 devolve um frame preto após 1 s sem vídeo
+WINDOW_SIZE = 200 # Amostras por estágio nos percentis móveis
+STAGES = ('display', 'request', 'dispatch', 'ack')
+
+
+class LatencyTracker:
+    """
+    Janelas móveis de latência por estágio.
+    Args:
+        window_size (int): Amostras mantidas por estágio.
+    """
+    def __init__(self, window_size: int = WINDOW_SIZE) -> None:
+        self.lock = threading.Lock()
+        self.samples: dict[str, deque[float]] = {stage: deque(maxlen=window_size) for stage in STAGES}
+        self.stale_frames = 0 # Frames recusados pela guarda
+
+    def record(self, stage: str, ms: float) -> None:
+        """
+        Registra uma amostra.
+        Args:
+            stage (str): Um dos STAGES.
+            ms (float): Latência em milissegundos.
+        """
+        if ms < 0:
+            return
+        with self.lock:
+            self.samples[stage].append(ms)
+
+    def record_stale(self) -> None:
+        with self.lock:
+            self.stale_frames += 1
+
+    def percentiles(self, stage: str) -> tuple[float, float] | None:
+        """
+        Percentis móveis de um estágio.
+        Args:
+            stage (str): Um dos STAGES.
+        Returns:
+            tuple[float, float] | None: (p50, p95) em ms, ou None sem amostras.
+        """
+        with self.lock:
+            values = list(self.samples[stage])
+        if not values:
+            return None
+        p50, p95 = np.percentile(np.asarray(values, dtype=np.float64), [50, 95])
+        return float(p50), float(p95)
+
+    def report(self) -> dict:
+        """
+        Retorna p50/p95 de todos os estágios e o total de frames recusados.
+        Returns:
+            dict: {estágio: {'p50', 'p95', 'n'}, 'stale_frames': int}
+        """
+        report: dict = {'stale_frames': self.stale_frames}
+        for stage in STAGES:
+            result = self.percentiles(stage)
+            if result:
+                report[stage] = {'p50': round(result[0], 1), 'p95': round(result[1], 1), 'n': len(self.samples[stage])}
+        return report
@@ -0,0 +1,104 @@
+"""
+Look-around: em vez de um 'cw 90' e uma chamada à IA por direção, o drone gira por N
+direções, guarda um keyframe de cada uma e envia todas as vistas em uma única requisição,
+como um mosaico numerado (cada vista com o seu grid 3x3). O modelo responde com a vista do
+alvo e o próximo comando a partir dela.
+"""
+import io
+import re
+
+from PIL import Image, ImageDraw
+
+from modules.chatbot import ACCEPTED_ROTATIONS, add_grid_to_image
+
+LOOK_AROUND_VIEWS = 4 # Direções fotografadas (2, 4 ou 8: o passo de giro precisa ser aceito pelo Tello)
+LOOK_AROUND_ON_SEARCH = True # Objetivos de busca começam com um look-around
+LOOK_SETTLE_S = 0.8 # Espera após cada giro antes de escolher o keyframe
+LOOK_KEYFRAME_WINDOW_MS = 300 # Janela de keyframes depois da estabilização
+TILE_WIDTH = 480
+MOSAIC_JPEG_QUALITY = 80
+# Só formas de pedido (imperativo, infinitivo, gerúndio): "acho que..." ou "acha que..." não são buscas
+SEARCH_PATTERN = re.compile(r'\b(procur(?:e|em|a|ar|ando)|encontr(?:e|em|a|ar|ando)|ach(?:e|em|ar)|busc(?:a|ar|ando)|busqu(?:e|em)|'
+                            r'localiz(?:e|em|a|ar|ando)|cad[eê]|onde (?:est[aá]|est[aã]o|fica)|find|search|look for)\b', re.IGNORECASE)
+
+
+def is_search_objective(text: str) -> bool:
+    """
+    Indica se o objetivo é uma busca (ex.: "Procure a porta").
+    Args:
+        text (str): Objetivo da missão.
+    Returns:
+        bool: True se o objetivo pede para procurar algo.
+    """
+    return bool(SEARCH_PATTERN.search(text or ''))
+
+def heading_step(views: int) -> int:
+    """
+    Graus entre duas vistas consecutivas.
+    Args:
+        views (int): Quantidade de vistas.
+    Returns:
+        int: Passo de giro em graus.
+    """
+    step = 360 // views
+    if views < 2 or step * views != 360 or step not in ACCEPTED_ROTATIONS:
+        raise ValueError(f"{views} vistas não geram um giro aceito pelo Tello")
+    return step
+
+def rotation_between(current_view: int, target_view: int, views: int) -> str | None:
+    """
+    Comando de giro mais curto entre duas vistas (numeradas a partir de 1, no sentido horário).
+    Args:
+        current_view (int): Vista para a qual o drone aponta agora.
+        target_view (int): Vista escolhida.
+        views (int): Quantidade de vistas.
+    Returns:
+        str | None: 'cw <graus>', 'ccw <graus>' ou None se já estiver na vista.
+    """
+    degrees = ((target_view - current_view) % views) * heading_step(views)
+    if degrees == 0:
+        return None
+    return f'cw {degrees}' if degrees <= 180 else f'ccw {360 - degrees}'
+
+def build_mosaic(views: list[Image.Image]) -> Image.Image:
+    """
+    Monta o mosaico das vistas, cada uma com o grid 3x3 e o número no canto.
+    Args:
+        views (list[Image.Image]): Vistas na ordem em que foram fotografadas.
+    Returns:
+        Image.Image: Mosaico em duas colunas (quatro colunas acima de quatro vistas).
+    """
+    columns = 2 if len(views) <= 4 else 4
+    rows = -(-len(views) // columns)
+    first = views[0]
+    tile_height = int(first.size[1] * TILE_WIDTH / first.size[0])
+    mosaic = Image.new('RGB', (columns * TILE_WIDTH, rows * tile_height), color='black')
+    for index, view in enumerate(views):
+        tile = add_grid_to_image(view.resize((TILE_WIDTH, tile_height), Image.Resampling.BILINEAR))
+        draw = ImageDraw.Draw(tile)
+        draw.rectangle([(0, 0), (86, 26)], fill='black')
+        draw.text((6, 6), f"VISTA {index + 1}", fill='yellow')
+        x, y = (index % columns) * TILE_WIDTH, (index // columns) * tile_height
+        mosaic.paste(tile, (x, y))
+        if x: # Separadores entre as vistas
+            ImageDraw.Draw(mosaic).line([(x, y), (x, y + tile_height)], fill='white', width=3)
+        if y:
+            ImageDraw.Draw(mosaic).line([(x, y), (x + TILE_WIDTH, y)], fill='white', width=3)
+    return mosaic
+
+def mosaic_to_jpeg(mosaic: Image.Image) -> bytes:
+    """Codifica o mosaico sem reduzir para 640 px (cada vista perderia detalhe demais)."""
+    with io.BytesIO() as buffer:
+        mosaic.save(buffer, format='JPEG', quality=MOSAIC_JPEG_QUALITY)
+        return buffer.getvalue()
+
+def look_around_objective(objective: str, views: int) -> str:
+    """
+    Objetivo enviado no passo de look-around, avisando que a imagem é um mosaico.
+    Args:
+        objective (str): Objetivo da missão.
+        views (int): Quantidade de vistas no mosaico.
+    Returns:
+        str: Objetivo com a instrução do mosaico.
+    """
+    return f"{objective} [look-around: a imagem é um mosaico de {views} vistas; responda com 'vista' e o próximo comando]"
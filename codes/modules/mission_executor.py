@@ -0,0 +1,192 @@
+"""
+Executor cooperativo de missões.
+Um único worker dono executa as missões. Cada missão recebe um token de cancelamento
+que alcança todas as etapas bloqueantes (chamadas de rede da IA, esperas de inércia e
+envio de comandos). Ao abortar, a fila de comandos pendentes do drone é esvaziada e o
+tempo entre o pedido de aborto e o worker ficar ocioso é medido.
+"""
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+ABORT_TARGET_MS = 100 # Meta de latência aborto -> ocioso
+BLOCKING_CALL_WORKERS = 2 # Threads para chamadas bloqueantes abandonáveis (rede)
+
+
+class MissionCancelled(Exception):
+    """Levantada quando uma etapa percebe que a missão foi cancelada."""
+
+
+class CancelToken:
+    """
+    Token de cancelamento compartilhado pelas etapas de uma missão.
+    Callbacks registrados com on_cancel são chamados no momento do cancelamento.
+    """
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.callbacks: list[Callable[[], None]] = []
+        self.lock = threading.Lock()
+        self.cancel_time: float | None = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.event.is_set()
+
+    def cancel(self) -> None:
+        """Cancela o token e dispara os callbacks registrados (uma única vez)."""
+        with self.lock:
+            if self.event.is_set():
+                return
+            self.cancel_time = time.perf_counter()
+            self.event.set()
+            callbacks = list(self.callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Erro em callback de cancelamento: {e}")
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        """Registra um callback; se o token já foi cancelado, chama imediatamente."""
+        with self.lock:
+            if not self.event.is_set():
+                self.callbacks.append(callback)
+                return
+        callback()
+
+    def wait(self, timeout: float | None) -> bool:
+        """
+        Espera até o tempo limite ou o cancelamento.
+        Args:
+            timeout (float | None): Tempo máximo de espera em segundos.
+        Returns:
+            bool: True se o token foi cancelado.
+        """
+        return self.event.wait(timeout)
+
+    def raise_if_cancelled(self) -> None:
+        """Levanta MissionCancelled se o token foi cancelado."""
+        if self.event.is_set():
+            raise MissionCancelled()
+
+
+class MissionExecutor:
+    """
+    Worker único que executa uma missão por vez.
+    Args:
+        on_abort (Callable[[], None] | None): Chamado ao abortar (ex.: esvaziar a fila de comandos do drone).
+    """
+    def __init__(self, on_abort: Callable[[], None] | None = None) -> None:
+        self.on_abort = on_abort
+        self.jobs: queue.Queue[tuple[Callable, tuple, CancelToken]] = queue.Queue()
+        self.lock = threading.Lock()
+        self.busy = False
+        self.token: CancelToken | None = None
+        self.idle_event = threading.Event()
+        self.idle_event.set()
+        self.abort_latencies_ms: deque[float] = deque(maxlen=200)
+        self.abandoned_calls = 0 # Chamadas bloqueantes deixadas rodando por abortos
+        self.blocking_pool = ThreadPoolExecutor(max_workers=BLOCKING_CALL_WORKERS, thread_name_prefix='MissionCall')
+        self.worker = threading.Thread(target=self._run, name='MissionExecutor', daemon=True)
+        self.worker.start()
+
+    @property
+    def is_running(self) -> bool:
+        with self.lock:
+            return self.busy
+
+    def submit(self, mission: Callable, *args) -> bool:
+        """
+        Agenda uma missão. A função recebe os argumentos seguidos do token de cancelamento.
+        Args:
+            mission (Callable): Função da missão.
+            *args: Argumentos da missão.
+        Returns:
+            bool: False se já existe uma missão em execução.
+        """
+        with self.lock:
+            if self.busy:
+                return False
+            self.busy = True
+            self.token = CancelToken()
+            self.idle_event.clear()
+            token = self.token
+        self.jobs.put((mission, args, token))
+        return True
+
+    def abort(self) -> None:
+        """Cancela a missão atual e esvazia a fila de comandos pendentes."""
+        with self.lock:
+            token = self.token if self.busy else None
+        if token is not None:
+            token.cancel()
+        if self.on_abort:
+            self.on_abort()
+
+    def run_cancellable(self, token: CancelToken, func: Callable, *args, **kwargs):
+        """
+        Executa uma chamada bloqueante (ex.: requisição à IA) sem prender a missão.
+        Se o token for cancelado, a missão segue imediatamente e o resultado da chamada é descartado.
+        A chamada abandonada continua ocupando a sua thread até terminar, então o pool é trocado
+        por um novo para que a próxima missão não fique na fila atrás dela.
+        Args:
+            token (CancelToken): Token da missão.
+            func (Callable): Chamada bloqueante.
+        Returns:
+            Resultado de func.
+        Raises:
+            MissionCancelled: Se a missão foi cancelada antes do fim da chamada.
+        """
+        token.raise_if_cancelled()
+
+        def call():
+            token.raise_if_cancelled() # Abortada enquanto esperava uma thread livre: nem começa
+            return func(*args, **kwargs)
+
+        done = threading.Event()
+        future = self.blocking_pool.submit(call)
+        future.add_done_callback(lambda f: done.set())
+        token.on_cancel(done.set)
+        done.wait()
+        if token.cancelled:
+            if not future.done():
+                self._replace_blocking_pool()
+            raise MissionCancelled()
+        return future.result()
+
+    def _replace_blocking_pool(self) -> None:
+        """Troca o pool de chamadas bloqueantes; as threads antigas terminam sozinhas quando a chamada voltar."""
+        with self.lock:
+            old_pool = self.blocking_pool
+            self.blocking_pool = ThreadPoolExecutor(max_workers=BLOCKING_CALL_WORKERS, thread_name_prefix='MissionCall')
+            self.abandoned_calls += 1
+        old_pool.shutdown(wait=False, cancel_futures=True)
+
+    def wait_idle(self, timeout: float | None = None) -> bool:
+        """Espera o worker ficar ocioso."""
+        return self.idle_event.wait(timeout)
+
+    def _run(self) -> None:
+        while True:
+            mission, args, token = self.jobs.get()
+            try:
+                mission(*args, token)
+            except MissionCancelled:
+                pass
+            except Exception as e:
+                print(f"Erro na missão: {e}")
+            finally:
+                if token.cancelled:
+                    if self.on_abort:
+                        self.on_abort() # Remove comandos enfileirados na janela entre o aborto e a saída
+                    latency_ms = (time.perf_counter() - token.cancel_time) * 1000 # type: ignore
+                    self.abort_latencies_ms.append(latency_ms)
+                    status = "OK" if latency_ms <= ABORT_TARGET_MS else "ACIMA DA META"
+                    print(f"Aborto -> ocioso em {latency_ms:.1f} ms ({status}).")
+                with self.lock:
+                    self.busy = False
+                    self.token = None
+                self.idle_event.set()
@@ -0,0 +1,217 @@
+"""
+Profiler por amostragem embutido, para os caminhos quentes espalhados entre as threads
+(Tk, vídeo do TelloZune, sequência da IA, gravação).
+Uma thread lê as pilhas de todas as threads com `sys._current_frames()` na taxa configurada.
+Cada amostra é rotulada pelo nome da thread e pelo passo da missão em andamento, e a saída
+é gravada em formato de pilhas colapsadas (compatível com flamegraph.pl e speedscope) e como
+flame graph SVG por thread. Desligado, não existe thread de amostragem nem custo por frame.
+
+Ativação: botão "Perfilar" na GUI, ou a variável de ambiente TELLO_PROFILE, que perfila cada
+missão automaticamente (TELLO_PROFILE=1 usa a taxa padrão; TELLO_PROFILE=250 amostra a 250 Hz).
+"""
+import html
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILES_DIR = 'profiles'
+PROFILE_ENV = 'TELLO_PROFILE'
+DEFAULT_RATE_HZ = 100
+MAX_STACK_DEPTH = 64
+NO_STEP = 'fora de passo'
+
+SVG_WIDTH = 1200
+SVG_ROW_HEIGHT = 16
+SVG_MIN_WIDTH = 0.5 # Quadros mais estreitos (px) não são desenhados
+
+
+def env_rate() -> int | None:
+    """
+    Lê a variável de ambiente de ativação.
+    Returns:
+        int | None: Taxa em Hz se a variável estiver definida, senão None.
+    """
+    value = os.environ.get(PROFILE_ENV, '').strip()
+    if not value or value.lower() in ('0', 'false', 'no', 'off'):
+        return None
+    return int(value) if value.isdigit() and int(value) > 1 else DEFAULT_RATE_HZ
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class SamplingProfiler:
+    """
+    Amostrador de pilhas de todas as threads.
+    Args:
+        rate_hz (int): Amostras por segundo.
+        output_dir (str): Pasta dos arquivos gerados.
+    """
+    def __init__(self, rate_hz: int = DEFAULT_RATE_HZ, output_dir: str = PROFILES_DIR) -> None:
+        self.rate_hz = rate_hz
+        self.output_dir = output_dir
+        self.running = False
+        self.thread: threading.Thread | None = None
+        self.stop_event = threading.Event()
+        self.stacks: Counter[str] = Counter()
+        self.step = NO_STEP
+        self.markers: list[dict] = []
+        self.samples = 0
+        self.started_at = 0.0
+        self.sample_ms = 0.0 # Custo médio de uma amostragem
+
+    def start(self, label: str = 'sessao') -> None:
+        """
+        Inicia a amostragem.
+        Args:
+            label (str): Nome usado nos arquivos de saída.
+        """
+        if self.running:
+            return
+        self.label = label
+        self.stacks = Counter()
+        self.markers = []
+        self.samples = 0
+        self.sample_ms = 0.0
+        self.step = NO_STEP
+        self.started_at = time.time()
+        self.stop_event.clear()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='SamplingProfiler', daemon=True)
+        self.thread.start()
+        print(f"Profiler iniciado a {self.rate_hz} Hz.")
+
+    def stop(self) -> list[str]:
+        """
+        Encerra a amostragem e grava os arquivos.
+        Returns:
+            list[str]: Caminhos dos arquivos gerados.
+        """
+        if not self.running:
+            return []
+        self.running = False
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(2.0)
+        paths = self.write()
+        print(f"Profiler encerrado: {self.samples} amostras, {self.sample_ms:.3f} ms por amostra, "
+              f"arquivos em '{self.output_dir}'.")
+        return paths
+
+    def mark(self, step: str | None) -> None:
+        """
+        Marca o início de um passo; as amostras seguintes são rotuladas com ele.
+        Args:
+            step (str | None): Rótulo do passo, ou None ao sair da missão.
+        """
+        if not self.running:
+            return
+        self.step = step or NO_STEP
+        self.markers.append({'ts': round(time.time() - self.started_at, 4), 'step': self.step, 'sample': self.samples})
+
+    def _run(self) -> None:
+        interval = 1 / self.rate_hz
+        own_id = threading.get_ident()
+        next_time = time.perf_counter()
+        while not self.stop_event.is_set():
+            start = time.perf_counter()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            step = self.step
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                labels = []
+                while frame is not None and len(labels) < MAX_STACK_DEPTH:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.reverse()
+                name = names.get(thread_id, f'thread-{thread_id}')
+                self.stacks[';'.join([name, f'[{step}]'] + labels)] += 1
+            self.samples += 1
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.sample_ms += (elapsed_ms - self.sample_ms) / self.samples
+            next_time += interval
+            self.stop_event.wait(max(0.0, next_time - time.perf_counter()))
+
+    def write(self) -> list[str]:
+        """
+        Grava pilhas colapsadas, marcadores de passo e um flame graph SVG por thread.
+        Returns:
+            list[str]: Caminhos dos arquivos gerados.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, time.strftime('%Y%m%d_%H%M%S', time.localtime(self.started_at)) + f'_{self.label}')
+        paths = [base + '.collapsed', base + '.markers.json']
+        with open(paths[0], 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f'{stack} {count}\n')
+        with open(paths[1], 'w', encoding='utf-8') as f:
+            json.dump({'rate_hz': self.rate_hz, 'samples': self.samples, 'sample_ms': round(self.sample_ms, 4),
+                       'markers': self.markers}, f, ensure_ascii=False, indent=2)
+
+        by_thread: dict[str, Counter[str]] = {}
+        for stack, count in self.stacks.items():
+            name, _, rest = stack.partition(';')
+            by_thread.setdefault(name, Counter())[rest] += count
+        for name, stacks in by_thread.items():
+            safe = ''.join(c if c.isalnum() or c in '-_' else '_' for c in name)
+            path = f'{base}.{safe}.svg'
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(flame_graph_svg(stacks, f'{name} ({sum(stacks.values())} amostras a {self.rate_hz} Hz)'))
+            paths.append(path)
+        return paths
+
+
+def flame_graph_svg(stacks: Counter[str], title: str) -> str:
+    """
+    Desenha um flame graph simples a partir de pilhas colapsadas.
+    Args:
+        stacks (Counter[str]): Pilha ('a;b;c') -> número de amostras.
+        title (str): Título do gráfico.
+    Returns:
+        str: Documento SVG.
+    """
+    tree: dict = {'count': 0, 'children': {}}
+    for stack, count in stacks.items():
+        node = tree
+        node['count'] += count
+        for label in stack.split(';'):
+            node = node['children'].setdefault(label, {'count': 0, 'children': {}})
+            node['count'] += count
+
+    total = max(tree['count'], 1)
+    scale = SVG_WIDTH / total
+    boxes: list[tuple[str, float, int, float, int]] = [] # (rótulo, x, profundidade, largura, amostras)
+
+    def layout(node: dict, x: float, depth: int) -> None:
+        for label, child in sorted(node['children'].items()):
+            width = child['count'] * scale
+            if width >= SVG_MIN_WIDTH:
+                boxes.append((label, x, depth, width, child['count']))
+                layout(child, x, depth + 1)
+            x += width
+
+    layout(tree, 0.0, 0)
+    max_depth = max((box[2] for box in boxes), default=0)
+    height = (max_depth + 1) * SVG_ROW_HEIGHT + 40
+    rects = []
+    for label, x, depth, width, count in boxes:
+        y = height - 10 - (depth + 1) * SVG_ROW_HEIGHT # Raiz embaixo, como no flamegraph.pl
+        if label.startswith('['):
+            color = '#7fa7d9' # Rótulo do passo da missão
+        else:
+            shade = (sum(map(ord, label)) * 37) % 120
+            color = f'rgb({225 + shade % 30},{80 + shade},{40 + shade // 3})'
+        text = html.escape(label[: max(int(width / 7) - 1, 0)])
+        rects.append(f'<g><title>{html.escape(label)} ({count} amostras, {count / total * 100:.1f}%)</title>'
+                     f'<rect x="{x:.1f}" y="{y}" width="{width:.1f}" height="{SVG_ROW_HEIGHT - 1}" fill="{color}"/>'
+                     f'<text x="{x + 3:.1f}" y="{y + 12}">{text}</text></g>')
+    body = '\n'.join(rects)
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{SVG_WIDTH}" height="{height}" font-family="monospace" font-size="11">\n'
+            f'<rect width="100%" height="100%" fill="#f8f8f8"/>\n'
+            f'<text x="6" y="18" font-size="14">{html.escape(title)}</text>\n{body}\n</svg>\n')
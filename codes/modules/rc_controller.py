@@ -0,0 +1,216 @@
+"""
+Controle local em malha fechada para posicionamento fino entre passos da IA.
+A IA nomeia uma única vez a célula do grid 3x3 onde está o alvo ('align center-right'
+ou 'approach top-center'). Um rastreador rápido do OpenCV segue essa região no vídeo e
+o controlador envia comandos `rc` de velocidade a RC_HZ até o alvo ficar centralizado
+(e, no modo 'approach', grande o suficiente na imagem), sem novas chamadas à IA.
+"""
+import math
+import time
+from typing import Callable
+
+import cv2
+import numpy as np
+
+from modules.chatbot import GRID_CELLS, RC_GOAL_COMMANDS
+from modules.mission_executor import CancelToken
+
+RC_HZ = 15 # Frequência do laço de controle (comandos rc por segundo)
+TRACK_WIDTH = 480 # Largura do frame usado pelo rastreador (frame reduzido)
+TRACKER_TYPES = ('KCF', 'CSRT', 'MIL') # Ordem de preferência (KCF é o mais rápido)
+TARGET_FILL = 0.6 # Fração da célula ocupada pela região inicial do alvo
+
+KP_YAW = 60.0 # Ganho proporcional do giro (velocidade rc por erro normalizado)
+KD_YAW = 8.0 # Ganho derivativo do giro
+KP_UD = 50.0 # Ganho proporcional de subida/descida
+KD_UD = 6.0
+KP_FB = 40.0 # Ganho da aproximação (modo approach)
+MAX_SPEED = 40 # Velocidade rc máxima em cada eixo (o SDK aceita -100 a 100)
+MIN_SPEED = 8 # Abaixo disto o drone não se move; fora da tolerância a velocidade não fica menor que isto
+
+CENTER_TOLERANCE = 0.08 # Erro normalizado aceito como centralizado
+APPROACH_AREA = 0.12 # Fração da imagem ocupada pelo alvo para considerar que chegou
+APPROACH_MAX_ERROR = 0.3 # Só avança quando o alvo está aproximadamente centralizado
+SETTLE_TICKS = 5 # Ciclos seguidos dentro da tolerância para concluir
+LOST_TICKS = 8 # Ciclos seguidos sem rastreio (ou sem frame novo) para desistir
+STALE_STOP_TICKS = 2 # Ciclos sem frame novo antes de zerar a velocidade (vídeo congelado)
+CONTROL_TIMEOUT_S = 8.0 # Duração máxima de uma meta
+
+
+def create_tracker() -> "cv2.Tracker":
+    """
+    Cria o rastreador mais rápido disponível na instalação do OpenCV.
+    KCF e CSRT ficam em cv2 ou em cv2.legacy conforme a versão (opencv-contrib); MIL existe no pacote base.
+    Returns:
+        cv2.Tracker: Rastreador não inicializado.
+    Raises:
+        RuntimeError: Se nenhum rastreador estiver disponível.
+    """
+    for name in TRACKER_TYPES:
+        for namespace in (cv2, getattr(cv2, 'legacy', None)):
+            factory = getattr(namespace, f'Tracker{name}_create', None) if namespace else None
+            if factory is not None:
+                return factory()
+    raise RuntimeError("Nenhum rastreador do OpenCV disponível (instale opencv-contrib-python).")
+
+def cell_region(cell: str, width: int, height: int, fill: float = TARGET_FILL) -> tuple[int, int, int, int]:
+    """
+    Região inicial do alvo: o centro da célula do grid, ocupando `fill` de cada lado.
+    Args:
+        cell (str): Célula canônica (ex.: 'center-right').
+        width (int): Largura do frame.
+        height (int): Altura do frame.
+        fill (float): Fração da célula usada.
+    Returns:
+        tuple[int, int, int, int]: (x, y, largura, altura)
+    """
+    index = GRID_CELLS.index(cell)
+    row, col = divmod(index, 3)
+    cell_w, cell_h = width / 3.0, height / 3.0
+    box_w, box_h = cell_w * fill, cell_h * fill
+    x = col * cell_w + (cell_w - box_w) / 2
+    y = row * cell_h + (cell_h - box_h) / 2
+    return int(x), int(y), max(1, int(box_w)), max(1, int(box_h))
+
+def axis_speed(error: float, delta: float, kp: float, kd: float) -> int:
+    """
+    Velocidade rc de um eixo (controle PD) com zona morta na tolerância de centralização.
+    Args:
+        error (float): Erro normalizado em [-1, 1].
+        delta (float): Variação do erro desde o último ciclo.
+        kp (float): Ganho proporcional.
+        kd (float): Ganho derivativo.
+    Returns:
+        int: Velocidade rc limitada a MAX_SPEED.
+    """
+    if abs(error) < CENTER_TOLERANCE:
+        return 0
+    value = max(-MAX_SPEED, min(MAX_SPEED, kp * error + kd * delta))
+    if abs(value) < MIN_SPEED:
+        value = math.copysign(MIN_SPEED, error)
+    return int(round(value))
+
+
+class RCController:
+    """
+    Laço de controle rc guiado por rastreamento visual.
+    Args:
+        tello (object): Objeto TelloZune (usa send_rc_control).
+        frame_source (Callable): Retorna (frame BGR, timestamp) mais recente, ou None.
+        hz (int): Frequência do laço.
+    """
+    def __init__(self, tello: object, frame_source: Callable[[], tuple[np.ndarray, float] | None], hz: int = RC_HZ) -> None:
+        self.tello = tello
+        self.frame_source = frame_source
+        self.period = 1.0 / hz
+        self.last_result: dict | None = None
+
+    @staticmethod
+    def is_goal(command: str) -> bool:
+        """Indica se o comando é uma meta do controlador local."""
+        return bool(command) and command.split()[0] in RC_GOAL_COMMANDS
+
+    def _send(self, lr: int, fb: int, ud: int, yaw: int) -> None:
+        self.tello.send_rc_control(lr, fb, ud, yaw) # type: ignore
+
+    @staticmethod
+    def _prepare(frame: np.ndarray) -> np.ndarray:
+        """Reduz o frame para a largura do rastreador."""
+        scale = TRACK_WIDTH / float(frame.shape[1])
+        if scale >= 1.0:
+            return frame
+        return cv2.resize(frame, (TRACK_WIDTH, int(frame.shape[0] * scale)), interpolation=cv2.INTER_AREA)
+
+    def run(self, command: str, token: CancelToken, timeout: float = CONTROL_TIMEOUT_S) -> dict:
+        """
+        Executa uma meta ('align <célula>' ou 'approach <célula>') até concluir, perder o alvo,
+        estourar o tempo ou a missão ser cancelada. O drone sempre termina com velocidade zero.
+        Args:
+            command (str): Meta validada.
+            token (CancelToken): Token de cancelamento da missão.
+            timeout (float): Duração máxima em segundos.
+        Returns:
+            dict: status ('aligned', 'reached', 'lost', 'timeout', 'cancelled', 'no_frame'),
+                  ciclos, duração, frequência efetiva e erro final.
+        """
+        mode, cell = command.split()
+        start = time.perf_counter()
+        result = {'command': command, 'status': 'no_frame', 'ticks': 0, 'duration_s': 0.0, 'hz': 0.0,
+                  'error': (0.0, 0.0), 'area': 0.0}
+        latest = self.frame_source()
+        if latest is None:
+            self.last_result = result
+            return result
+
+        frame, last_ts = latest
+        small = self._prepare(frame)
+        height, width = small.shape[:2]
+        region = cell_region(cell, width, height)
+        tracker = create_tracker()
+        tracker.init(small, region)
+
+        x, y, w, h = region
+        prev_error = ((x + w / 2 - width / 2) / (width / 2), (y + h / 2 - height / 2) / (height / 2))
+        settled = lost = stale = ticks = 0
+        status = 'timeout'
+        try:
+            next_tick = time.perf_counter()
+            while time.perf_counter() - start < timeout:
+                next_tick += self.period
+                if token.wait(max(0.0, next_tick - time.perf_counter())):
+                    status = 'cancelled'
+                    break
+                latest = self.frame_source()
+                if latest is None or latest[1] == last_ts:
+                    # Sem frame novo o drone voaria às cegas com a última velocidade enviada
+                    stale += 1
+                    if stale == STALE_STOP_TICKS:
+                        self._send(0, 0, 0, 0)
+                    if stale >= LOST_TICKS:
+                        status = 'lost'
+                        break
+                    continue
+                stale = 0
+                frame, last_ts = latest
+                ticks += 1
+
+                small = self._prepare(frame)
+                ok, box = tracker.update(small)
+                if not ok:
+                    lost += 1
+                    self._send(0, 0, 0, 0)
+                    if lost >= LOST_TICKS:
+                        status = 'lost'
+                        break
+                    continue
+                lost = 0
+
+                x, y, w, h = box
+                error_x = (x + w / 2 - width / 2) / (width / 2)
+                error_y = (y + h / 2 - height / 2) / (height / 2)
+                area = (w * h) / float(width * height)
+                yaw = axis_speed(error_x, error_x - prev_error[0], KP_YAW, KD_YAW)
+                ud = axis_speed(-error_y, prev_error[1] - error_y, KP_UD, KD_UD) # Alvo abaixo do centro -> descer
+                prev_error = (error_x, error_y)
+                fb = 0
+                if mode == 'approach' and area < APPROACH_AREA and max(abs(error_x), abs(error_y)) < APPROACH_MAX_ERROR:
+                    fb = max(MIN_SPEED, min(MAX_SPEED, int(KP_FB * (APPROACH_AREA - area) / APPROACH_AREA)))
+                self._send(0, fb, ud, yaw)
+
+                result['error'] = (round(error_x, 3), round(error_y, 3))
+                result['area'] = round(area, 3)
+                centered = abs(error_x) < CENTER_TOLERANCE and abs(error_y) < CENTER_TOLERANCE
+                arrived = mode != 'approach' or area >= APPROACH_AREA
+                settled = settled + 1 if centered and arrived else 0
+                if settled >= SETTLE_TICKS:
+                    status = 'reached' if mode == 'approach' else 'aligned'
+                    break
+        finally:
+            self._send(0, 0, 0, 0)
+
+        duration = time.perf_counter() - start
+        result.update(status=status, ticks=ticks, duration_s=round(duration, 2),
+                      hz=round(ticks / duration, 1) if duration > 0 else 0.0)
+        self.last_result = result
+        print(f"Controle rc: {command} -> {status} em {duration:.1f}s ({ticks} ciclos, {result['hz']} Hz).")
+        return result
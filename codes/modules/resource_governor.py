@@ -0,0 +1,158 @@
+"""
+Governador de recursos de CPU da estação de solo.
+Em PCs com poucos núcleos, o pool interno do OpenCV, as codificações do PIL, o BLAS/OpenMP do
+NumPy e o loop do Tk disputam os mesmos núcleos. O governador aplica, na inicialização, limites
+de threads por componente e, opcionalmente, fixa os trabalhadores de vídeo, exibição (Tk), IA e
+áudio em conjuntos de CPUs. A configuração vem de `resource_governor.json`, escrito pelo
+`benchmarks/governor_matrix.py` com a melhor combinação medida na máquina.
+
+Os limites de BLAS/OpenMP só valem se as variáveis de ambiente forem definidas antes do primeiro
+import do NumPy/OpenCV, por isso `configure()` é chamado no topo de main.py e este módulo não os
+importa no nível superior. A fixação usa `os.sched_setaffinity` por thread (Linux); nos demais
+sistemas ela é ignorada.
+"""
+import json
+import os
+import threading
+
+CONFIG_PATH = 'resource_governor.json'
+BLAS_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'NUMEXPR_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS')
+ROLES = ('video', 'render', 'ai', 'audio')
+DEFAULT_CONFIG = {
+    'cv2_threads': 2, # Pool do OpenCV no processo da GUI (vídeo, exibição, keyframes)
+    'worker_cv2_threads': 1, # Pool do OpenCV no processo de preparo da IA
+    'blas_threads': 1, # BLAS/OpenMP do NumPy
+    'pinning': 'off', # 'off', 'auto' ou {papel: [cpus]}
+}
+
+config = dict(DEFAULT_CONFIG) # Configuração ativa
+layout: dict[str, list[int]] = {} # CPUs de cada papel, vazio sem fixação
+pinned: dict[str, list[str]] = {role: [] for role in ROLES} # Threads/processos fixados por papel
+
+
+def available_cpus() -> list[int]:
+    """CPUs que o processo pode usar (respeita taskset/cgroups no Linux)."""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def auto_layout(cpus: list[int]) -> dict[str, list[int]]:
+    """
+    Divide as CPUs entre os papéis: vídeo e áudio (leves e periódicos) dividem o primeiro núcleo,
+    o Tk fica com o segundo e a IA com o restante.
+    Args:
+        cpus (list[int]): CPUs disponíveis.
+    Returns:
+        dict[str, list[int]]: CPUs por papel, vazio com um único núcleo.
+    """
+    if len(cpus) < 2:
+        return {}
+    if len(cpus) == 2:
+        return {'video': [cpus[0]], 'audio': [cpus[0]], 'render': [cpus[1]], 'ai': [cpus[1]]}
+    return {'video': [cpus[0]], 'audio': [cpus[0]], 'render': [cpus[1]], 'ai': cpus[2:]}
+
+def load_config(path: str = CONFIG_PATH) -> dict:
+    """
+    Lê a configuração salva pelo benchmark, completando com os padrões.
+    Args:
+        path (str): Arquivo JSON.
+    Returns:
+        dict: Configuração completa.
+    """
+    loaded = {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            loaded = json.load(f)
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"Configuração do governador ilegível ({e}); usando os padrões.")
+    return {**DEFAULT_CONFIG, **{key: value for key, value in loaded.items() if key in DEFAULT_CONFIG}}
+
+def save_config(new_config: dict, path: str = CONFIG_PATH) -> None:
+    """Grava a configuração escolhida (usado pelo benchmark)."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({key: new_config[key] for key in DEFAULT_CONFIG}, f, indent=2)
+
+def configure(new_config: dict | None = None) -> dict:
+    """
+    Ativa a configuração e define os limites de BLAS/OpenMP. Deve rodar antes do import do NumPy;
+    variáveis já definidas pelo operador são respeitadas.
+    Args:
+        new_config (dict | None): Configuração explícita; sem ela, lê CONFIG_PATH.
+    Returns:
+        dict: Configuração ativa.
+    """
+    global layout
+    config.clear()
+    config.update(new_config if new_config is not None else load_config())
+    for name in BLAS_ENV_VARS:
+        os.environ.setdefault(name, str(config['blas_threads']))
+    pinning = config['pinning']
+    if pinning == 'auto':
+        layout = auto_layout(available_cpus())
+    elif isinstance(pinning, dict):
+        cpus = set(available_cpus())
+        layout = {role: [cpu for cpu in pinning.get(role, []) if cpu in cpus] for role in ROLES if pinning.get(role)}
+    else:
+        layout = {}
+    return config
+
+def apply_library_limits() -> None:
+    """Aplica o limite do pool do OpenCV e, se o threadpoolctl estiver instalado, reforça o do BLAS."""
+    import cv2
+    cv2.setNumThreads(config['cv2_threads'])
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+    threadpool_limits(config['blas_threads']) # Vale mesmo se o NumPy já tiver sido importado
+
+def pin(role: str, native_id: int = 0, name: str = '') -> bool:
+    """
+    Fixa uma thread (ou processo) nas CPUs do papel. No Linux a afinidade é por thread, e as
+    threads criadas depois herdam a da thread que as criou.
+    Args:
+        role (str): Um dos ROLES.
+        native_id (int): `native_id` da thread ou pid do processo; 0 é a thread atual.
+        name (str): Nome exibido no relatório.
+    Returns:
+        bool: True se a afinidade foi aplicada.
+    """
+    cpus = layout.get(role)
+    if not cpus or not hasattr(os, 'sched_setaffinity'):
+        return False
+    try:
+        os.sched_setaffinity(native_id, cpus)
+    except OSError as e:
+        print(f"Não foi possível fixar '{name or role}' nas CPUs {cpus}: {e}")
+        return False
+    pinned[role].append(name or threading.current_thread().name)
+    return True
+
+def pin_thread(role: str, thread: threading.Thread | None) -> bool:
+    """
+    Fixa uma thread já iniciada nas CPUs do papel.
+    Args:
+        role (str): Um dos ROLES.
+        thread (threading.Thread | None): Thread a fixar (ignorada se None ou não iniciada).
+    Returns:
+        bool: True se a afinidade foi aplicada.
+    """
+    if thread is None or not thread.native_id:
+        return False
+    return pin(role, thread.native_id, thread.name)
+
+def report() -> dict:
+    """
+    Retorna os limites aplicados e as fixações feitas.
+    Returns:
+        dict: {'cv2_threads', 'worker_cv2_threads', 'blas_threads', 'layout', 'pinned'}
+    """
+    return {
+        'cv2_threads': config['cv2_threads'],
+        'worker_cv2_threads': config['worker_cv2_threads'],
+        'blas_threads': {name: os.environ.get(name) for name in BLAS_ENV_VARS[:2]},
+        'layout': layout,
+        'pinned': {role: names for role, names in pinned.items() if names},
+    }
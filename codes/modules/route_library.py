@@ -0,0 +1,213 @@
+"""
+Biblioteca de rotas conhecidas.
+Missões concluídas com sucesso são guardadas como objetivo normalizado, comandos
+validados e assinaturas compactas do frame em cada passo. Quando o mesmo objetivo
+aparece de novo, a rota é repetida sem chamar a IA, conferindo apenas a assinatura
+do frame em cada ponto de controle.
+"""
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+
+from PIL import Image
+
+ROUTES_PATH = 'routes/routes.json'
+SIGNATURE_MAX_DISTANCE = 14 # Distância de Hamming máxima (de 64 bits) para aceitar o ponto de controle
+MIN_SIMILARITY = 0.85 # Similaridade mínima (Jaccard) entre objetivos não idênticos
+# Palavras que mudam o destino ou o sentido do objetivo: precisam coincidir exatamente na busca por similaridade
+EXACT_TOKENS = {'nao', 'nunca', 'nem', 'sem', 'dois', 'duas', 'tres', 'quatro', 'cinco', 'seis', 'sete', 'oito', 'nove', 'dez'}
+STOPWORDS = {
+    'o', 'a', 'os', 'as', 'um', 'uma', 'de', 'do', 'da', 'dos', 'das', 'e', 'em', 'no', 'na',
+    'para', 'pra', 'por', 'favor', 'drone', 'ate', 'ao', 'aos', 'se', 'que', 'me',
+}
+
+
+def normalize_objective(text: str) -> str:
+    """
+    Normaliza o objetivo para busca: minúsculas, sem acentos, sem pontuação e sem palavras vazias.
+    Args:
+        text (str): Objetivo informado pelo usuário.
+    Returns:
+        str: Objetivo normalizado.
+    """
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    tokens = re.findall(r'[a-z0-9]+', text)
+    return ' '.join(t for t in tokens if t not in STOPWORDS)
+
+def frame_signature(image: Image.Image) -> str:
+    """
+    Calcula a assinatura compacta (dHash de 64 bits) de um frame.
+    Args:
+        image (Image.Image): Frame da câmera.
+    Returns:
+        str: Assinatura em hexadecimal (16 caracteres).
+    """
+    small = image.convert('L').resize((9, 8), Image.Resampling.BILINEAR)
+    pixels = list(small.getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            bits = (bits << 1) | (1 if left > right else 0)
+    return f'{bits:016x}'
+
+def signature_distance(a: str, b: str) -> int:
+    """Distância de Hamming entre duas assinaturas."""
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+def exact_tokens(tokens: set[str]) -> set[str]:
+    """Números e negações do objetivo normalizado, que a similaridade de palavras não pode relevar."""
+    return {t for t in tokens if t.isdigit() or t in EXACT_TOKENS}
+
+
+class RouteLibrary:
+    """
+    Rotas persistidas em JSON com índice exato e índice invertido por palavra.
+    Args:
+        path (str): Arquivo onde as rotas são salvas.
+    """
+    def __init__(self, path: str = ROUTES_PATH) -> None:
+        self.path = path
+        self.routes: dict[int, dict] = {}
+        self.by_objective: dict[str, list[int]] = {} # Objetivo normalizado -> ids
+        self.by_token: dict[str, set[int]] = {} # Palavra -> ids (busca aproximada)
+        self.next_id = 0
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self) -> None:
+        """Carrega as rotas salvas e reconstrói os índices."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                routes = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Erro ao carregar rotas: {e}")
+            return
+        for route in routes:
+            self._index(route)
+        print(f"{len(self.routes)} rota(s) carregada(s).")
+
+    def save(self) -> None:
+        """Grava as rotas de forma atômica (arquivo temporário + rename)."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with self.lock:
+            routes = list(self.routes.values())
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(routes, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def _index(self, route: dict) -> None:
+        route_id = route['id']
+        self.routes[route_id] = route
+        self.by_objective.setdefault(route['normalized'], []).append(route_id)
+        for token in set(route['normalized'].split()):
+            self.by_token.setdefault(token, set()).add(route_id)
+        self.next_id = max(self.next_id, route_id + 1)
+
+    def add(self, objective: str, commands: list[str], signatures: list[str]) -> dict | None:
+        """
+        Guarda uma missão concluída. Rotas idênticas já existentes só têm o contador atualizado.
+        Args:
+            objective (str): Objetivo original.
+            commands (list[str]): Comandos validados, em ordem.
+            signatures (list[str]): Assinatura do frame antes de cada comando.
+        Returns:
+            dict | None: Rota guardada, ou None se a missão não tinha comandos.
+        """
+        normalized = normalize_objective(objective)
+        if not commands or not normalized or len(commands) != len(signatures):
+            return None
+        with self.lock:
+            for route_id in self.by_objective.get(normalized, []):
+                route = self.routes[route_id]
+                if route['commands'] == commands:
+                    route['successes'] += 1
+                    route['signatures'] = signatures # Mantém as assinaturas mais recentes do ambiente
+                    break
+            else:
+                route = {
+                    'id': self.next_id,
+                    'objective': objective,
+                    'normalized': normalized,
+                    'commands': commands,
+                    'signatures': signatures,
+                    'created': time.time(),
+                    'successes': 1,
+                    'replays': 0,
+                    'mismatches': 0,
+                }
+                self._index(route)
+        self.save()
+        return route
+
+    def match(self, objective: str) -> dict | None:
+        """
+        Procura uma rota para o objetivo: primeiro por igualdade, depois por similaridade de palavras.
+        Na similaridade, números e negações precisam ser os mesmos ("sala 3" não repete a rota da
+        "sala 4", nem "não passe pela porta" a de "passe pela porta").
+        Args:
+            objective (str): Objetivo informado.
+        Returns:
+            dict | None: Rota mais confiável para o objetivo, ou None.
+        """
+        normalized = normalize_objective(objective)
+        if not normalized:
+            return None
+        with self.lock:
+            candidates = list(self.by_objective.get(normalized, []))
+            if not candidates:
+                tokens = set(normalized.split())
+                required = exact_tokens(tokens)
+                # Só avalia rotas que compartilham ao menos uma palavra (índice invertido)
+                scored = {}
+                for token in tokens:
+                    for route_id in self.by_token.get(token, ()):
+                        if route_id in scored:
+                            continue
+                        route_tokens = set(self.routes[route_id]['normalized'].split())
+                        if exact_tokens(route_tokens) != required:
+                            scored[route_id] = 0.0
+                            continue
+                        scored[route_id] = len(tokens & route_tokens) / len(tokens | route_tokens)
+                candidates = [rid for rid, sim in scored.items() if sim >= MIN_SIMILARITY]
+            if not candidates:
+                return None
+            return max((self.routes[rid] for rid in candidates),
+                       key=lambda r: r['successes'] - r['mismatches'])
+
+    def record_replay(self, route: dict, completed: bool) -> None:
+        """
+        Atualiza as estatísticas da rota após uma repetição.
+        Args:
+            route (dict): Rota repetida.
+            completed (bool): True se todos os pontos de controle conferiram.
+        """
+        with self.lock:
+            route['replays'] += 1
+            if not completed:
+                route['mismatches'] += 1
+        self.save()
+
+    @staticmethod
+    def checkpoint_matches(route: dict, step: int, signature: str) -> tuple[bool, int]:
+        """
+        Confere a assinatura do frame atual com a gravada para o passo.
+        Args:
+            route (dict): Rota sendo repetida.
+            step (int): Índice do passo.
+            signature (str): Assinatura do frame atual (frame_signature).
+        Returns:
+            tuple[bool, int]: (confere, distância de Hamming)
+        """
+        distance = signature_distance(signature, route['signatures'][step])
+        return distance <= SIGNATURE_MAX_DISTANCE, distance
@@ -0,0 +1,307 @@
+"""
+Servidor local de vídeo ao vivo para supervisores em outras máquinas.
+Cada frame é codificado em JPEG uma única vez, em thread própria, e o mesmo buffer é
+distribuído a todos os clientes (MJPEG por HTTP ou WebSocket). Cada cliente tem sua própria
+thread e sempre envia o frame mais recente: um cliente lento pula frames sem atrasar o
+codificador nem os outros clientes. O status da missão e do passo pode ser sobreposto ao vídeo.
+
+Endpoints:
+    /            página com o vídeo
+    /stream.mjpg MJPEG (multipart/x-mixed-replace)
+    /ws          WebSocket, um frame JPEG por mensagem binária
+    /stats       métricas em JSON
+"""
+import base64
+import hashlib
+import json
+import socket
+import struct
+import threading
+import time
+import unicodedata
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+STREAM_PORT = 8080
+STREAM_WIDTH = 640 # Largura do vídeo transmitido (a altura segue a proporção)
+STREAM_JPEG_QUALITY = 70
+STREAM_MAX_FPS = 30 # Limite de codificação
+SEND_TIMEOUT_S = 5.0 # Cliente que não recebe nada por este tempo é desconectado
+BOUNDARY = 'frame'
+WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11' # RFC 6455
+
+INDEX_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>Tello ao vivo</title></head>
+<body style="margin:0;background:#262626">
+<img src="/stream.mjpg" style="display:block;margin:auto;max-width:100%">
+</body></html>"""
+
+
+class StreamClient:
+    """Contadores de um cliente conectado."""
+    def __init__(self, kind: str, address: str) -> None:
+        self.kind = kind
+        self.address = address
+        self.connected_at = time.time()
+        self.frames_sent = 0
+        self.frames_skipped = 0 # Frames codificados que o cliente não recebeu por estar lento
+        self.bytes_sent = 0
+
+    def snapshot(self) -> dict:
+        elapsed = max(time.time() - self.connected_at, 1e-6)
+        return {
+            'kind': self.kind,
+            'address': self.address,
+            'seconds': round(elapsed, 1),
+            'fps': round(self.frames_sent / elapsed, 1),
+            'frames_sent': self.frames_sent,
+            'frames_skipped': self.frames_skipped,
+            'kbytes_sent': self.bytes_sent // 1024,
+        }
+
+
+class StreamHandler(BaseHTTPRequestHandler):
+    server: 'StreamServer'
+
+    def do_GET(self) -> None:
+        path = self.path.split('?')[0].rstrip('/') or '/'
+        if path == '/':
+            self._send_body(200, 'text/html; charset=utf-8', INDEX_PAGE.encode('utf-8'))
+        elif path == '/stats':
+            self._send_body(200, 'application/json', json.dumps(self.server.stats()).encode('utf-8'))
+        elif path == '/stream.mjpg':
+            self._stream_mjpeg()
+        elif path == '/ws' and self.headers.get('Upgrade', '').lower() == 'websocket':
+            self._stream_websocket()
+        else:
+            self._send_body(404, 'text/plain', b'not found')
+
+    def _send_body(self, status: int, content_type: str, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_mjpeg(self) -> None:
+        self.send_response(200)
+        self.send_header('Content-Type', f'multipart/x-mixed-replace; boundary={BOUNDARY}')
+        self.send_header('Cache-Control', 'no-cache, private')
+        self.send_header('Pragma', 'no-cache')
+        self.end_headers()
+
+        def write(jpeg: bytes) -> int:
+            header = f'--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n'.encode('ascii')
+            self.wfile.write(header)
+            self.wfile.write(jpeg)
+            self.wfile.write(b'\r\n')
+            return len(header) + len(jpeg) + 2
+
+        self.server.serve_client('mjpeg', self.client_address[0], self.connection, write)
+
+    def _stream_websocket(self) -> None:
+        key = self.headers.get('Sec-WebSocket-Key', '')
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode('ascii')).digest()).decode('ascii')
+        self.send_response(101, 'Switching Protocols')
+        self.send_header('Upgrade', 'websocket')
+        self.send_header('Connection', 'Upgrade')
+        self.send_header('Sec-WebSocket-Accept', accept)
+        self.end_headers()
+
+        def write(jpeg: bytes) -> int:
+            length = len(jpeg)
+            if length < 126:
+                header = struct.pack('!BB', 0x82, length)
+            elif length < 1 << 16:
+                header = struct.pack('!BBH', 0x82, 126, length)
+            else:
+                header = struct.pack('!BBQ', 0x82, 127, length)
+            self.wfile.write(header)
+            self.wfile.write(jpeg)
+            return len(header) + length
+
+        self.server.serve_client('websocket', self.client_address[0], self.connection, write)
+        self.close_connection = True
+
+    def log_message(self, format: str, *args) -> None:
+        pass # Sem log por requisição
+
+
+class StreamServer(ThreadingHTTPServer):
+    """
+    Servidor HTTP com codificação única e distribuição do mesmo JPEG a todos os clientes.
+    Args:
+        port (int): Porta (0 escolhe uma livre).
+        host (str): Interface de escuta ('0.0.0.0' para outras máquinas).
+        width (int): Largura do vídeo transmitido.
+        quality (int): Qualidade JPEG.
+        max_fps (int): Limite de frames codificados por segundo.
+    """
+    daemon_threads = True
+
+    def __init__(self, port: int = STREAM_PORT, host: str = '0.0.0.0', width: int = STREAM_WIDTH,
+                 quality: int = STREAM_JPEG_QUALITY, max_fps: int = STREAM_MAX_FPS) -> None:
+        super().__init__((host, port), StreamHandler)
+        self.width = width
+        self.quality = quality
+        self.min_interval = 1 / max_fps
+        self.pending: np.ndarray | None = None # Frame mais recente ainda não codificado
+        self.pending_event = threading.Event()
+        self.frame_cond = threading.Condition()
+        self.jpeg: bytes | None = None
+        self.seq = 0 # Número do último frame codificado
+        self.status: str | None = None
+        self.overlay: str | None = None # Status em ASCII: as fontes Hershey do OpenCV não desenham acentos
+        self.clients: set[StreamClient] = set()
+        self.clients_lock = threading.Lock()
+        self.frames_encoded = 0
+        self.encode_ms = 0.0 # Média móvel do tempo de codificação
+        self.running = False
+        self.threads: list[threading.Thread] = []
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{"127.0.0.1" if host == "0.0.0.0" else host}:{port}'
+
+    def start(self) -> str:
+        """Inicia o servidor e o codificador em segundo plano e retorna a URL base."""
+        if self.running:
+            return self.url
+        self.running = True
+        self.threads = [
+            threading.Thread(target=self._encode_loop, name='StreamEncoder', daemon=True),
+            threading.Thread(target=self.serve_forever, name='StreamServer', daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+        print(f"Servidor de vídeo em {self.url}/ (MJPEG: /stream.mjpg, WebSocket: /ws)")
+        return self.url
+
+    def stop(self) -> None:
+        """Encerra o servidor, o codificador e as conexões dos clientes."""
+        if not self.running:
+            return
+        self.running = False
+        self.pending_event.set()
+        with self.frame_cond:
+            self.frame_cond.notify_all()
+        self.shutdown()
+        self.server_close()
+
+    def submit(self, frame: np.ndarray) -> None:
+        """
+        Entrega o frame BGR mais recente ao codificador sem bloquear.
+        Sem clientes conectados nada é codificado.
+        Args:
+            frame (np.ndarray): Frame BGR vindo do fluxo de vídeo.
+        """
+        if self.running and self.clients and isinstance(frame, np.ndarray):
+            self.pending = frame
+            self.pending_event.set()
+
+    def set_status(self, text: str | None) -> None:
+        """
+        Define o texto sobreposto ao vídeo (missão e passo atuais).
+        Args:
+            text (str | None): Texto a exibir, ou None para remover.
+        """
+        self.overlay = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii') if text else None
+        self.status = text
+
+    def _encode_loop(self) -> None:
+        """Codifica o frame pendente mais recente e acorda os clientes."""
+        last_encode = 0.0
+        while self.running:
+            self.pending_event.wait(1.0)
+            self.pending_event.clear()
+            frame, self.pending = self.pending, None
+            if frame is None or not self.running:
+                continue
+            wait = self.min_interval - (time.perf_counter() - last_encode)
+            if wait > 0:
+                time.sleep(wait)
+                frame = self.pending if self.pending is not None else frame # Pega o mais novo após a espera
+                self.pending = None
+            last_encode = time.perf_counter()
+            try:
+                jpeg = self._encode(frame)
+            except Exception as e:
+                print(f"Erro ao codificar frame para transmissão: {e}")
+                continue
+            elapsed_ms = (time.perf_counter() - last_encode) * 1000
+            self.encode_ms = elapsed_ms if not self.frames_encoded else 0.9 * self.encode_ms + 0.1 * elapsed_ms
+            with self.frame_cond:
+                self.jpeg = jpeg
+                self.seq += 1
+                self.frames_encoded += 1
+                self.frame_cond.notify_all()
+
+    def _encode(self, frame: np.ndarray) -> bytes:
+        """Redimensiona, sobrepõe o status e codifica o frame em JPEG."""
+        height, width = frame.shape[:2]
+        if width != self.width:
+            frame = cv2.resize(frame, (self.width, int(height * self.width / width)), interpolation=cv2.INTER_AREA)
+        else:
+            frame = frame.copy() # O texto não pode alterar o frame da interface
+        overlay = self.overlay
+        if overlay:
+            cv2.rectangle(frame, (0, 0), (frame.shape[1], 28), (0, 0, 0), -1)
+            cv2.putText(frame, overlay, (8, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (255, 255, 255), 1, cv2.LINE_AA)
+        ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            raise ValueError('cv2.imencode falhou')
+        return buffer.tobytes()
+
+    def serve_client(self, kind: str, address: str, connection: socket.socket, write) -> None:
+        """
+        Envia sempre o frame codificado mais recente a um cliente, até ele desconectar.
+        Args:
+            kind (str): 'mjpeg' ou 'websocket'.
+            address (str): Endereço do cliente.
+            connection (socket.socket): Socket do cliente.
+            write (Callable[[bytes], int]): Escreve um JPEG no formato do protocolo e retorna os bytes enviados.
+        """
+        client = StreamClient(kind, address)
+        connection.settimeout(SEND_TIMEOUT_S)
+        with self.clients_lock:
+            self.clients.add(client)
+        print(f"Cliente de vídeo conectado ({kind}, {address}).")
+        last_seq = self.seq
+        try:
+            while self.running:
+                with self.frame_cond:
+                    if not self.frame_cond.wait_for(lambda: self.seq != last_seq or not self.running, timeout=1.0):
+                        continue
+                    jpeg, seq = self.jpeg, self.seq
+                if not self.running or jpeg is None:
+                    break
+                if last_seq and seq - last_seq > 1:
+                    client.frames_skipped += seq - last_seq - 1
+                last_seq = seq
+                client.bytes_sent += write(jpeg)
+                client.frames_sent += 1
+        except (OSError, ValueError):
+            pass # Cliente desconectou ou não recebe há SEND_TIMEOUT_S
+        finally:
+            with self.clients_lock:
+                self.clients.discard(client)
+            print(f"Cliente de vídeo desconectado ({kind}, {address}): {client.frames_sent} frames enviados, "
+                  f"{client.frames_skipped} pulados.")
+
+    def stats(self) -> dict:
+        """
+        Retorna as métricas do servidor e de cada cliente.
+        Returns:
+            dict: Frames codificados, tempo médio de codificação e contadores por cliente.
+        """
+        with self.clients_lock:
+            clients = [client.snapshot() for client in self.clients]
+        return {
+            'frames_encoded': self.frames_encoded,
+            'encode_ms': round(self.encode_ms, 2),
+            'status': self.status,
+            'clients': clients,
+        }
@@ -1,8 +1,22 @@
+from queue import Empty
+
 VALID_COMMANDS = [
     'takeoff', 'land', 'up', 'down', 'left', 'right', 'forward', 'back', 'cw', 'ccw'
 ]
 response = ''
 log_messages = []
+MAX_LOG_MESSAGES = 500 # Mantém o log limitado em sessões longas
+
+def append_log(message: str) -> None:
+     """
+     Adiciona uma mensagem ao log, descartando as mais antigas acima de MAX_LOG_MESSAGES.
+     A lista é alterada no lugar, pois outros módulos guardam a mesma referência.
+     Args:
+         message (str): Mensagem a ser registrada.
+     """
+     log_messages.append(message)
+     if len(log_messages) > MAX_LOG_MESSAGES:
+         del log_messages[:-MAX_LOG_MESSAGES]
 
 def process_ai_command(tello: object, command: str) -> None:
      """
@@ -14,3 +28,25 @@ def process_ai_command(tello: object, command: str) -> None:
      base_cmd = command.split()[0] if ' ' in command else command # Caso tenha espaço, pega apenas o comando
      if base_cmd in VALID_COMMANDS:
         tello.add_command(command) # type: ignore
+
+def flush_commands(tello: object) -> int:
+     """
+     Esvazia a fila de comandos pendentes do drone (usado ao abortar uma missão).
+     Args:
+         tello (object): Objeto da classe TelloZune.
+     Returns:
+         int: Quantidade de comandos descartados.
+     """
+     command_queue = getattr(tello, 'command_queue', None)
+     if command_queue is None:
+         return 0
+     flushed = 0
+     while True:
+         try:
+             command_queue.get_nowait()
+             flushed += 1
+         except Empty:
+             break
+     if flushed:
+         print(f"{flushed} comando(s) pendente(s) descartado(s).")
+     return flushed
@@ -0,0 +1,141 @@
+"""
+Watchdog do loop de eventos do Tk.
+Um batimento agendado com `root.after` mede o atraso entre o horário previsto e o disparo
+real de cada callback; os atrasos alimentam um histograma da sessão. Uma thread monitora o
+último batimento: se o loop ficar parado além do limite, a pilha da thread do Tk é capturada
+*enquanto* ela está bloqueada (ex.: `tello.get_info()` ou um `messagebox`) e registrada no log.
+"""
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+WATCHDOG_INTERVAL_MS = 50 # Período do batimento
+STALL_THRESHOLD_MS = 250 # Atraso a partir do qual a pilha do Tk é capturada
+LAG_BUCKETS_MS = (5, 10, 20, 50, 100, 250, 500, 1000, 2000) # Limites superiores do histograma
+STALL_LOG_PATH = os.path.join('logs', 'tk_stalls.log')
+MAX_STALLS_KEPT = 50
+
+
+class TkWatchdog:
+    """
+    Mede o atraso dos callbacks do Tk e captura a pilha quando o loop trava.
+    Deve ser criado e iniciado na thread do Tk.
+    Args:
+        root: Janela raiz do Tk.
+        interval_ms (int): Período do batimento.
+        threshold_ms (int): Atraso que caracteriza um travamento.
+        log_path (str): Arquivo onde as pilhas capturadas são gravadas.
+    """
+    def __init__(self, root, interval_ms: int = WATCHDOG_INTERVAL_MS, threshold_ms: int = STALL_THRESHOLD_MS,
+                 log_path: str = STALL_LOG_PATH) -> None:
+        self.root = root
+        self.interval_ms = interval_ms
+        self.threshold_ms = threshold_ms
+        self.log_path = log_path
+        self.tk_thread_id: int | None = None
+        self.expected = 0.0 # Horário previsto do próximo batimento (perf_counter)
+        self.histogram = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self.recent_lags_ms: deque[float] = deque(maxlen=1000 // interval_ms) # Último segundo
+        self.max_lag_ms = 0.0
+        self.ticks = 0
+        self.stalls: deque[dict] = deque(maxlen=MAX_STALLS_KEPT)
+        self.stall_count = 0
+        self.running = False
+        self.monitor: threading.Thread | None = None
+        self.stop_event = threading.Event()
+
+    def start(self) -> None:
+        """Agenda o primeiro batimento e inicia a thread de monitoramento."""
+        if self.running:
+            return
+        self.running = True
+        self.tk_thread_id = threading.get_ident()
+        self.stop_event.clear()
+        self.expected = time.perf_counter() + self.interval_ms / 1000
+        self.root.after(self.interval_ms, self._tick)
+        self.monitor = threading.Thread(target=self._monitor, name='TkWatchdog', daemon=True)
+        self.monitor.start()
+
+    def stop(self) -> None:
+        """Encerra o monitoramento e imprime o histograma da sessão."""
+        if not self.running:
+            return
+        self.running = False
+        self.stop_event.set()
+        print(f"Watchdog do Tk: {self.format_report()}")
+
+    def _tick(self) -> None:
+        """Batimento na thread do Tk: registra o atraso e agenda o próximo."""
+        if not self.running:
+            return
+        now = time.perf_counter()
+        lag_ms = max(0.0, (now - self.expected) * 1000)
+        self.ticks += 1
+        self.histogram[self._bucket(lag_ms)] += 1
+        self.recent_lags_ms.append(lag_ms)
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        self.expected = now + self.interval_ms / 1000
+        self.root.after(self.interval_ms, self._tick)
+
+    @staticmethod
+    def _bucket(lag_ms: float) -> int:
+        for index, limit in enumerate(LAG_BUCKETS_MS):
+            if lag_ms < limit:
+                return index
+        return len(LAG_BUCKETS_MS)
+
+    def _monitor(self) -> None:
+        """Captura a pilha do Tk uma vez por travamento, enquanto ele dura."""
+        captured_for = None # Batimento esperado para o qual a pilha já foi capturada
+        while not self.stop_event.wait(self.threshold_ms / 4000):
+            expected = self.expected
+            lag_ms = (time.perf_counter() - expected) * 1000
+            if lag_ms < self.threshold_ms or captured_for == expected:
+                continue
+            captured_for = expected
+            frame = sys._current_frames().get(self.tk_thread_id) # type: ignore
+            if frame is None:
+                continue
+            summary = traceback.extract_stack(frame)
+            where = f"{summary[-1].name} ({os.path.basename(summary[-1].filename)}:{summary[-1].lineno})"
+            self._log_stall(lag_ms, where, ''.join(summary.format()))
+
+    def _log_stall(self, lag_ms: float, where: str, stack: str) -> None:
+        self.stall_count += 1
+        stall = {'ts': time.strftime('%Y-%m-%d %H:%M:%S'), 'lag_ms': round(lag_ms, 1), 'where': where, 'stack': stack}
+        self.stalls.append(stall)
+        print(f"Loop do Tk parado há {lag_ms:.0f} ms em {where}; pilha gravada em '{self.log_path}'.")
+        try:
+            os.makedirs(os.path.dirname(self.log_path) or '.', exist_ok=True)
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(f"=== {stall['ts']} | Tk parado há {stall['lag_ms']} ms ===\n{stack}\n")
+        except OSError as e:
+            print(f"Não foi possível gravar o log do watchdog: {e}")
+
+    def recent_max_ms(self) -> float:
+        """Maior atraso do último segundo (ms)."""
+        return max(self.recent_lags_ms, default=0.0)
+
+    def report(self) -> dict:
+        """
+        Retorna o histograma de atrasos da sessão.
+        Returns:
+            dict: Batimentos, atraso máximo, travamentos e contagem por faixa ('<5ms', ..., '>=2000ms').
+        """
+        labels = [f'<{limit}ms' for limit in LAG_BUCKETS_MS] + [f'>={LAG_BUCKETS_MS[-1]}ms']
+        return {
+            'ticks': self.ticks,
+            'max_lag_ms': round(self.max_lag_ms, 1),
+            'stalls': self.stall_count,
+            'histogram': dict(zip(labels, self.histogram)),
+        }
+
+    def format_report(self) -> str:
+        """Histograma em uma linha, só com as faixas não vazias."""
+        report = self.report()
+        buckets = ', '.join(f'{label}: {count}' for label, count in report['histogram'].items() if count)
+        return (f"{report['ticks']} batimentos, atraso máximo {report['max_lag_ms']} ms, "
+                f"{report['stalls']} travamento(s) | {buckets}")
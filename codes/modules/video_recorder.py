@@ -0,0 +1,167 @@
+"""
+Gravação de vídeo em segundo plano, dividida em segmentos por tempo.
+A thread da interface apenas enfileira os frames; a codificação com OpenCV VideoWriter
+acontece em uma thread própria. Se o codificador ficar para trás, frames são descartados
+e contados, sem bloquear a interface nem o loop da IA.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from typing import TextIO
+
+import cv2
+import numpy as np
+
+RECORDINGS_DIR = 'recordings'
+SEGMENT_SECONDS = 60 # Duração de cada arquivo de vídeo
+RECORD_FPS = 30
+QUEUE_SIZE = 64 # Frames pendentes antes de começar a descartar
+FOURCC = 'mp4v'
+SEGMENT_EXTENSION = '.mp4'
+
+
+class VideoRecorder:
+    """
+    Gravador com fila limitada e codificação em thread separada.
+    Cada segmento gera um arquivo de vídeo e um índice .jsonl com o timestamp de cada frame
+    e os marcadores de passo da missão.
+    Args:
+        output_dir (str): Pasta onde os segmentos serão salvos.
+        fps (int): Taxa de quadros declarada nos arquivos.
+        segment_seconds (float): Duração de cada segmento.
+        queue_size (int): Tamanho máximo da fila de frames.
+    """
+    def __init__(self, output_dir: str = RECORDINGS_DIR, fps: int = RECORD_FPS,
+                 segment_seconds: float = SEGMENT_SECONDS, queue_size: int = QUEUE_SIZE) -> None:
+        self.output_dir = output_dir
+        self.fps = fps
+        self.segment_seconds = segment_seconds
+        self.frames: queue.Queue[tuple[float, np.ndarray] | None] = queue.Queue(maxsize=queue_size)
+        self.markers: queue.Queue[dict] = queue.Queue() # Marcadores nunca são descartados
+        self.thread: threading.Thread | None = None
+        self.running = False
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.segments: list[str] = []
+
+    def start(self) -> None:
+        """Inicia a thread de codificação."""
+        if self.running:
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.running = True
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.thread = threading.Thread(target=self._run, name='VideoRecorder', daemon=True)
+        self.thread.start()
+        print(f"Gravação de vídeo iniciada em '{self.output_dir}'.")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Encerra a gravação e aguarda a thread finalizar o segmento atual.
+        Args:
+            timeout (float): Tempo máximo de espera pela thread.
+        """
+        if not self.running:
+            return
+        self.running = False
+        while True:
+            try:
+                self.frames.put_nowait(None) # Sinal de parada
+                break
+            except queue.Full:
+                try:
+                    self.frames.get_nowait() # Abre espaço descartando o frame mais antigo
+                    self.frames_dropped += 1
+                except queue.Empty:
+                    pass
+        if self.thread:
+            self.thread.join(timeout)
+        print(f"Gravação encerrada: {self.frames_written} frames gravados, {self.frames_dropped} descartados, "
+              f"{len(self.segments)} segmento(s).")
+
+    def submit(self, frame: np.ndarray, timestamp: float | None = None) -> bool:
+        """
+        Enfileira um frame BGR sem bloquear.
+        Args:
+            frame (np.ndarray): Frame BGR vindo do fluxo de vídeo.
+            timestamp (float | None): Momento de captura (time.time()). Usa o atual se None.
+        Returns:
+            bool: False se o frame foi descartado porque a fila estava cheia.
+        """
+        if not self.running or not isinstance(frame, np.ndarray):
+            return False
+        try:
+            self.frames.put_nowait((timestamp or time.time(), frame))
+            return True
+        except queue.Full:
+            self.frames_dropped += 1
+            return False
+
+    def mark(self, event: str, **info) -> None:
+        """
+        Registra um marcador (ex.: passo da missão) no índice do segmento atual.
+        Args:
+            event (str): Nome do evento.
+            **info: Dados adicionais serializáveis em JSON.
+        """
+        if self.running:
+            self.markers.put({'marker': event, 'ts': time.time(), **info})
+
+    def _open_segment(self, frame: np.ndarray, start_ts: float) -> tuple[cv2.VideoWriter, TextIO]:
+        """Abre um novo arquivo de vídeo e seu índice."""
+        height, width = frame.shape[:2]
+        name = time.strftime('%Y%m%d_%H%M%S', time.localtime(start_ts)) + f'_{len(self.segments):04d}'
+        video_path = os.path.join(self.output_dir, name + SEGMENT_EXTENSION)
+        writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*FOURCC), self.fps, (width, height)) # type: ignore
+        index = open(os.path.join(self.output_dir, name + '.jsonl'), 'w', encoding='utf-8')
+        index.write(json.dumps({'segment': name, 'video': os.path.basename(video_path), 'start_ts': start_ts,
+                                'fps': self.fps, 'size': [width, height]}) + '\n')
+        self.segments.append(video_path)
+        return writer, index
+
+    def _run(self) -> None:
+        writer = None
+        index = None
+        segment_start = 0.0
+        segment_frame = 0
+        try:
+            while True:
+                item = self.frames.get()
+                if item is None:
+                    break
+                timestamp, frame = item
+
+                if writer is None or timestamp - segment_start >= self.segment_seconds:
+                    if writer is not None:
+                        writer.release()
+                        index.close() # type: ignore
+                    writer, index = self._open_segment(frame, timestamp)
+                    segment_start = timestamp
+                    segment_frame = 0
+
+                self._flush_markers(index)
+                writer.write(frame)
+                index.write(json.dumps({'frame': segment_frame, 'ts': timestamp}) + '\n') # type: ignore
+                segment_frame += 1
+                self.frames_written += 1
+        except Exception as e:
+            print(f"Erro na thread de gravação: {e}")
+        finally:
+            self._flush_markers(index)
+            if writer is not None:
+                writer.release()
+            if index is not None:
+                index.close() # type: ignore
+
+    def _flush_markers(self, index: TextIO | None) -> None:
+        """Escreve os marcadores pendentes no índice do segmento atual."""
+        if index is None:
+            return
+        while True:
+            try:
+                index.write(json.dumps(self.markers.get_nowait(), ensure_ascii=False) + '\n')
+            except queue.Empty:
+                break
@@ -0,0 +1,349 @@
+"""
+Captura de voz em streaming com detecção de atividade de voz (VAD).
+O áudio do microfone é lido em blocos, reamostrado para 16 kHz no próprio fluxo
+e a gravação termina sozinha quando a fala acaba.
+"""
+import abc
+import json
+import queue
+import threading
+import time
+from typing import Callable
+
+import numpy as np
+import sounddevice as sd
+from scipy.signal import butter, sosfilt, sosfilt_zi
+
+CAPTURE_RATE = 44100 # Taxa nativa do microfone
+TARGET_RATE = 16000 # Taxa usada pelos reconhecedores
+BLOCK_MS = 30 # Duração de cada bloco analisado pelo VAD
+MAX_DURATION = 8.0 # Limite de segurança da gravação (s)
+NO_SPEECH_TIMEOUT = 4.0 # Desiste se ninguém falar nesse intervalo (s)
+END_SILENCE_MS = 700 # Silêncio após a fala que encerra a gravação
+MIN_SPEECH_MS = 150 # Fala mínima para considerar que o usuário começou a falar
+NOISE_CALIBRATION_MS = 300 # Janela inicial usada para estimar o ruído de fundo
+SPEECH_MARGIN_DB = 10.0 # Quanto acima do ruído um bloco precisa estar para ser fala
+PARTIAL_INTERVAL = 1.2 # Intervalo entre resultados parciais em backends online (s)
+
+RECOGNIZER_BACKEND = 'GOOGLE'
+#RECOGNIZER_BACKEND = 'VOSK'
+#RECOGNIZER_BACKEND = 'SPHINX'
+VOSK_MODEL_PATH = 'models/vosk-model-small-pt-0.3'
+LANGUAGE = 'pt-BR'
+
+
+class StreamResampler:
+    """
+    Reamostrador com estado para uso em fluxo contínuo.
+    Aplica um passa-baixas (anti-aliasing) com estado entre blocos e interpolação
+    linear fracionária, evitando descontinuidades nas bordas de cada bloco.
+    Args:
+        in_rate (int): Taxa de amostragem de entrada.
+        out_rate (int): Taxa de amostragem de saída.
+    """
+    def __init__(self, in_rate: int, out_rate: int) -> None:
+        self.step = in_rate / out_rate
+        self.sos = butter(8, 0.45 * out_rate, btype='low', fs=in_rate, output='sos')
+        self.zi = sosfilt_zi(self.sos) * 0.0
+        self.pos = 0.0 # Posição fracionária da próxima amostra de saída
+        self.last = 0.0 # Última amostra do bloco anterior (para interpolar na borda)
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Reamostra um bloco mono em float32 [-1, 1].
+        Args:
+            block (np.ndarray): Bloco de entrada.
+        Returns:
+            np.ndarray: Bloco reamostrado.
+        """
+        if block.size == 0:
+            return block.astype(np.float32)
+        filtered, self.zi = sosfilt(self.sos, block, zi=self.zi)
+        data = np.concatenate(([self.last], filtered))
+        # Índices das amostras de saída relativos a data (data[0] é a amostra anterior)
+        idx = np.arange(self.pos + 1.0, data.size - 1 + 1e-9, self.step)
+        out = np.interp(idx, np.arange(data.size), data)
+        self.pos = (idx[-1] + self.step) - (data.size - 1) - 1.0 if idx.size else self.pos - block.size
+        self.last = float(data[-1])
+        return out.astype(np.float32)
+
+
+class EnergyVAD:
+    """
+    Detector de atividade de voz por energia com limiar adaptativo.
+    O ruído de fundo é estimado no início e atualizado lentamente durante o silêncio.
+    Args:
+        block_ms (int): Duração de cada bloco em ms.
+    """
+    def __init__(self, block_ms: int = BLOCK_MS) -> None:
+        self.block_ms = block_ms
+        self.noise_db = -60.0
+        self.calibration_blocks = max(1, NOISE_CALIBRATION_MS // block_ms)
+        self.blocks_seen = 0
+        self.speech_ms = 0
+        self.silence_ms = 0
+        self.started = False
+
+    @staticmethod
+    def level_db(block: np.ndarray) -> float:
+        """Retorna o nível RMS do bloco em dBFS."""
+        rms = float(np.sqrt(np.mean(np.square(block, dtype=np.float64)))) if block.size else 0.0
+        return 20.0 * np.log10(max(rms, 1e-6))
+
+    def update(self, block: np.ndarray) -> bool:
+        """
+        Processa um bloco e informa se a fala terminou.
+        Args:
+            block (np.ndarray): Bloco de áudio em float32.
+        Returns:
+            bool: True quando a fala começou e já houve silêncio suficiente para encerrar.
+        """
+        level = self.level_db(block)
+        self.blocks_seen += 1
+
+        if self.blocks_seen <= self.calibration_blocks:
+            # Média móvel durante a calibração inicial
+            weight = 1.0 / self.blocks_seen
+            self.noise_db = (1 - weight) * self.noise_db + weight * level if self.blocks_seen > 1 else level
+            return False
+
+        is_speech = level > self.noise_db + SPEECH_MARGIN_DB
+        if is_speech:
+            self.speech_ms += self.block_ms
+            self.silence_ms = 0
+            if self.speech_ms >= MIN_SPEECH_MS:
+                self.started = True
+        else:
+            self.silence_ms += self.block_ms
+            if not self.started:
+                self.speech_ms = 0
+            self.noise_db = 0.95 * self.noise_db + 0.05 * level # Acompanha o ruído de fundo
+
+        return self.started and self.silence_ms >= END_SILENCE_MS
+
+
+class RecognizerBackend(abc.ABC):
+    """
+    Interface comum dos reconhecedores de fala.
+    Subclasses recebem PCM 16 bits mono em TARGET_RATE e precisam implementar transcribe.
+    """
+    name = 'BASE'
+    streaming = False # True se o backend produz parciais a partir de cada bloco
+
+    def accept(self, pcm: bytes) -> str | None:
+        """Alimenta um bloco de áudio. Backends em streaming podem retornar um parcial."""
+        return None
+
+    @abc.abstractmethod
+    def transcribe(self, pcm: bytes) -> str:
+        """Transcreve o áudio completo e retorna o texto final."""
+
+    def reset(self) -> None:
+        """Prepara o backend para uma nova gravação."""
+
+
+class GoogleBackend(RecognizerBackend):
+    """Reconhecimento online via Google Web Speech (speech_recognition)."""
+    name = 'GOOGLE'
+
+    def __init__(self) -> None:
+        import speech_recognition as sr
+        self.sr = sr
+        self.recognizer = sr.Recognizer()
+
+    def transcribe(self, pcm: bytes) -> str:
+        audio = self.sr.AudioData(pcm, TARGET_RATE, 2) # Sem passar por WAV intermediário
+        return self.recognizer.recognize_google(audio, language=LANGUAGE) # type: ignore
+
+
+class SphinxBackend(GoogleBackend):
+    """Reconhecimento offline via CMU Sphinx (requer pocketsphinx e modelo pt-BR)."""
+    name = 'SPHINX'
+
+    def transcribe(self, pcm: bytes) -> str:
+        audio = self.sr.AudioData(pcm, TARGET_RATE, 2)
+        return self.recognizer.recognize_sphinx(audio, language=LANGUAGE) # type: ignore
+
+
+class VoskBackend(RecognizerBackend):
+    """Reconhecimento offline e em streaming via Vosk (requer o modelo em VOSK_MODEL_PATH)."""
+    name = 'VOSK'
+    streaming = True
+
+    def __init__(self, model_path: str = VOSK_MODEL_PATH) -> None:
+        import vosk
+        vosk.SetLogLevel(-1)
+        self.vosk = vosk
+        self.model = vosk.Model(model_path)
+        self.reset()
+
+    def reset(self) -> None:
+        self.recognizer = self.vosk.KaldiRecognizer(self.model, TARGET_RATE)
+        self.segments: list[str] = [] # Trechos já fechados pelo endpoint do Vosk (~0,5 s de silêncio)
+
+    def accept(self, pcm: bytes) -> str | None:
+        if self.recognizer.AcceptWaveform(pcm):
+            segment = json.loads(self.recognizer.Result()).get('text')
+            if segment:
+                self.segments.append(segment)
+            return ' '.join(self.segments) or None
+        partial = json.loads(self.recognizer.PartialResult()).get('partial')
+        return ' '.join(self.segments + [partial]) if partial else None
+
+    def transcribe(self, pcm: bytes) -> str:
+        last = json.loads(self.recognizer.FinalResult()).get('text', '')
+        return ' '.join(self.segments + [last] if last else self.segments)
+
+
+RECOGNIZER_BACKENDS: dict[str, type[RecognizerBackend]] = {
+    'GOOGLE': GoogleBackend,
+    'SPHINX': SphinxBackend,
+    'VOSK': VoskBackend,
+}
+
+def get_recognizer(name: str = RECOGNIZER_BACKEND) -> RecognizerBackend:
+    """
+    Instancia o backend de reconhecimento pelo nome.
+    Args:
+        name (str): Nome do backend (GOOGLE, SPHINX ou VOSK).
+    Returns:
+        RecognizerBackend: Backend pronto para uso.
+    """
+    try:
+        return RECOGNIZER_BACKENDS[name.upper()]()
+    except KeyError:
+        raise ValueError(f"Backend de reconhecimento desconhecido: {name}")
+
+
+class VoiceCapture:
+    """
+    Pipeline de captura: microfone -> reamostragem 16 kHz -> VAD -> reconhecedor.
+    Os callbacks são chamados a partir da thread de processamento; a GUI deve
+    repassá-los para a thread do Tk com root.after.
+    Args:
+        backend (RecognizerBackend): Reconhecedor usado para parciais e resultado final.
+    """
+    def __init__(self, backend: RecognizerBackend) -> None:
+        self.backend = backend
+        self.blocks: queue.Queue[np.ndarray] = queue.Queue()
+        self.stop_event = threading.Event()
+        self.thread: threading.Thread | None = None
+        self.partial_busy = threading.Event()
+        self.final_sent = threading.Event() # Parciais atrasados não sobrescrevem o texto final
+        self.final_lock = threading.Lock()
+
+    def start(self, on_partial: Callable[[str], None], on_final: Callable[[str], None]) -> None:
+        """
+        Inicia a captura em uma thread própria.
+        Args:
+            on_partial (Callable): Recebe o texto parcial enquanto o usuário fala.
+            on_final (Callable): Recebe o texto final (ou mensagem de erro).
+        """
+        self.stop_event.clear()
+        self.final_sent.clear()
+        self.thread = threading.Thread(target=self._run, args=(on_partial, on_final), daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Encerra a gravação manualmente; o áudio já capturado ainda é transcrito."""
+        self.stop_event.set()
+
+    def _callback(self, indata: np.ndarray, frames: int, time_info, status) -> None:
+        """Callback do PortAudio: apenas enfileira o bloco (sem processamento pesado)."""
+        self.blocks.put(indata[:, 0].copy())
+
+    def _run(self, on_partial: Callable[[str], None], on_final: Callable[[str], None]) -> None:
+        resampler = StreamResampler(CAPTURE_RATE, TARGET_RATE)
+        vad = EnergyVAD()
+        self.backend.reset()
+        chunks: list[bytes] = []
+        block_size = int(CAPTURE_RATE * BLOCK_MS / 1000)
+        start = time.time()
+        last_partial = start
+
+        try:
+            with sd.InputStream(samplerate=CAPTURE_RATE, channels=1, dtype='float32',
+                                blocksize=block_size, callback=self._callback):
+                while not self.stop_event.is_set():
+                    try:
+                        block = self.blocks.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+
+                    audio_16k = resampler.process(block)
+                    pcm = (np.clip(audio_16k, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+                    chunks.append(pcm)
+
+                    if self.backend.streaming:
+                        partial = self.backend.accept(pcm)
+                        if partial:
+                            on_partial(partial)
+                    elif vad.started and time.time() - last_partial >= PARTIAL_INTERVAL:
+                        last_partial = time.time()
+                        self._request_partial(b''.join(chunks), on_partial)
+
+                    if vad.update(block):
+                        print("Fim da fala detectado.")
+                        break
+                    elapsed = time.time() - start
+                    if elapsed >= MAX_DURATION or (not vad.started and elapsed >= NO_SPEECH_TIMEOUT):
+                        break
+        except Exception as e:
+            print(f"Erro na captura de áudio: {e}")
+            self._deliver_final(on_final, "Erro ao processar o áudio.")
+            return
+        finally:
+            self._drain()
+
+        print(f"Gravação encerrada após {time.time() - start:.2f}s.")
+        self._deliver_final(on_final, self._transcribe(b''.join(chunks)))
+
+    def _deliver_final(self, on_final: Callable[[str], None], text: str) -> None:
+        """Entrega o texto final e bloqueia os parciais que ainda estiverem em andamento."""
+        with self.final_lock:
+            self.final_sent.set()
+            on_final(text)
+
+    def _request_partial(self, pcm: bytes, on_partial: Callable[[str], None]) -> None:
+        """Dispara uma transcrição parcial em segundo plano, no máximo uma por vez."""
+        if self.partial_busy.is_set():
+            return
+        self.partial_busy.set()
+
+        def worker():
+            try:
+                text = self.backend.transcribe(pcm)
+                with self.final_lock:
+                    if text and not self.stop_event.is_set() and not self.final_sent.is_set():
+                        on_partial(text)
+            except Exception:
+                pass # Parciais são descartáveis
+            finally:
+                self.partial_busy.clear()
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _transcribe(self, pcm: bytes) -> str:
+        """Transcreve o áudio final, tratando os erros como o fluxo antigo."""
+        if not pcm:
+            return "Não foi possível entender o áudio."
+        try:
+            text = self.backend.transcribe(pcm)
+            print(f"Texto reconhecido: '{text}'")
+            return text or "Não foi possível entender o áudio."
+        except Exception as e:
+            error_name = type(e).__name__
+            if error_name == 'UnknownValueError':
+                return "Não foi possível entender o áudio."
+            if error_name == 'RequestError':
+                return "Erro de conexão com o serviço de transcrição."
+            print(f"Erro inesperado na transcrição: {e}")
+            return "Erro ao processar o áudio."
+
+    def _drain(self) -> None:
+        """Descarta blocos remanescentes da fila."""
+        while not self.blocks.empty():
+            try:
+                self.blocks.get_nowait()
+            except queue.Empty:
+                break